@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the parts of Google Photos that gphotos-cdp drives
+
+Serves a synthetic library of N photos over plain HTTP, with the markup and
+keyboard handling the downloader relies on:
+
+    GET /login                  redirects to the library, i.e. "logged in"
+    GET /                       photo grid in [role="main"], tiles are
+                                a[href^="./photo/"], loaded in chunks while
+                                scrolling; ArrowRight focuses the next tile
+    GET /photo/<id>             photo page: c-wiz[data-media-key] with the
+                                "Photo - Landscape - <date>" aria-label under
+                                [data-p]; ArrowRight moves to the next item
+                                with history.pushState, Shift+D downloads it
+    GET /_/grid, /_/item/<id>/next, /_/download/<id>
+                                what those pages fetch
+    GET /_/stats                requests served, downloads, duplicates
+
+Downloads are small JPEG files (JFIF header and comment padding, no image
+data) with a Content-Disposition filename, optionally throttled. Date
+filters (-from) work; the date bisection of -to and albums are not imitated.
+
+    python bench/fake_gphotos.py --items 1000 --port 8090
+    gphotos-cdp -baseurl http://127.0.0.1:8090 -dev -headless -dldir /tmp/dl
+"""
+import argparse
+import base64
+import hashlib
+import json
+import re
+import struct
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+GRID_CHUNK = 200
+
+
+def photo_label(dt):
+    """aria-label of a photo in the English UI, e.g. "Photo - Landscape - Nov 17, 2025, 11:08:35 PM" """
+    hour = dt.hour % 12 or 12
+    return f"Photo - Landscape - {dt:%b} {dt.day}, {dt.year}, {hour}:{dt:%M:%S} {'AM' if dt.hour < 12 else 'PM'}"
+
+
+def jpeg_body(item_id, size):
+    """JFIF file of about `size` bytes, unique per item"""
+    body = [b'\xff\xd8', b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\0\x01\x01\0\0\x01\0\x01\0\0']
+    comment = item_id.encode() + b'\0'
+    remaining = max(size - 24, len(comment))
+    while remaining > 0:
+        chunk = min(remaining, 65533)
+        data = (comment * (chunk // len(comment) + 1))[:chunk]
+        body.append(b'\xff\xfe' + struct.pack('>H', chunk + 2) + data)
+        remaining -= chunk + 4
+    body.append(b'\xff\xd9')
+    return b''.join(body)
+
+
+class FakeLibrary:
+    """N photos, newest first, with deterministic IDs, dates and filenames"""
+
+    def __init__(self, items=1000, size=256 * 1024, seed='bench', newest=None, interval=timedelta(hours=7)):
+        newest = (newest or datetime.now()).replace(microsecond=0)
+        self.size = size
+        self.items = []
+        for i in range(items):
+            digest = hashlib.sha256(f'{seed}:{i}'.encode()).digest()
+            item_id = 'AF1Qip' + base64.urlsafe_b64encode(digest).decode()[:38]
+            self.items.append({
+                'id': item_id,
+                'label': photo_label(newest - interval * i),
+                'filename': f'IMG_{i + 1:05d}.jpg',
+            })
+        self.index = {item['id']: i for i, item in enumerate(self.items)}
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.downloads = Counter()
+        self.bytes_sent = 0
+
+    def find(self, item_id):
+        i = self.index.get(item_id)
+        return None if i is None else self.items[i]
+
+    def next_item(self, item_id):
+        i = self.index.get(item_id)
+        if i is None or i + 1 >= len(self.items):
+            return None
+        return self.items[i + 1]
+
+    def count(self, kind):
+        with self.lock:
+            self.requests[kind] += 1
+
+    def record_download(self, item_id, size):
+        with self.lock:
+            self.downloads[item_id] += 1
+            self.bytes_sent += size
+
+    def stats(self):
+        with self.lock:
+            return {
+                'items': len(self.items),
+                'requests': dict(self.requests),
+                'downloads': sum(self.downloads.values()),
+                'items_downloaded': len(self.downloads),
+                'duplicate_downloads': sum(n - 1 for n in self.downloads.values()),
+                'bytes_sent': self.bytes_sent,
+            }
+
+
+GRID_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Photos - Google Photos</title>
+<style>
+  body { margin: 0; }
+  [role="main"] { position: relative; height: 100vh; overflow-y: auto; }
+  #grid { display: flex; flex-wrap: wrap; width: 1600px; }
+  #grid a { display: block; width: 196px; height: 196px; margin: 2px; background: #ccd; }
+  #grid a:focus { outline: 3px solid #14c; }
+</style>
+</head>
+<body>
+<c-wiz>
+  <div role="main"><div id="grid"></div><div id="spacer"></div></div>
+</c-wiz>
+<script>
+const TOTAL = __TOTAL__, CHUNK = __CHUNK__, PER_ROW = 8, ROW_HEIGHT = 200;
+const main = document.querySelector('[role="main"]');
+const grid = document.getElementById('grid');
+const spacer = document.getElementById('spacer');
+let loaded = 0, loading = false;
+
+function updateSpacer() {
+  spacer.style.height = Math.ceil((TOTAL - loaded) / PER_ROW) * ROW_HEIGHT + 'px';
+}
+
+async function loadChunk() {
+  if (loading || loaded >= TOTAL) return;
+  loading = true;
+  try {
+    const items = await (await fetch('/_/grid?offset=' + loaded + '&limit=' + CHUNK)).json();
+    for (const item of items) {
+      const a = document.createElement('a');
+      a.href = './photo/' + item.id;
+      a.setAttribute('aria-label', item.label);
+      grid.appendChild(a);
+    }
+    loaded += items.length;
+    updateSpacer();
+  } finally {
+    loading = false;
+  }
+  maybeLoad();
+}
+
+function maybeLoad() {
+  if (main.scrollTop + main.clientHeight >= spacer.offsetTop - 2 * ROW_HEIGHT) loadChunk();
+}
+
+main.addEventListener('scroll', maybeLoad);
+
+document.addEventListener('keydown', (e) => {
+  const tiles = grid.children;
+  if (e.key === 'ArrowRight') {
+    const i = [...tiles].indexOf(document.activeElement);
+    if (i + 1 < tiles.length) tiles[i + 1].focus();
+    e.preventDefault();
+  } else if (e.key === 'ArrowDown') {
+    main.scrollBy(0, ROW_HEIGHT);
+  } else if (e.key === 'PageDown') {
+    main.scrollBy(0, main.clientHeight);
+  } else if (e.key === 'PageUp') {
+    main.scrollBy(0, -main.clientHeight);
+  } else if (e.key === 'End') {
+    main.scrollTo(0, main.scrollHeight);
+  }
+});
+
+updateSpacer();
+loadChunk();
+</script>
+</body>
+</html>
+"""
+
+PHOTO_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Photo - Google Photos</title>
+</head>
+<body>
+<div id="viewer"></div>
+<script>
+const INFO_DELAY = __INFO_DELAY__;
+const viewer = document.getElementById('viewer');
+let current = __ITEM__;
+let renderTimer = null;
+
+function render(item) {
+  // like the real viewer, the info label shows up a moment after the page
+  viewer.innerHTML = '';
+  const wiz = document.createElement('c-wiz');
+  wiz.setAttribute('data-media-key', item.id);
+  wiz.setAttribute('data-p', '%.@.[["' + item.id + '"]]');
+  viewer.appendChild(wiz);
+  clearTimeout(renderTimer);
+  renderTimer = setTimeout(() => {
+    const info = document.createElement('div');
+    info.setAttribute('aria-label', item.label);
+    wiz.appendChild(info);
+  }, INFO_DELAY);
+}
+
+async function next() {
+  const resp = await fetch('/_/item/' + current.id + '/next');
+  if (resp.status !== 200) return;
+  current = await resp.json();
+  history.pushState(null, '', './' + current.id);
+  render(current);
+}
+
+function download() {
+  const a = document.createElement('a');
+  a.href = '/_/download/' + current.id;
+  a.download = '';
+  document.body.appendChild(a);
+  a.click();
+  a.remove();
+}
+
+document.addEventListener('keydown', (e) => {
+  if (e.key === 'ArrowRight') {
+    next();
+  } else if ((e.key === 'D' || e.key === 'd') && e.shiftKey) {
+    download();
+  }
+});
+
+render(current);
+</script>
+</body>
+</html>
+"""
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeGooglePhotos/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    @property
+    def library(self):
+        return self.server.library
+
+    def _send(self, body, content_type, status=200, headers=None):
+        if isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_json(self, payload, status=200):
+        self._send(json.dumps(payload), 'application/json', status)
+
+    def _not_found(self):
+        self.library.count('not_found')
+        self._send('<!DOCTYPE html><html lang="en"><body>Not found</body></html>', 'text/html', 404)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        url = urlparse(self.path)
+        path = url.path.rstrip('/') or '/'
+
+        if path == '/login':
+            self.library.count('login')
+            self.send_response(302)
+            self.send_header('Location', '/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif path == '/':
+            self.library.count('grid_page')
+            page = GRID_PAGE.replace('__TOTAL__', str(len(self.library.items))).replace('__CHUNK__', str(GRID_CHUNK))
+            self._send(page, 'text/html; charset=utf-8')
+        elif path == '/_/grid':
+            self.library.count('grid_chunk')
+            params = parse_qs(url.query)
+            offset = int(params.get('offset', ['0'])[0])
+            limit = int(params.get('limit', [str(GRID_CHUNK)])[0])
+            items = self.library.items[offset:offset + limit]
+            self._send_json([{'id': item['id'], 'label': item['label']} for item in items])
+        elif path == '/_/stats':
+            self._send_json(self.library.stats())
+        elif m := re.fullmatch(r'/photo/([\w-]+)', path):
+            item = self.library.find(m.group(1))
+            if item is None:
+                return self._not_found()
+            self.library.count('photo_page')
+            page = PHOTO_PAGE.replace('__INFO_DELAY__', str(self.server.info_delay_ms)).replace(
+                '__ITEM__', json.dumps(item).replace('</', '<\\/'))
+            self._send(page, 'text/html; charset=utf-8')
+        elif m := re.fullmatch(r'/_/item/([\w-]+)/next', path):
+            self.library.count('next_item')
+            item = self.library.next_item(m.group(1))
+            if item is None:
+                return self._send_json(None, 404)
+            self._send_json(item)
+        elif m := re.fullmatch(r'/_/download/([\w-]+)', path):
+            item = self.library.find(m.group(1))
+            if item is None:
+                return self._not_found()
+            self._download(item)
+        else:
+            self._not_found()
+
+    def _download(self, item):
+        body = jpeg_body(item['id'], self.library.size)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Content-Disposition', f'attachment; filename="{item["filename"]}"')
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+        # throttled downloads are sent in 64 KiB pieces, paced to the bandwidth
+        step = 64 * 1024
+        pause = step / self.server.bandwidth if self.server.bandwidth else 0
+        for offset in range(0, len(body), step):
+            self.wfile.write(body[offset:offset + step])
+            if pause:
+                time.sleep(pause)
+        self.library.record_download(item['id'], len(body))
+
+
+class FakeGooglePhotosServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, library, latency_ms=0, info_delay_ms=100, bandwidth=0, verbose=False):
+        super().__init__(address, Handler)
+        self.library = library
+        self.latency = latency_ms / 1000
+        self.info_delay_ms = info_delay_ms
+        self.bandwidth = bandwidth
+        self.verbose = verbose
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def handle_error(self, request, client_address):
+        # Chrome drops connections it no longer needs, e.g. when navigating away
+        if not isinstance(sys.exc_info()[1], (ConnectionError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name='fake-gphotos', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8090, help='Port to listen on')
+    parser.add_argument('--items', type=int, default=1000, help='Number of photos in the library')
+    parser.add_argument('--size-kb', type=int, default=256, help='Size of each downloaded file')
+    parser.add_argument('--latency-ms', type=int, default=0, help='Delay added to every response')
+    parser.add_argument('--info-delay-ms', type=int, default=100, help='Delay before a photo page shows its date label')
+    parser.add_argument('--bandwidth-mb', type=float, default=0, help='Download speed per file in MB/s, 0 for unlimited')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    library = FakeLibrary(args.items, args.size_kb * 1024)
+    server = FakeGooglePhotosServer((args.host, args.port), library, args.latency_ms, args.info_delay_ms,
+                                    int(args.bandwidth_mb * 1024 * 1024), args.verbose)
+    print(f"Fake Google Photos with {args.items} items on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(library.stats()))
+
+
+if __name__ == '__main__':
+    main()
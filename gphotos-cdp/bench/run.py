@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for the downloader
+
+Serves a synthetic library with fake_gphotos.py and, for every worker count,
+runs the real pipeline against it from an empty download dir: src/sync.sh
+(slot request, Chrome profile prep, gphotos-cdp with -exif and -removed), or
+gphotos-cdp on its own with --direct. gphotos-cdp runs with -baseurl pointing
+at the stand-in and debug JSON logs, which the runner parses for per-stage
+latencies:
+
+    tab_lock        waiting for the active tab (photo data, Shift+D)
+    nav_right       ArrowRight to the next item of a batch
+    photo_data      reading the date label of the item
+    download_start  Shift+D until Chrome reports the download
+    process         moving the file, dates, exif, -run
+    item            whole item, photo data and download in parallel
+
+CPU time and RSS are sampled from /proc for the whole process tree (sync.sh,
+gphotos-cdp, Chrome and its renderers). RSS is summed per process, so pages
+Chrome processes share are counted more than once.
+
+    python bench/run.py                          # 500 items, 1, 2, 4, 6 and 8 workers
+    python bench/run.py --items 2000 --workers 6,12 --batchsize 20
+    python bench/run.py --direct --execpath /usr/bin/chromium --output results.json
+
+Needs Chrome (or -execpath), jq for sync.sh's logging, and exiftool unless
+--direct is used. gphotos-cdp is taken from --binary, $PATH, or built with Go.
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CDP_DIR = os.path.dirname(BENCH_DIR)
+SRC_DIR = os.path.join(os.path.dirname(CDP_DIR), 'src')
+sys.path.insert(0, BENCH_DIR)
+
+from fake_gphotos import FakeLibrary, FakeGooglePhotosServer  # noqa: E402
+
+# Stage name -> start of the gphotos-cdp debug message carrying its "duration"
+STAGES = {
+    'tab_lock': 'acquired tab lock',
+    'nav_right': 'navigation done',
+    'photo_data': 'done finding photo data nodes',
+    'download_start': 'download started',
+    'process': 'processed downloaded item',
+    'item': 'downloadAndProcessItem successfully completed',
+}
+
+CLK_TCK = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class TreeSampler(threading.Thread):
+    """Samples CPU time and RSS of a process and all its descendants from /proc"""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(name='tree-sampler', daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.cpu = {}  # (pid, start time) -> CPU seconds, kept after the process exits
+        self.peak_rss = 0
+        self.peak_processes = 0
+        self.stopped = threading.Event()
+
+    @staticmethod
+    def _read_stat(pid):
+        with open(f'/proc/{pid}/stat') as f:
+            # the command name can contain spaces, fields start after its closing parenthesis
+            fields = f.read().rsplit(')', 1)[1].split()
+        ppid, utime, stime, start = int(fields[1]), int(fields[11]), int(fields[12]), int(fields[19])
+        return ppid, (utime + stime) / CLK_TCK, start
+
+    def sample(self):
+        stats = {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    stats[int(entry)] = self._read_stat(entry)
+                except (OSError, IndexError, ValueError):
+                    pass
+        children = {}
+        for pid, (ppid, _, _) in stats.items():
+            children.setdefault(ppid, []).append(pid)
+
+        tree, todo = [], [self.pid]
+        while todo:
+            pid = todo.pop()
+            if pid in stats:
+                tree.append(pid)
+                todo.extend(children.get(pid, []))
+
+        rss = 0
+        for pid in tree:
+            _, cpu, start = stats[pid]
+            self.cpu[(pid, start)] = cpu
+            try:
+                with open(f'/proc/{pid}/statm') as f:
+                    rss += int(f.read().split()[1]) * PAGE_SIZE
+            except (OSError, IndexError, ValueError):
+                pass
+        self.peak_rss = max(self.peak_rss, rss)
+        self.peak_processes = max(self.peak_processes, len(tree))
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    @property
+    def cpu_seconds(self):
+        return sum(self.cpu.values())
+
+
+def find_binary(path, build_dir):
+    """gphotos-cdp from --binary or $PATH, otherwise built from this checkout"""
+    if path:
+        return os.path.abspath(path)
+    found = shutil.which('gphotos-cdp')
+    if found:
+        return found
+    binary = os.path.join(build_dir, 'gphotos-cdp')
+    print(f"Building gphotos-cdp from {CDP_DIR}")
+    subprocess.run(['go', 'build', '-o', binary, '.'], cwd=CDP_DIR, check=True)
+    return binary
+
+
+def check_tools(args):
+    if args.direct:
+        needed = ['exiftool'] if args.exif else []
+    else:
+        needed = ['jq', 'exiftool']
+    missing = [tool for tool in needed if not shutil.which(tool)]
+    if missing:
+        sys.exit(f"Missing {', '.join(missing)}: sync.sh needs jq for logging and runs gphotos-cdp with -exif. "
+                 "Install them or use --direct.")
+
+
+def build_command(args, binary, url, workers, profile_dir, download_dir, bin_dir):
+    """Command line and environment for one run"""
+    extra = ['-baseurl', url]
+    if args.batchsize:
+        extra += ['-batchsize', str(args.batchsize)]
+    if args.execpath:
+        extra += ['-execpath', args.execpath]
+
+    if args.direct:
+        cmd = [binary, '-dldir', download_dir, '-profile', profile_dir, '-headless', '-json', '-loglevel', 'debug',
+               '-removed', '-workers', str(workers)] + extra
+        if args.exif:
+            cmd.append('-exif')
+        return cmd, dict(os.environ)
+
+    # sync.sh calls gphotos-cdp from $PATH
+    os.symlink(binary, os.path.join(bin_dir, 'gphotos-cdp'))
+    env = dict(os.environ,
+               APP_DIR=SRC_DIR,
+               PATH=bin_dir + os.pathsep + os.environ.get('PATH', ''),
+               PROFILE_DIR=profile_dir,
+               DOWNLOAD_DIR=download_dir,
+               WORKER_COUNT=str(workers),
+               LOGLEVEL='debug',
+               SYNC_MODE='full',
+               # nothing listens there, so the sync starts without waiting for a slot
+               COORDINATOR_URL='http://127.0.0.1:9',
+               GPHOTOS_CDP_ARGS=' '.join(f'"{arg}"' for arg in extra))
+    env.pop('ALBUMS', None)
+    return ['sh', os.path.join(SRC_DIR, 'sync.sh')], env
+
+
+def read_logs(stream, run, log_file):
+    """Collect stage durations and progress from the JSON log lines of the run"""
+    for line in stream:
+        log_file.write(line)
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(entry, dict):
+            continue
+        message = entry.get('message', '')
+        level = entry.get('level')
+        if message == 'STARTING SYNC':
+            run['sync_started'] = time.monotonic()
+        elif message.startswith('in total: synced'):
+            run['sync_finished'] = time.monotonic()
+        elif message.startswith('downloaded file(s)'):
+            run['downloaded'] += 1
+        if level in ('error', 'fatal', 'panic'):
+            run['errors'].append(message)
+        if 'duration' in entry:
+            for stage, prefix in STAGES.items():
+                if message.startswith(prefix):
+                    run['stages'][stage].append(entry['duration'])
+                    break
+
+
+def summarize_stages(stages):
+    return {
+        stage: {
+            'count': len(values),
+            'mean_ms': round(sum(values) / len(values), 1) if values else None,
+            'p50_ms': percentile(values, 50),
+            'p95_ms': percentile(values, 95),
+        }
+        for stage, values in stages.items()
+    }
+
+
+def count_items(download_dir):
+    if not os.path.isdir(download_dir):
+        return 0
+    return sum(1 for e in os.scandir(download_dir) if e.is_dir() and e.name != 'tmp' and not e.name.startswith('.'))
+
+
+def run_workers(workers, args, binary, root):
+    run_dir = tempfile.mkdtemp(prefix=f'w{workers}-', dir=root)
+    profile_dir = os.path.join(run_dir, 'profile')
+    download_dir = os.path.join(run_dir, 'download')
+    bin_dir = os.path.join(run_dir, 'bin')
+    os.makedirs(bin_dir)
+
+    library = FakeLibrary(args.items, args.size_kb * 1024)
+    server = FakeGooglePhotosServer(('127.0.0.1', 0), library, args.latency_ms, args.info_delay_ms,
+                                    int(args.bandwidth_mb * 1024 * 1024)).start()
+    cmd, env = build_command(args, binary, server.url, workers, profile_dir, download_dir, bin_dir)
+
+    run = {'downloaded': 0, 'errors': [], 'stages': {stage: [] for stage in STAGES}}
+    log_path = os.path.join(run_dir, 'sync.log')
+    started = time.monotonic()
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                            start_new_session=True)
+    sampler = TreeSampler(proc.pid)
+    sampler.start()
+    with open(log_path, 'w') as log_file:
+        reader = threading.Thread(target=read_logs, args=(proc.stdout, run, log_file), daemon=True)
+        reader.start()
+        try:
+            returncode = proc.wait(timeout=args.timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            returncode = proc.wait()
+            run['errors'].append(f'timed out after {args.timeout}s')
+        finished = time.monotonic()
+        sampler.stop()
+        reader.join(timeout=10)
+    server.stop()
+
+    # the sync phase ends with the final progress line, or with the process if that never came
+    sync_started = run.get('sync_started', started)
+    sync_seconds = run.get('sync_finished', finished) - sync_started
+    stats = library.stats()
+    result = {
+        'workers': workers,
+        'returncode': returncode,
+        'items_downloaded': run['downloaded'],
+        'items_on_disk': count_items(download_dir),
+        'server_downloads': stats['downloads'],
+        'duplicate_downloads': stats['duplicate_downloads'],
+        'startup_seconds': round(sync_started - started, 2),
+        'sync_seconds': round(sync_seconds, 2),
+        'total_seconds': round(finished - started, 2),
+        'items_per_second': round(run['downloaded'] / sync_seconds, 2) if sync_seconds > 0 else None,
+        'cpu_seconds': round(sampler.cpu_seconds, 1),
+        'cpu_percent': round(sampler.cpu_seconds / (finished - started) * 100, 1),
+        'peak_rss_mb': round(sampler.peak_rss / 1024 / 1024, 1),
+        'peak_processes': sampler.peak_processes,
+        'stages': summarize_stages(run['stages']),
+        'errors': run['errors'][:20],
+        'log': log_path,
+    }
+    return result
+
+
+def print_result(r, items):
+    status = 'ok' if r['returncode'] == 0 and r['items_on_disk'] == items else f"exit {r['returncode']}"
+    print(f"  {r['workers']:>2} workers  {r['items_on_disk']}/{items} items  {r['items_per_second']} items/s  "
+          f"sync {r['sync_seconds']} s (startup {r['startup_seconds']} s)  "
+          f"CPU {r['cpu_seconds']} s ({r['cpu_percent']}%)  RSS {r['peak_rss_mb']} MB  [{status}]")
+    for stage, s in r['stages'].items():
+        if s['count']:
+            print(f"      {stage:15} n={s['count']:<6} p50 {s['p50_ms']} ms  p95 {s['p95_ms']} ms  mean {s['mean_ms']} ms")
+    for error in r['errors'][:3]:
+        print(f"      error: {error}")
+    if r['duplicate_downloads']:
+        print(f"      {r['duplicate_downloads']} item(s) downloaded more than once")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=500, help='Number of photos in the fake library')
+    parser.add_argument('--workers', default='1,2,4,6,8', help='Comma-separated worker counts (WORKER_COUNT / -workers)')
+    parser.add_argument('--batchsize', type=int, default=0, help='-batchsize passed to gphotos-cdp')
+    parser.add_argument('--size-kb', type=int, default=256, help='Size of each downloaded file')
+    parser.add_argument('--latency-ms', type=int, default=20, help='Delay the stand-in adds to every response')
+    parser.add_argument('--info-delay-ms', type=int, default=100, help='Delay before a photo page shows its date label')
+    parser.add_argument('--bandwidth-mb', type=float, default=0, help='Download speed per file in MB/s, 0 for unlimited')
+    parser.add_argument('--direct', action='store_true', help='Run gphotos-cdp directly instead of through sync.sh')
+    parser.add_argument('--exif', action='store_true', help='With --direct, also pass -exif')
+    parser.add_argument('--binary', help='gphotos-cdp binary to run')
+    parser.add_argument('--execpath', help='Chrome/Chromium binary, passed as -execpath')
+    parser.add_argument('--timeout', type=int, default=1800, help='Seconds before a run is killed')
+    parser.add_argument('--keep', action='store_true', help='Keep download dirs and logs')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    check_tools(args)
+    root = tempfile.mkdtemp(prefix='gphotos-cdp-bench-')
+    results = []
+    try:
+        binary = find_binary(args.binary, root)
+        print(f"{args.items} items, {args.size_kb} KB each, {args.latency_ms} ms latency, "
+              f"{'gphotos-cdp' if args.direct else 'sync.sh'}:")
+        for workers in [int(w) for w in args.workers.split(',')]:
+            result = run_workers(workers, args, binary, root)
+            print_result(result, args.items)
+            results.append(result)
+    finally:
+        if args.keep:
+            print(f"Logs and downloads kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+            for result in results:
+                result.pop('log', None)
+
+    if args.output:
+        report = {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'settings': {k: getattr(args, k) for k in ('items', 'batchsize', 'size_kb', 'latency_ms', 'info_delay_ms',
+                                                       'bandwidth_mb', 'direct', 'exif')},
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if any(r['returncode'] != 0 or r['items_on_disk'] != args.items for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+package main
+
+import (
+	"bufio"
+	"fmt"
+	"io"
+	"os"
+	"os/exec"
+	"path/filepath"
+	"strings"
+	"sync"
+	"sync/atomic"
+
+	"github.com/rs/zerolog/log"
+)
+
+// exifCondition only sets DateTimeOriginal when it is missing or differs by more than a year from the file date,
+// which at this point is the date from Google Photos. Same rules as postdl.sh.
+const exifCondition = `not $DateTimeOriginal or ($datetimeoriginal gt ${filemodifydate;ShiftTime("1 0")}) or ($filemodifydate gt ${datetimeoriginal;ShiftTime("1 0")})`
+
+// maximum number of files a worker sends to exiftool in one write
+const exifBatchSize = 32
+
+type ExifResult int
+
+const (
+	ExifUpdated ExifResult = iota
+	ExifUnchanged
+	ExifUnsupported
+	ExifFailed
+)
+
+type exifJob struct {
+	filePath string
+	done     chan ExifResult
+}
+
+// ExifPool keeps a number of `exiftool -stay_open` processes running and feeds them the downloaded files in
+// batches, so that each file doesn't pay for starting a shell and a Perl interpreter.
+type ExifPool struct {
+	queue  chan exifJob
+	wg     sync.WaitGroup
+	counts [ExifFailed + 1]atomic.Int64
+}
+
+// NewExifPool starts n exiftool workers
+func NewExifPool(n int) (*ExifPool, error) {
+	if _, err := exec.LookPath("exiftool"); err != nil {
+		return nil, fmt.Errorf("exiftool not found: %w", err)
+	}
+	p := &ExifPool{queue: make(chan exifJob, n*exifBatchSize)}
+	for i := range n {
+		p.wg.Add(1)
+		go p.worker(i + 1)
+	}
+	log.Info().Msgf("started %d exiftool workers", n)
+	return p, nil
+}
+
+// Submit queues a file to have its DateTimeOriginal updated, the result is sent to the returned channel
+func (p *ExifPool) Submit(filePath string) <-chan ExifResult {
+	done := make(chan ExifResult, 1)
+	if strings.EqualFold(filepath.Ext(filePath), ".avi") || strings.ContainsAny(filePath, "\r\n") {
+		log.Debug().Msgf("skipping date update in exif data for %s, exiftool does not support this file", filepath.Base(filePath))
+		p.counts[ExifUnsupported].Add(1)
+		done <- ExifUnsupported
+		return done
+	}
+	p.queue <- exifJob{filePath, done}
+	return done
+}
+
+// Close waits for the queued files to be processed and stops the exiftool processes
+func (p *ExifPool) Close() {
+	close(p.queue)
+	p.wg.Wait()
+	log.Info().
+		Int64("updated", p.counts[ExifUpdated].Load()).
+		Int64("unchanged", p.counts[ExifUnchanged].Load()).
+		Int64("unsupported", p.counts[ExifUnsupported].Load()).
+		Int64("failed", p.counts[ExifFailed].Load()).
+		Msgf("exif post-processing done, updated %d file(s)", p.counts[ExifUpdated].Load())
+}
+
+func (p *ExifPool) worker(workerId int) {
+	defer p.wg.Done()
+	log := log.With().Int("exifWorkerId", workerId).Logger()
+
+	var proc *exiftoolProcess
+	defer func() {
+		if proc != nil {
+			proc.close()
+		}
+	}()
+
+	for job := range p.queue {
+		batch := []exifJob{job}
+	drain:
+		for len(batch) < exifBatchSize {
+			select {
+			case job, ok := <-p.queue:
+				if !ok {
+					break drain
+				}
+				batch = append(batch, job)
+			default:
+				break drain
+			}
+		}
+
+		if proc == nil {
+			var err error
+			if proc, err = startExiftool(); err != nil {
+				log.Error().Msgf("could not start exiftool: %v", err)
+				for _, job := range batch {
+					p.finish(job, ExifFailed)
+				}
+				continue
+			}
+		}
+
+		results, err := proc.run(batch)
+		for i, job := range batch {
+			if i < len(results) {
+				p.finish(job, results[i])
+			} else {
+				p.finish(job, ExifFailed)
+			}
+		}
+		if err != nil {
+			log.Error().Msgf("exiftool process failed, restarting it: %v", err)
+			proc.close()
+			proc = nil
+		}
+	}
+}
+
+func (p *ExifPool) finish(job exifJob, result ExifResult) {
+	p.counts[result].Add(1)
+	job.done <- result
+}
+
+type exiftoolProcess struct {
+	cmd    *exec.Cmd
+	stdin  io.WriteCloser
+	pipe   *os.File
+	output *bufio.Reader
+	seq    int
+}
+
+func startExiftool() (*exiftoolProcess, error) {
+	cmd := exec.Command("exiftool", "-stay_open", "True", "-@", "-")
+	stdin, err := cmd.StdinPipe()
+	if err != nil {
+		return nil, err
+	}
+	// stderr and stdout share one pipe so that error messages stay in order with the summary of their command
+	r, w, err := os.Pipe()
+	if err != nil {
+		return nil, err
+	}
+	cmd.Stdout = w
+	cmd.Stderr = w
+	if err := cmd.Start(); err != nil {
+		r.Close()
+		w.Close()
+		return nil, err
+	}
+	w.Close()
+	return &exiftoolProcess{cmd: cmd, stdin: stdin, pipe: r, output: bufio.NewReader(r)}, nil
+}
+
+// run sends all files of the batch at once, one -executeN command per file, then reads the per-file output
+func (e *exiftoolProcess) run(batch []exifJob) ([]ExifResult, error) {
+	var args strings.Builder
+	first := e.seq + 1
+	for _, job := range batch {
+		e.seq++
+		fmt.Fprintf(&args, "-datetimeoriginal<FileModifyDate\n-P\n-overwrite_original_in_place\n-if\n%s\n%s\n-execute%d\n", exifCondition, job.filePath, e.seq)
+	}
+	if _, err := io.WriteString(e.stdin, args.String()); err != nil {
+		return nil, err
+	}
+
+	results := make([]ExifResult, 0, len(batch))
+	for i, job := range batch {
+		lines, err := e.readUntilReady(first + i)
+		if err != nil {
+			return results, err
+		}
+		results = append(results, classifyExifOutput(job.filePath, lines))
+	}
+	return results, nil
+}
+
+func (e *exiftoolProcess) readUntilReady(seq int) ([]string, error) {
+	ready := fmt.Sprintf("{ready%d}", seq)
+	lines := []string{}
+	for {
+		line, err := e.output.ReadString('\n')
+		line = strings.TrimSpace(line)
+		if line == ready {
+			return lines, nil
+		}
+		if err != nil {
+			return lines, err
+		}
+		if line != "" {
+			lines = append(lines, line)
+		}
+	}
+}
+
+func classifyExifOutput(filePath string, lines []string) ExifResult {
+	name := filepath.Base(filePath)
+	output := strings.Join(lines, "\n")
+	switch {
+	case strings.Contains(output, "1 image files updated"):
+		log.Info().Msgf("updated date in exif data for %s to match date in Google Photos", name)
+		return ExifUpdated
+	case strings.Contains(output, "files failed condition"):
+		log.Debug().Msgf("file already has date in exif data: %s", name)
+		return ExifUnchanged
+	case strings.Contains(output, "too large") || strings.Contains(output, "invalid atom size"):
+		log.Debug().Msgf("skipping date update in exif data for %s, exiftool does not support this file", name)
+		return ExifUnsupported
+	case strings.Contains(output, "1 image files unchanged"):
+		log.Debug().Msgf("file already has date in exif data: %s", name)
+		return ExifUnchanged
+	}
+	for _, line := range lines {
+		// skip the summary lines, e.g. "1 files weren't updated due to errors"
+		if line[0] < '0' || line[0] > '9' {
+			log.Error().Msgf("exiftool: %s", line)
+		}
+	}
+	return ExifFailed
+}
+
+func (e *exiftoolProcess) close() {
+	io.WriteString(e.stdin, "-stay_open\nFalse\n")
+	e.stdin.Close()
+	e.cmd.Wait()
+	e.pipe.Close()
+}
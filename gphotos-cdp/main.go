@@ -21,9 +21,11 @@ package main
 import (
 	"bytes"
 	"context"
+	"encoding/json"
 	"errors"
 	"flag"
 	"fmt"
+	"io"
 	"math"
 	"net/http"
 	"net/url"
@@ -60,30 +62,45 @@ import (
 )
 
 var (
-	nItemsFlag      = flag.Int("n", -1, "number of items to download. If negative, get them all.")
-	devFlag         = flag.Bool("dev", false, "dev mode. we reuse the same session dir (/tmp/gphotos-cdp), so we don't have to auth at every run.")
-	downloadDirFlag = flag.String("dldir", "", "where to write the downloads. defaults to $HOME/Downloads/gphotos-cdp.")
-	profileFlag     = flag.String("profile", "", "like -dev, but with a user-provided profile dir")
-	fromFlag        = flag.String("from", "", "earliest date to sync (YYYY-MM-DD)")
-	toFlag          = flag.String("to", "", "latest date to sync (YYYY-MM-DD)")
-	untilFlag       = flag.String("until", "", "stop syncing at this photo")
-	runFlag         = flag.String("run", "", "the program to run on each downloaded item, right after it is dowloaded. It is also the responsibility of that program to remove the downloaded item, if desired.")
-	verboseFlag     = flag.Bool("v", false, "be verbose")
-	headlessFlag    = flag.Bool("headless", false, "Start chrome browser in headless mode (must use -dev and have already authenticated).")
-	jsonLogFlag     = flag.Bool("json", false, "output logs in JSON format")
-	logLevelFlag    = flag.String("loglevel", "", "log level: debug, info, warn, error, fatal, panic")
-	removedFlag     = flag.Bool("removed", false, "save list of files found locally that appear to be deleted from Google Photos")
-	workersFlag     = flag.Int64("workers", 1, "number of concurrent downloads allowed")
-	albumIdFlag     = flag.String("album", "", "ID of album to download, has no effect if lastdone file is found or if -start contains full URL")
-	albumTypeFlag   = flag.String("albumtype", "album", "type of album to download (as seen in URL), has no effect if lastdone file is found or if -start contains full URL")
-	batchSizeFlag   = flag.Int("batchsize", 0, "number of photos to download in one batch")
-	execPathFlag    = flag.String("execpath", "", "path to Chrome/Chromium binary to use")
+	nItemsFlag          = flag.Int("n", -1, "number of items to download. If negative, get them all.")
+	devFlag             = flag.Bool("dev", false, "dev mode. we reuse the same session dir (/tmp/gphotos-cdp), so we don't have to auth at every run.")
+	downloadDirFlag     = flag.String("dldir", "", "where to write the downloads. defaults to $HOME/Downloads/gphotos-cdp.")
+	profileFlag         = flag.String("profile", "", "like -dev, but with a user-provided profile dir")
+	fromFlag            = flag.String("from", "", "earliest date to sync (YYYY-MM-DD)")
+	toFlag              = flag.String("to", "", "latest date to sync (YYYY-MM-DD)")
+	untilFlag           = flag.String("until", "", "stop syncing at this photo")
+	runFlag             = flag.String("run", "", "the program to run on each downloaded item, right after it is dowloaded. It is also the responsibility of that program to remove the downloaded item, if desired.")
+	verboseFlag         = flag.Bool("v", false, "be verbose")
+	headlessFlag        = flag.Bool("headless", false, "Start chrome browser in headless mode (must use -dev and have already authenticated).")
+	jsonLogFlag         = flag.Bool("json", false, "output logs in JSON format")
+	logLevelFlag        = flag.String("loglevel", "", "log level: debug, info, warn, error, fatal, panic")
+	removedFlag         = flag.Bool("removed", false, "save list of files found locally that appear to be deleted from Google Photos")
+	removedWorkersFlag  = flag.Int("removedworkers", 8, "number of concurrent requests used by -removed to check if local photos still exist")
+	workersFlag         = flag.Int64("workers", 1, "number of concurrent downloads allowed")
+	albumIdFlag         = flag.String("album", "", "ID of album to download, has no effect if lastdone file is found or if -start contains full URL")
+	albumTypeFlag       = flag.String("albumtype", "album", "type of album to download (as seen in URL), has no effect if lastdone file is found or if -start contains full URL")
+	batchSizeFlag       = flag.Int("batchsize", 0, "number of photos to download in one batch")
+	execPathFlag        = flag.String("execpath", "", "path to Chrome/Chromium binary to use")
+	exifFlag            = flag.Bool("exif", false, "set DateTimeOriginal of downloaded files from the Google Photos date (when missing or off by more than a year), using a pool of persistent exiftool processes")
+	exifWorkersFlag     = flag.Int("exifworkers", 0, "number of exiftool processes used by -exif. Defaults to the number of CPUs.")
+	incrementalFlag     = flag.Bool("incremental", false, "only sync items newer than the previous sync: stop at the newest item recorded in .syncstate, or after a long run of already downloaded items. Skips the -removed check")
+	fullRescanDaysFlag  = flag.Int("fullrescandays", 7, "with -incremental, walk the whole library when the last full sync is older than this many days. 0 means never")
+	libraryFlag         = flag.String("library", "", "download dir of a full library sync. Items already there are hardlinked (or copied) instead of downloaded again, and a .manifest is written")
+	adaptiveWorkersFlag = flag.Bool("adaptiveworkers", false, "adjust the number of active download workers during the sync, between -minworkers and -workers, from the completion rate and the host's CPU and memory use. The best count is saved in .syncstate and the next sync starts from it")
+	minWorkersFlag      = flag.Int("minworkers", 1, "lowest number of active download workers with -adaptiveworkers")
+	baseUrlFlag         = flag.String("baseurl", "https://photos.google.com", "Google Photos URL. Only meant to point the downloader at a stand-in server for benchmarks")
 )
 
-const gphotosUrl = "https://photos.google.com"
+var gphotosUrl = "https://photos.google.com"
+
 const tick = 500 * time.Millisecond
 const originalSuffix = "_original"
 
+// checking for removed files is done in batches of this many items, retried with backoff, and checkpointed
+const removedBatchSize = 100
+const removedMaxAttempts = 5
+const removedCheckpointMaxAge = 24 * time.Hour
+
 var errStillProcessing = errors.New("video is still processing & can be downloaded later")
 var errCouldNotPressDownloadButton = errors.New("could not press download button")
 var errPhotoTakenBeforeFromDate = errors.New("photo taken before from date")
@@ -111,6 +128,7 @@ func main() {
 		log.Fatal().Err(err).Msgf("-loglevel argument not valid")
 	}
 	zerolog.SetGlobalLevel(level)
+	gphotosUrl = strings.TrimSuffix(*baseUrlFlag, "/")
 	if !*jsonLogFlag {
 		log.Logger = log.Output(zerolog.ConsoleWriter{Out: os.Stdout, TimeFormat: time.TimeOnly})
 	}
@@ -223,6 +241,18 @@ func main() {
 		log.Fatal().Msgf("failure during sync: %v", err)
 	}
 
+	if s.exif != nil {
+		s.exif.Close()
+	}
+
+	if err := s.saveSyncState(); err != nil {
+		log.Err(err).Msgf("failed to save sync state: %v", err)
+	}
+
+	if err := s.writeManifest(); err != nil {
+		log.Err(err).Msgf("failed to write manifest: %v", err)
+	}
+
 	log.Info().Msg("")
 	log.Info().Msg("========================================")
 	log.Info().Msg("SYNC COMPLETED")
@@ -260,6 +290,18 @@ type Session struct {
 	downloadedItems  sync.Map
 	newDownloadChan  chan NewDownload
 	skippedCount     atomic.Uint64
+	libraryDir       string   // dir of a full library sync to link existing items from
+	manifest         sync.Map // imageId -> where the local copy came from (existing, library, downloaded)
+	linkedCount      atomic.Uint64
+	exif             *ExifPool // post-processor for -exif, nil if disabled
+	syncState        *SyncState
+	incremental      bool // stop at items known from the previous sync
+	stoppedEarly     bool // the sync didn't walk the whole library
+	newestItemId     string
+	stateMu          sync.Mutex // guards syncState.NewestPhotoDate
+	workerLimit      *workerLimiter
+	processedCount   atomic.Int64 // items processed by the download workers
+	tunedWorkers     int          // best worker count found by -adaptiveworkers, 0 if none
 }
 
 func NewSession() (*Session, error) {
@@ -332,14 +374,38 @@ func NewSession() (*Session, error) {
 		userPath:        userPath,
 		albumPath:       albumPath,
 		newDownloadChan: make(chan NewDownload),
+		libraryDir:      *libraryFlag,
 	}
 
 	for _, e := range downloadDirEntries {
-		if e.IsDir() && e.Name() != "tmp" {
+		// dot dirs are not items, e.g. archived removed items
+		if e.IsDir() && e.Name() != "tmp" && !strings.HasPrefix(e.Name(), ".") {
 			s.existingItems.Store(e.Name(), struct{}{})
 		}
 	}
 
+	if s.syncState, err = loadSyncState(downloadDir); err != nil {
+		return nil, err
+	}
+	if *incrementalFlag {
+		if reason := s.syncState.needsFullSync(*fullRescanDaysFlag); reason != "" {
+			log.Info().Msgf("running a full sync instead of an incremental one: %s", reason)
+		} else {
+			s.incremental = true
+			log.Info().Msgf("incremental sync, stopping at items already synced on %s", s.syncState.LastSync.Format(time.DateOnly))
+		}
+	}
+
+	if *exifFlag {
+		workers := *exifWorkersFlag
+		if workers <= 0 {
+			workers = runtime.NumCPU()
+		}
+		if s.exif, err = NewExifPool(workers); err != nil {
+			return nil, err
+		}
+	}
+
 	return s, nil
 }
 
@@ -444,12 +510,12 @@ func (s *Session) cleanDownloadDir() error {
 	return nil
 }
 
-// login navigates to https://photos.google.com/login and waits for the user to have
+// login navigates to <gphotosUrl>/login and waits for the user to have
 // authenticated (or for 2 minutes to have elapsed).
 func (s *Session) login(ctx context.Context) error {
 	log.Info().Msg("starting authentication...")
 	return chromedp.Run(ctx,
-		chromedp.Navigate("https://photos.google.com/login"),
+		chromedp.Navigate(gphotosUrl+"/login"),
 		// when we're not authenticated, the URL is actually
 		// https://www.google.com/photos/about/ , so we rely on that to detect when we have
 		// authenticated.
@@ -1509,6 +1575,33 @@ func (s *Session) processDownload(log zerolog.Logger, downloadInfo NewDownload,
 		return err
 	}
 
+	s.stateMu.Lock()
+	if data.date.After(s.syncState.NewestPhotoDate) {
+		s.syncState.NewestPhotoDate = data.date
+	}
+	s.stateMu.Unlock()
+
+	// sizes are taken before -run, which may move or remove the files
+	var totalBytes int64
+	for _, f := range filePaths {
+		if fi, err := os.Stat(f); err == nil {
+			totalBytes += fi.Size()
+		}
+	}
+
+	if s.exif != nil {
+		results := make([]<-chan ExifResult, 0, len(filePaths))
+		for _, f := range filePaths {
+			results = append(results, s.exif.Submit(f))
+		}
+		// -run may move or remove the files, so it has to wait for exiftool
+		if *runFlag != "" {
+			for _, r := range results {
+				<-r
+			}
+		}
+	}
+
 	for _, f := range filePaths {
 		if err := doRun(f, imageId); err != nil {
 			return err
@@ -1516,7 +1609,7 @@ func (s *Session) processDownload(log zerolog.Logger, downloadInfo NewDownload,
 	}
 
 	log.Debug().Int64("duration", time.Since(start).Milliseconds()).Msgf("processed downloaded item")
-	log.Info().Msgf("downloaded file(s) %s with date %v", strings.Join(baseNames, ", "), data.date.Format(time.DateOnly))
+	log.Info().Int("files", len(filePaths)).Int64("bytes", totalBytes).Msgf("downloaded file(s) %s with date %v", strings.Join(baseNames, ", "), data.date.Format(time.DateOnly))
 
 	return nil
 }
@@ -1807,6 +1900,7 @@ func (s *Session) resync(ctx context.Context) error {
 	sliderPos := 0.0
 	estimatedRemaining := 1000
 	photoNodeSelector := s.getPhotoNodeSelector()
+	knownItemsInRow := 0 // for -incremental
 
 	log.Trace().Msgf("finding start node")
 	opts := []chromedp.QueryOption{chromedp.ByQuery, chromedp.AtLeast(0)}
@@ -1819,6 +1913,12 @@ func (s *Session) resync(ctx context.Context) error {
 		return nil
 	}
 
+	s.workerLimit = newWorkerLimiter(int(*workersFlag))
+	if *adaptiveWorkersFlag {
+		stopTuner := s.startWorkerTuner(ctx)
+		defer stopTuner()
+	}
+
 	jobChan := make(chan Job)
 	resultChan := make(chan string, *workersFlag)
 	errChan := make(chan error, *workersFlag)
@@ -1886,14 +1986,29 @@ func (s *Session) resync(ctx context.Context) error {
 				return true
 			})
 			syncedCount := n
+			// items found already downloaded, either while scanning the page or by a worker
+			skippedCount := int64(syncedCount) - newItemsCount.Load() + int64(s.skippedCount.Load())
 			progress := min(float64(syncedCount)/float64(estimatedRemaining+syncedCount), 1)
 			if !done {
 				queueCount := newItemsCount.Load() - int64(downloadedCount) - int64(s.skippedCount.Load())
 				totalCount := syncedCount + estimatedRemaining
 				timeRemaining := time.Since(start) * time.Duration(estimatedRemaining) / time.Duration(max(1, syncedCount-int(queueCount/2)))
-				log.Info().Msgf("so far: downloaded %d (%d in queue), progress: %.2f%% (%d/%d), estimated remaining: %d (%s)", downloadedCount, queueCount, progress*100, syncedCount, totalCount, estimatedRemaining, timeRemaining.Round(time.Second))
+				log.Info().
+					Int("synced", syncedCount).
+					Int("downloaded", downloadedCount).
+					Int64("queued", queueCount).
+					Int64("skipped", skippedCount).
+					Uint64("linked", s.linkedCount.Load()).
+					Int("remaining", estimatedRemaining).
+					Msgf("so far: downloaded %d (%d in queue), progress: %.2f%% (%d/%d), estimated remaining: %d (%s)", downloadedCount, queueCount, progress*100, syncedCount, totalCount, estimatedRemaining, timeRemaining.Round(time.Second))
 			} else {
-				log.Info().Msgf("in total: synced %v items, downloaded %v, progress: %.2f%%", syncedCount, downloadedCount, progress*100)
+				log.Info().
+					Int("synced", syncedCount).
+					Int("downloaded", downloadedCount).
+					Int64("skipped", skippedCount).
+					Uint64("linked", s.linkedCount.Load()).
+					Int("remaining", 0).
+					Msgf("in total: synced %v items, downloaded %v, progress: %.2f%%", syncedCount, downloadedCount, progress*100)
 				return
 			}
 			if syncedCount == lastSyncedCount {
@@ -2015,10 +2130,21 @@ syncAllLoop:
 
 			log := log.With().Str("itemId", imageId).Logger()
 
+			if s.newestItemId == "" {
+				s.newestItemId = imageId
+			}
+
 			shouldDownload, err := s.isNewItem(log, imageId, false)
 			if err != nil {
 				return err
 			} else if !shouldDownload {
+				knownItemsInRow++
+				if s.incremental && (imageId == s.syncState.NewestItemId || knownItemsInRow >= incrementalKnownItemsLimit) {
+					log.Info().Msg("reached items from the previous sync, stopping incremental sync here")
+					s.stoppedEarly = true
+					foundUntil = true
+					break
+				}
 				if len(imageIds) > 0 {
 					break
 				} else {
@@ -2026,6 +2152,7 @@ syncAllLoop:
 				}
 			}
 
+			knownItemsInRow = 0
 			imageIds = append(imageIds, imageId)
 		}
 
@@ -2063,6 +2190,38 @@ syncAllLoop:
 	return nil
 }
 
+// startWorkerTuner starts adjusting the worker limit, from the count tuned by the previous sync if there is one.
+// The returned function stops it and records the best count found.
+func (s *Session) startWorkerTuner(ctx context.Context) func() {
+	maxWorkers := int(*workersFlag)
+	minWorkers := max(1, min(*minWorkersFlag, maxWorkers))
+	start := maxWorkers
+	if s.syncState.TunedWorkers > 0 {
+		start = max(minWorkers, min(s.syncState.TunedWorkers, maxWorkers))
+	}
+	s.workerLimit.setLimit(start)
+	log.Info().Msgf("adaptive workers: starting with %d, adjusting between %d and %d", start, minWorkers, maxWorkers)
+
+	tuner := NewWorkerTuner(s.workerLimit, minWorkers, maxWorkers, &s.processedCount)
+	ctx, cancel := context.WithCancel(ctx)
+	done := make(chan struct{})
+	go func() {
+		tuner.run(ctx)
+		close(done)
+	}()
+	return func() {
+		cancel()
+		<-done
+		best, rate := tuner.best()
+		if best == 0 {
+			log.Info().Msgf("adaptive workers: not enough new items to tune the worker count")
+			return
+		}
+		s.tunedWorkers = best
+		log.Info().Int("tunedWorkers", best).Float64("itemsPerMinute", rate).Msgf("adaptive workers: best worker count in this sync was %d (%.1f items/min)", best, rate)
+	}
+}
+
 func (s *Session) isNewItem(log zerolog.Logger, imageId string, markFound bool) (bool, error) {
 	if _, exists := s.foundItems.Load(imageId); exists {
 		return false, nil
@@ -2074,7 +2233,17 @@ func (s *Session) isNewItem(log zerolog.Logger, imageId string, markFound bool)
 		return false, err
 	} else if hasFiles {
 		log.Trace().Msgf("skipping item, already downloaded")
+		if _, exists := s.manifest.Load(imageId); !exists {
+			s.manifest.Store(imageId, "existing")
+		}
 		isNew = false
+	} else if s.libraryDir != "" {
+		linked, err := s.linkFromLibrary(log, imageId)
+		if err != nil {
+			log.Warn().Msgf("could not reuse library copy, will download instead: %v", err)
+		} else if linked {
+			isNew = false
+		}
 	}
 
 	if markFound || !isNew {
@@ -2097,7 +2266,15 @@ func (s *Session) downloadWorker(workerId int, jobs <-chan Job, resultChan chan<
 	log := log.With().Int("workerId", workerId).Logger()
 	go func() {
 		defer cancel()
-		for job := range jobs {
+		for {
+			// with -adaptiveworkers, workers over the current limit wait here
+			s.workerLimit.acquire()
+			job, ok := <-jobs
+			if !ok {
+				s.workerLimit.release()
+				break
+			}
+			s.workerLimit.working.Add(1)
 			log.Debug().Msgf("worker received batch of %d items", len(job.imageIds))
 			log.Trace().Msgf("starting job with itemIds: %s", strings.Join(job.imageIds, ", "))
 			isConsecutive := false
@@ -2117,12 +2294,17 @@ func (s *Session) downloadWorker(workerId int, jobs <-chan Job, resultChan chan<
 					}
 					downloadedItemId = ""
 				} else if err != nil {
+					s.workerLimit.working.Add(-1)
+					s.workerLimit.release()
 					errChan <- err
 					return
 				}
 				resultChan <- downloadedItemId
+				s.processedCount.Add(1)
 			}
 			log.Debug().Msgf("worker finished processing batch of %d items", len(job.imageIds))
+			s.workerLimit.working.Add(-1)
+			s.workerLimit.release()
 		}
 		errChan <- nil
 	}()
@@ -2194,6 +2376,7 @@ func (s *Session) doWorkerBatchItem(ctx context.Context, log zerolog.Logger, ima
 		log.Trace().Msgf("downloadWorker: encountered error while processing batch item: %s", err.Error())
 		return "", err
 	} else {
+		s.manifest.Store(imageId, "downloaded")
 		return imageId, nil
 	}
 	return "", nil
@@ -2209,58 +2392,198 @@ func (s *Session) navRight(log zerolog.Logger) func(ctx context.Context) error {
 
 // Check if there are folders in the download dir that were not seen in gphotos
 func (s *Session) checkForRemovedFiles(ctx context.Context) error {
-	if *removedFlag {
-		ctx, cancel := context.WithTimeout(ctx, 30*time.Minute)
-		defer cancel()
+	if !*removedFlag {
+		return nil
+	}
+	if s.stoppedEarly {
+		log.Info().Msg("skipping check for removed files, this sync didn't go through the whole library")
+		return nil
+	}
+	ctx, cancel := context.WithTimeout(ctx, 30*time.Minute)
+	defer cancel()
 
-		log.Info().Msg("checking for removed files")
-		deleted := []string{}
-		s.existingItems.Range(func(itemId, _ any) bool {
-			if itemId != "tmp" {
-				// Check if the folder name is in the map of photo IDs
-				if _, exists := s.foundItems.Load(itemId); !exists {
-					deleted = append(deleted, itemId.(string))
-				}
+	log.Info().Msg("checking for removed files")
+	candidates := []string{}
+	s.existingItems.Range(func(itemId, _ any) bool {
+		if itemId != "tmp" {
+			// Check if the folder name is in the map of photo IDs
+			if _, exists := s.foundItems.Load(itemId); !exists {
+				candidates = append(candidates, itemId.(string))
 			}
-			return true
-		})
-		if len(deleted) > 0 {
-			log.Info().Msgf("folders found for %d local photos that were not found in this sync. Checking google photos to confirm they are not there", len(deleted))
 		}
-		i := 0
-		for i < len(deleted) {
-			imageId := deleted[i]
-			var resp int
-			if err := chromedp.Run(ctx,
-				chromedp.Evaluate(`new Promise((res) => fetch('`+s.getPhotoUrl(imageId)+`').then(x => res(x.status)));`, &resp,
-					func(p *cdpruntime.EvaluateParams) *cdpruntime.EvaluateParams {
-						return p.WithAwaitPromise(true)
-					}),
-			); err != nil {
-				log.Err(err).Msgf("error checking for removed file %s: %s, will not continue checking for removed files", imageId, err.Error())
+		return true
+	})
+	slices.Sort(candidates)
+	if len(candidates) > 0 {
+		log.Info().Msgf("folders found for %d local photos that were not found in this sync. Checking google photos to confirm they are not there", len(candidates))
+	}
+
+	// results of an interrupted check are kept in a checkpoint, so the next run only checks what is left
+	checkpointPath := filepath.Join(s.downloadDir, ".removed.checkpoint")
+	verified, err := loadRemovedCheckpoint(checkpointPath)
+	if err != nil {
+		return err
+	}
+	checkpoint, err := os.OpenFile(checkpointPath, os.O_CREATE|os.O_WRONLY|os.O_APPEND, 0644)
+	if err != nil {
+		return err
+	}
+	defer checkpoint.Close()
+
+	pending := []string{}
+	for _, imageId := range candidates {
+		if _, exists := verified[imageId]; !exists {
+			pending = append(pending, imageId)
+		}
+	}
+	if len(pending) < len(candidates) {
+		log.Info().Msgf("resuming check for removed files, %d of %d already checked", len(candidates)-len(pending), len(candidates))
+	}
+
+	for attempt := 1; len(pending) > 0; attempt++ {
+		if attempt > 1 {
+			if attempt > removedMaxAttempts {
+				log.Warn().Msgf("could not check %d local photos after %d attempts, they will be checked again on the next sync", len(pending), removedMaxAttempts)
+				break
+			}
+			backoff := time.Duration(1<<(attempt-2)) * 5 * time.Second
+			log.Info().Msgf("retrying check of %d local photos in %s", len(pending), backoff)
+			select {
+			case <-ctx.Done():
+				log.Warn().Msgf("stopped checking for removed files, %d left, progress saved to .removed.checkpoint", len(pending))
 				return nil
+			case <-time.After(backoff):
 			}
-			if resp == http.StatusOK {
-				log.Debug().Msgf("photo %s was not in original sync, but is still present on google photos, it might be in the trash", imageId)
-				deleted = slices.Delete(deleted, i, i+1)
+		}
+
+		retry := []string{}
+		for start := 0; start < len(pending); start += removedBatchSize {
+			batch := pending[start:min(start+removedBatchSize, len(pending))]
+			statuses, err := s.fetchPhotoStatuses(ctx, batch)
+			if err != nil {
+				if ctx.Err() != nil {
+					log.Warn().Msgf("stopped checking for removed files, %d left, progress saved to .removed.checkpoint", len(pending)-start)
+					return nil
+				}
+				log.Warn().Msgf("error checking batch of %d local photos: %s", len(batch), err.Error())
+				retry = append(retry, batch...)
 				continue
-			} else if resp == http.StatusNotFound {
-				log.Trace().Msgf("photo %s not found on google photos, but is in local folder, it was probably deleted or removed from album", imageId)
-			} else {
-				return fmt.Errorf("unexpected response for %s: %v", imageId, resp)
 			}
-			i++
-		}
-		if len(deleted) > 0 {
-			log.Info().Msgf("folders found for %d local photos that don't exist on google photos (in album if using -album), list saved to .removed", len(deleted))
-			if err := os.WriteFile(path.Join(s.downloadDir, ".removed"), []byte(strings.Join(deleted, "\n")), 0644); err != nil {
+			var lines strings.Builder
+			for i, imageId := range batch {
+				switch statuses[i] {
+				case http.StatusOK:
+					log.Debug().Msgf("photo %s was not in original sync, but is still present on google photos, it might be in the trash", imageId)
+					verified[imageId] = "present"
+				case http.StatusNotFound:
+					log.Trace().Msgf("photo %s not found on google photos, but is in local folder, it was probably deleted or removed from album", imageId)
+					verified[imageId] = "removed"
+				default:
+					log.Trace().Msgf("unexpected response for %s: %v", imageId, statuses[i])
+					retry = append(retry, imageId)
+					continue
+				}
+				lines.WriteString(imageId + "\t" + verified[imageId] + "\n")
+			}
+			if _, err := checkpoint.WriteString(lines.String()); err != nil {
 				return err
 			}
 		}
+		pending = retry
+	}
+
+	deleted := []string{}
+	for _, imageId := range candidates {
+		if verified[imageId] == "removed" {
+			deleted = append(deleted, imageId)
+		}
+	}
+	removedPath := path.Join(s.downloadDir, ".removed")
+	if len(deleted) > 0 {
+		log.Info().Msgf("folders found for %d local photos that don't exist on google photos (in album if using -album), list saved to .removed", len(deleted))
+		if err := os.WriteFile(removedPath, []byte(strings.Join(deleted, "\n")), 0644); err != nil {
+			return err
+		}
+	} else if len(pending) == 0 {
+		if err := os.Remove(removedPath); err != nil && !errors.Is(err, os.ErrNotExist) {
+			return err
+		}
+	}
+	if len(pending) == 0 {
+		checkpoint.Close()
+		return os.Remove(checkpointPath)
 	}
 	return nil
 }
 
+// loadRemovedCheckpoint reads the results saved by an interrupted check for removed files, ignoring old ones
+func loadRemovedCheckpoint(checkpointPath string) (map[string]string, error) {
+	verified := map[string]string{}
+	info, err := os.Stat(checkpointPath)
+	if errors.Is(err, os.ErrNotExist) {
+		return verified, nil
+	} else if err != nil {
+		return nil, err
+	}
+	if time.Since(info.ModTime()) > removedCheckpointMaxAge {
+		log.Debug().Msgf("ignoring checkpoint of check for removed files from %v", info.ModTime())
+		return verified, os.Remove(checkpointPath)
+	}
+	content, err := os.ReadFile(checkpointPath)
+	if err != nil {
+		return nil, err
+	}
+	for _, line := range strings.Split(string(content), "\n") {
+		imageId, result, found := strings.Cut(line, "\t")
+		if found && (result == "present" || result == "removed") {
+			verified[imageId] = result
+		}
+	}
+	return verified, nil
+}
+
+// fetchPhotoStatuses requests the photo pages of the given items from within the page, at most
+// -removedworkers at a time, and returns the HTTP status of each (0 if the request failed)
+func (s *Session) fetchPhotoStatuses(ctx context.Context, imageIds []string) ([]int, error) {
+	urls := make([]string, len(imageIds))
+	for i, imageId := range imageIds {
+		urls[i] = s.getPhotoUrl(imageId)
+	}
+	urlsJson, err := json.Marshal(urls)
+	if err != nil {
+		return nil, err
+	}
+
+	var statuses []int
+	if err := chromedp.Run(ctx,
+		chromedp.Evaluate(fmt.Sprintf(`(async (urls, limit) => {
+			const statuses = new Array(urls.length).fill(0);
+			let next = 0;
+			const worker = async () => {
+				while (next < urls.length) {
+					const i = next++;
+					try {
+						statuses[i] = (await fetch(urls[i])).status;
+					} catch (e) {
+						statuses[i] = 0;
+					}
+				}
+			};
+			await Promise.all(Array.from({length: Math.min(limit, urls.length)}, worker));
+			return statuses;
+		})(%s, %d)`, urlsJson, max(1, *removedWorkersFlag)), &statuses,
+			func(p *cdpruntime.EvaluateParams) *cdpruntime.EvaluateParams {
+				return p.WithAwaitPromise(true)
+			}),
+	); err != nil {
+		return nil, err
+	}
+	if len(statuses) != len(imageIds) {
+		return nil, fmt.Errorf("expected %d statuses, got %d", len(imageIds), len(statuses))
+	}
+	return statuses, nil
+}
+
 // doFileDateUpdate updates the file date of the downloaded files to the photo date
 func doFileDateUpdate(date time.Time, filePaths []string) error {
 	log.Debug().Msgf("setting file date for %v", filePaths)
@@ -2361,6 +2684,144 @@ func (s *Session) dirHasFiles(imageId string) (bool, error) {
 	return false, nil
 }
 
+// linkFromLibrary makes the library copy of imageId available in the download dir, so that album syncs don't
+// download items again that a full library sync already has. Files are hardlinked, or copied if the library is
+// on another filesystem. Returns false if the library has no usable copy of the item.
+func (s *Session) linkFromLibrary(log zerolog.Logger, imageId string) (bool, error) {
+	srcDir := filepath.Join(s.libraryDir, imageId)
+	entries, err := os.ReadDir(srcDir)
+	if errors.Is(err, os.ErrNotExist) {
+		return false, nil
+	}
+	if err != nil {
+		return false, err
+	}
+
+	files := []string{}
+	for _, e := range entries {
+		if !e.Type().IsRegular() {
+			continue
+		}
+		info, err := e.Info()
+		if err != nil {
+			return false, err
+		}
+		if info.Size() > 0 {
+			files = append(files, e.Name())
+		}
+	}
+	if len(files) == 0 {
+		return false, nil
+	}
+
+	dstDir := filepath.Join(s.downloadDir, imageId)
+	if err := os.MkdirAll(dstDir, 0700); err != nil {
+		return false, err
+	}
+	for _, name := range files {
+		if err := linkOrCopyFile(filepath.Join(srcDir, name), filepath.Join(dstDir, name)); err != nil {
+			return false, err
+		}
+	}
+
+	s.existingItems.Store(imageId, struct{}{})
+	s.manifest.Store(imageId, "library")
+	s.linkedCount.Add(1)
+	log.Debug().Msgf("reused %d file(s) from library instead of downloading", len(files))
+	return true, nil
+}
+
+// linkOrCopyFile hardlinks src to dst, falling back to a copy that keeps the modification time
+func linkOrCopyFile(src, dst string) error {
+	if _, err := os.Stat(dst); err == nil {
+		if err := os.Remove(dst); err != nil {
+			return err
+		}
+	}
+	if err := os.Link(src, dst); err == nil {
+		return nil
+	}
+
+	info, err := os.Stat(src)
+	if err != nil {
+		return err
+	}
+	in, err := os.Open(src)
+	if err != nil {
+		return err
+	}
+	defer in.Close()
+	out, err := os.OpenFile(dst+".tmp", os.O_CREATE|os.O_WRONLY|os.O_TRUNC, 0644)
+	if err != nil {
+		return err
+	}
+	if _, err := io.Copy(out, in); err != nil {
+		out.Close()
+		return err
+	}
+	if err := out.Close(); err != nil {
+		return err
+	}
+	if err := os.Chtimes(dst+".tmp", info.ModTime(), info.ModTime()); err != nil {
+		return err
+	}
+	return os.Rename(dst+".tmp", dst)
+}
+
+// saveSyncState records the newest item of this sync for the next -incremental sync
+func (s *Session) saveSyncState() error {
+	st := s.syncState
+	if s.newestItemId != "" {
+		st.NewestItemId = s.newestItemId
+	}
+	st.LastSync = time.Now()
+	if s.tunedWorkers > 0 {
+		st.TunedWorkers = s.tunedWorkers
+	}
+	if s.incremental {
+		st.LastMode = "incremental"
+	} else {
+		st.LastMode = "full"
+	}
+	if !s.stoppedEarly && *untilFlag == "" && *fromFlag == "" {
+		st.LastFullSync = st.LastSync
+	}
+	return st.save(s.downloadDir)
+}
+
+// writeManifest saves the items seen in this sync and where their local copy came from to .manifest
+func (s *Session) writeManifest() error {
+	if s.libraryDir == "" {
+		return nil
+	}
+	lines := []string{}
+	counts := map[string]int{}
+	s.manifest.Range(func(imageId, source any) bool {
+		lines = append(lines, imageId.(string)+"\t"+source.(string))
+		counts[source.(string)]++
+		return true
+	})
+	slices.Sort(lines)
+
+	manifestPath := filepath.Join(s.downloadDir, ".manifest")
+	content := strings.Join(lines, "\n")
+	if len(lines) > 0 {
+		content += "\n"
+	}
+	if err := os.WriteFile(manifestPath+".tmp", []byte(content), 0644); err != nil {
+		return err
+	}
+	if err := os.Rename(manifestPath+".tmp", manifestPath); err != nil {
+		return err
+	}
+	log.Info().
+		Int("existing", counts["existing"]).
+		Int("linked", counts["library"]).
+		Int("downloaded", counts["downloaded"]).
+		Msgf("manifest with %d items saved to .manifest (%d reused from library)", len(lines), counts["library"])
+	return nil
+}
+
 func (s *Session) getPhotoNodeSelector() string {
 	return fmt.Sprintf(`a[href^=".%s/photo/"]`, s.albumPath)
 }
@@ -0,0 +1,71 @@
+package main
+
+import (
+	"encoding/json"
+	"errors"
+	"os"
+	"path/filepath"
+	"time"
+
+	"github.com/rs/zerolog/log"
+)
+
+// number of already downloaded items in a row after which an incremental sync stops, in case the newest item
+// of the previous sync is gone
+const incrementalKnownItemsLimit = 100
+
+// SyncState is what a sync remembers in <dldir>/.syncstate for the next incremental sync
+type SyncState struct {
+	NewestItemId    string    `json:"newest_item_id"`
+	NewestPhotoDate time.Time `json:"newest_photo_date"`
+	LastSync        time.Time `json:"last_sync"`
+	LastFullSync    time.Time `json:"last_full_sync"`
+	LastMode        string    `json:"last_mode"`
+	TunedWorkers    int       `json:"tuned_workers,omitempty"` // best worker count found by -adaptiveworkers
+}
+
+func syncStatePath(downloadDir string) string {
+	return filepath.Join(downloadDir, ".syncstate")
+}
+
+// loadSyncState returns the state saved by the previous sync, or an empty state if there is none
+func loadSyncState(downloadDir string) (*SyncState, error) {
+	state := &SyncState{}
+	content, err := os.ReadFile(syncStatePath(downloadDir))
+	if errors.Is(err, os.ErrNotExist) {
+		return state, nil
+	} else if err != nil {
+		return nil, err
+	}
+	if err := json.Unmarshal(content, state); err != nil {
+		log.Warn().Msgf("ignoring unreadable .syncstate: %v", err)
+		return &SyncState{}, nil
+	}
+	return state, nil
+}
+
+// needsFullSync reports why an incremental sync should walk the whole library instead, or "" if it doesn't have to
+func (st *SyncState) needsFullSync(fullRescanDays int) string {
+	if st.NewestItemId == "" {
+		return "no previous sync recorded"
+	}
+	if fullRescanDays > 0 && time.Since(st.LastFullSync) > time.Duration(fullRescanDays)*24*time.Hour {
+		if st.LastFullSync.IsZero() {
+			return "no full sync recorded"
+		}
+		return "last full sync was on " + st.LastFullSync.Format(time.DateOnly)
+	}
+	return ""
+}
+
+func (st *SyncState) save(downloadDir string) error {
+	content, err := json.MarshalIndent(st, "", "  ")
+	if err != nil {
+		return err
+	}
+	statePath := syncStatePath(downloadDir)
+	if err := os.WriteFile(statePath+".tmp", content, 0644); err != nil {
+		return err
+	}
+	return os.Rename(statePath+".tmp", statePath)
+}
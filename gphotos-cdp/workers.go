@@ -0,0 +1,259 @@
+package main
+
+import (
+	"bufio"
+	"context"
+	"os"
+	"strconv"
+	"strings"
+	"sync"
+	"sync/atomic"
+	"time"
+
+	"github.com/rs/zerolog/log"
+)
+
+// with -adaptiveworkers, the worker limit is reconsidered after every interval of this length
+const workerTuneInterval = 60 * time.Second
+
+// share of the interval during which all allowed workers must have been busy for its completion rate to count,
+// otherwise the rate says more about how many new items there were than about the worker count
+const workerTuneMinBusy = 0.8
+
+// above this host CPU use, or below this share of available memory, the worker limit goes down regardless
+const workerTuneMaxCpu = 0.9
+const workerTuneMinMemAvailable = 0.1
+
+// after backing off, the limit stays below the overloaded one for this many intervals before it may climb again
+const workerTuneCooldown = 5
+
+// workerLimiter caps how many download workers work on a batch at the same time. Workers over the limit wait
+// before taking their next batch, with their tab left open.
+type workerLimiter struct {
+	mu      sync.Mutex
+	cond    *sync.Cond
+	limit   int
+	active  int          // workers holding a slot, including those waiting for a batch
+	working atomic.Int64 // workers processing a batch
+}
+
+func newWorkerLimiter(limit int) *workerLimiter {
+	l := &workerLimiter{limit: limit}
+	l.cond = sync.NewCond(&l.mu)
+	return l
+}
+
+func (l *workerLimiter) acquire() {
+	l.mu.Lock()
+	defer l.mu.Unlock()
+	for l.active >= l.limit {
+		l.cond.Wait()
+	}
+	l.active++
+}
+
+func (l *workerLimiter) release() {
+	l.mu.Lock()
+	defer l.mu.Unlock()
+	l.active--
+	l.cond.Broadcast()
+}
+
+func (l *workerLimiter) setLimit(limit int) {
+	l.mu.Lock()
+	defer l.mu.Unlock()
+	l.limit = limit
+	l.cond.Broadcast()
+}
+
+func (l *workerLimiter) state() (working, limit int) {
+	l.mu.Lock()
+	defer l.mu.Unlock()
+	return int(l.working.Load()), l.limit
+}
+
+// WorkerTuner adjusts the worker limit during a sync by hill climbing on the completion rate: it keeps moving
+// the limit in the direction that made more items complete per minute, steps down when the rate stays flat
+// (same throughput with fewer tabs), and backs off when the host runs out of CPU or memory.
+type WorkerTuner struct {
+	limiter   *workerLimiter
+	min, max  int
+	completed *atomic.Int64 // items processed by the workers so far
+	direction int
+	lastRate  float64
+	ceiling   int             // while cooldown > 0, the limit stays at or below this
+	cooldown  int             // intervals left before the limit may climb past ceiling again
+	rates     map[int]float64 // worker limit -> items per minute, averaged over the intervals at that limit
+}
+
+func NewWorkerTuner(limiter *workerLimiter, min, max int, completed *atomic.Int64) *WorkerTuner {
+	return &WorkerTuner{limiter: limiter, min: min, max: max, completed: completed, rates: map[int]float64{}}
+}
+
+// run samples the workers every second and adjusts the limit after every workerTuneInterval, until ctx is done
+func (t *WorkerTuner) run(ctx context.Context) {
+	ticker := time.NewTicker(time.Second)
+	defer ticker.Stop()
+
+	samples, busySamples := 0, 0
+	intervalStart := time.Now()
+	lastCompleted := t.completed.Load()
+	lastCpu, _ := readCpuTimes()
+	for {
+		select {
+		case <-ctx.Done():
+			return
+		case <-ticker.C:
+		}
+		working, limit := t.limiter.state()
+		samples++
+		if working >= limit {
+			busySamples++
+		}
+		if time.Since(intervalStart) < workerTuneInterval {
+			continue
+		}
+
+		completed := t.completed.Load()
+		rate := float64(completed-lastCompleted) / time.Since(intervalStart).Minutes()
+		cpuTimes, _ := readCpuTimes()
+		cpu := cpuTimes.usedSince(lastCpu)
+		memAvailable := readMemAvailable()
+		busy := float64(busySamples) / float64(samples)
+
+		next := t.step(limit, rate, cpu, memAvailable, busy >= workerTuneMinBusy)
+		log.Info().
+			Int("workerLimit", next).
+			Float64("itemsPerMinute", rate).
+			Float64("cpu", cpu).
+			Float64("memAvailable", memAvailable).
+			Float64("busy", busy).
+			Msgf("worker limit %d -> %d (%.1f items/min, CPU %.0f%%, memory available %.0f%%, busy %.0f%%)", limit, next, rate, cpu*100, memAvailable*100, busy*100)
+		if next != limit {
+			t.limiter.setLimit(next)
+		}
+
+		samples, busySamples = 0, 0
+		intervalStart = time.Now()
+		lastCompleted = completed
+		lastCpu = cpuTimes
+	}
+}
+
+// step records the rate measured at limit and returns the limit for the next interval
+func (t *WorkerTuner) step(limit int, rate, cpu, memAvailable float64, saturated bool) int {
+	if cpu > workerTuneMaxCpu || memAvailable < workerTuneMinMemAvailable {
+		// the host can't take this many, stay below it for a while in case the load was not ours
+		t.ceiling = max(t.min, limit-1)
+		t.cooldown = workerTuneCooldown
+		t.direction = 0
+		t.lastRate = 0
+		return t.ceiling
+	}
+	upper := t.max
+	if t.cooldown > 0 {
+		t.cooldown--
+		upper = t.ceiling
+	}
+	if !saturated {
+		return limit
+	}
+	if prev, ok := t.rates[limit]; ok {
+		t.rates[limit] = (prev + rate) / 2
+	} else {
+		t.rates[limit] = rate
+	}
+	switch {
+	case t.lastRate == 0:
+		t.direction = 1
+	case rate > t.lastRate*1.05:
+		// keep going
+	case rate < t.lastRate*0.95:
+		t.direction = -t.direction
+	default:
+		t.direction = -1
+	}
+	t.lastRate = rate
+	return max(t.min, min(upper, limit+t.direction))
+}
+
+// best is the limit with the highest measured rate, preferring fewer workers when rates are within 5%,
+// or 0 if no interval had enough work to measure one
+func (t *WorkerTuner) best() (int, float64) {
+	bestLimit, bestRate := 0, 0.0
+	for limit := t.min; limit <= t.max; limit++ {
+		rate, ok := t.rates[limit]
+		if ok && (bestLimit == 0 || rate > bestRate*1.05) {
+			bestLimit, bestRate = limit, rate
+		}
+	}
+	return bestLimit, bestRate
+}
+
+type cpuTimes struct {
+	busy, total uint64
+}
+
+// readCpuTimes reads the host's aggregate CPU counters from /proc/stat
+func readCpuTimes() (cpuTimes, error) {
+	f, err := os.Open("/proc/stat")
+	if err != nil {
+		return cpuTimes{}, err
+	}
+	defer f.Close()
+	line, err := bufio.NewReader(f).ReadString('\n')
+	if err != nil {
+		return cpuTimes{}, err
+	}
+	var t cpuTimes
+	// user nice system idle iowait irq softirq steal, guest time is already part of user and nice
+	fields := strings.Fields(line)[1:]
+	for i, field := range fields[:min(8, len(fields))] {
+		v, err := strconv.ParseUint(field, 10, 64)
+		if err != nil {
+			break
+		}
+		t.total += v
+		// idle and iowait
+		if i != 3 && i != 4 {
+			t.busy += v
+		}
+	}
+	return t, nil
+}
+
+// usedSince is the share of CPU time spent busy since prev, between 0 and 1
+func (t cpuTimes) usedSince(prev cpuTimes) float64 {
+	if t.total <= prev.total {
+		return 0
+	}
+	return float64(t.busy-prev.busy) / float64(t.total-prev.total)
+}
+
+// readMemAvailable returns MemAvailable/MemTotal from /proc/meminfo, or 1 if it can't be read
+func readMemAvailable() float64 {
+	f, err := os.Open("/proc/meminfo")
+	if err != nil {
+		return 1
+	}
+	defer f.Close()
+	var total, available float64
+	scanner := bufio.NewScanner(f)
+	for scanner.Scan() {
+		fields := strings.Fields(scanner.Text())
+		if len(fields) < 2 {
+			continue
+		}
+		v, _ := strconv.ParseFloat(fields[1], 64)
+		switch fields[0] {
+		case "MemTotal:":
+			total = v
+		case "MemAvailable:":
+			available = v
+		}
+	}
+	if total == 0 || available == 0 {
+		return 1
+	}
+	return available / total
+}
@@ -1,5 +1,7 @@
 #!/bin/bash
 
+# Per-file post-processing for use with gphotos-cdp -run. sync.sh uses the built-in -exif pool instead,
+# which applies the same rules with persistent exiftool processes.
 source /app/log.sh
 
 if [ -z "$1" ];then
@@ -55,11 +55,20 @@ else
     CRON="$CRON\nHEALTHCHECK_HOST='$HEALTHCHECK_HOST'"
     CRON="$CRON\nLOGLEVEL='$LOGLEVEL'"
     CRON="$CRON\nWORKER_COUNT='$WORKER_COUNT'"
+    CRON="$CRON\nWORKER_MODE='$WORKER_MODE'"
+    CRON="$CRON\nWORKER_MIN='$WORKER_MIN'"
     CRON="$CRON\nGPHOTOS_CDP_ARGS='$GPHOTOS_CDP_ARGS'"
     CRON="$CRON\nALBUMS='$ALBUMS'"
+    CRON="$CRON\nALBUM_LINK_LIBRARY='$ALBUM_LINK_LIBRARY'"
+    CRON="$CRON\nSYNC_MODE='$SYNC_MODE'"
+    CRON="$CRON\nFULL_RESCAN_DAYS='$FULL_RESCAN_DAYS'"
     CRON="$CRON\nGPHOTOS_LOCALE_FILE='$GPHOTOS_LOCALE_FILE'"
     CRON="$CRON\nDOWNLOAD_DIR='$DOWNLOAD_DIR'"
     CRON="$CRON\nPROFILE_DIR='$PROFILE_DIR'"
+    CRON="$CRON\nPROFILE_NAME='$PROFILE_NAME'"
+    CRON="$CRON\nCOORDINATOR_URL='$COORDINATOR_URL'"
+    CRON="$CRON\nSYNC_PRIORITY='$SYNC_PRIORITY'"
+    CRON="$CRON\nSLOT_MAX_WAIT='$SLOT_MAX_WAIT'"
     CRON="$CRON\n$CRON_SCHEDULE /usr/bin/flock -n /app/sync.lock bash /app/sync.sh > $LOGFIFO 2>&1"
 
     if [ -n "$RESTART_SCHEDULE" ]; then
@@ -1,6 +1,6 @@
 #!/bin/bash
 
-. /app/log.sh
+. "${APP_DIR:-/app}/log.sh"
 
 info "starting sync.sh, pid: $$"
 
@@ -14,7 +14,83 @@ PROFILE_DIR="${PROFILE_DIR:-/tmp/gphotos-cdp}"
 DOWNLOAD_DIR="${DOWNLOAD_DIR:-/download}"
 WORKER_COUNT=${WORKER_COUNT:-6}
 LOGLEVEL=${LOGLEVEL:-info}
-GPHOTOS_CDP_ARGS="-profile \"$PROFILE_DIR\" -headless -json -loglevel $LOGLEVEL -removed -workers $WORKER_COUNT $GPHOTOS_CDP_ARGS -run /app/postdl.sh"
+SYNC_MODE="${SYNC_MODE:-full}"
+FULL_RESCAN_DAYS="${FULL_RESCAN_DAYS:-7}"
+GPHOTOS_CDP_ARGS="-profile \"$PROFILE_DIR\" -headless -json -loglevel $LOGLEVEL -removed -workers $WORKER_COUNT -exif $GPHOTOS_CDP_ARGS"
+
+# Incremental syncs stop at items from the previous run, with a full walk every FULL_RESCAN_DAYS days
+if [ "$SYNC_MODE" = "incremental" ]; then
+  GPHOTOS_CDP_ARGS="$GPHOTOS_CDP_ARGS -incremental -fullrescandays $FULL_RESCAN_DAYS"
+fi
+
+# Adaptive mode tunes the number of active workers during the run, between WORKER_MIN and WORKER_COUNT
+if [ "$WORKER_MODE" = "adaptive" ]; then
+  GPHOTOS_CDP_ARGS="$GPHOTOS_CDP_ARGS -adaptiveworkers -minworkers ${WORKER_MIN:-1}"
+fi
+
+# Ask the web GUI for a sync slot so only MAX_CONCURRENT_SYNCS profiles run at once.
+# If the GUI can't be reached the sync goes ahead without one.
+COORDINATOR_URL="${COORDINATOR_URL:-http://gphotos-web-gui:8080}"
+SYNC_PROFILE="${PROFILE_NAME:-$(hostname)}"
+SYNC_PRIORITY="${SYNC_PRIORITY:-0}"
+SLOT_MAX_WAIT="${SLOT_MAX_WAIT:-21600}"
+SLOT_TOKEN=
+
+slot_request() {
+  curl -sS -m 10 -X POST -H 'Content-Type: application/json' \
+    -d "$(jq -n -c --arg profile "$SYNC_PROFILE" --arg token "$SLOT_TOKEN" --argjson priority "$SYNC_PRIORITY" \
+      '{profile: $profile, token: $token, priority: $priority}')" \
+    -w '\n%{http_code}' "$COORDINATOR_URL/api/slots/$1"
+}
+
+acquire_slot() {
+  WAITED=0
+  while true; do
+    if ! RESPONSE=$(slot_request acquire 2>/dev/null); then
+      warn "sync coordinator unreachable at $COORDINATOR_URL, starting without a slot"
+      return 0
+    fi
+    STATUS=$(echo "$RESPONSE" | tail -n 1)
+    BODY=$(echo "$RESPONSE" | sed '$d')
+    if [ "$STATUS" = "200" ]; then
+      SLOT_TOKEN=$(echo "$BODY" | jq -r '.token')
+      info "acquired sync slot after ${WAITED}s"
+      return 0
+    elif [ "$STATUS" = "202" ]; then
+      RETRY=$(echo "$BODY" | jq -r '.retry_after // 10')
+      if [ "$WAITED" -ge "$SLOT_MAX_WAIT" ]; then
+        return 1
+      fi
+      info "waiting for a sync slot, position $(echo "$BODY" | jq -r '.position') in queue"
+      sleep "$RETRY"
+      WAITED=$((WAITED + RETRY))
+    else
+      warn "sync coordinator answered HTTP $STATUS, starting without a slot"
+      return 0
+    fi
+  done
+}
+
+release_slot() {
+  if [ -n "$HEARTBEAT_PID" ]; then
+    kill "$HEARTBEAT_PID" 2>/dev/null || true
+  fi
+  if [ -n "$SLOT_TOKEN" ]; then
+    slot_request release > /dev/null 2>&1 || true
+  fi
+}
+
+if ! acquire_slot; then
+  # Closes the run opened by the starting line in the web GUI's status and history
+  warn "skipped sync.sh: no sync slot after ${SLOT_MAX_WAIT}s"
+  exit 0
+fi
+
+trap release_slot EXIT
+if [ -n "$SLOT_TOKEN" ]; then
+  (while sleep 60; do slot_request heartbeat > /dev/null 2>&1 || true; done) &
+  HEARTBEAT_PID=$!
+fi
 
 rm -f $PROFILE_DIR/Singleton*
 
@@ -26,13 +102,21 @@ if [ -f "$PREFS_FILE" ]; then
 fi
 
 if [ -n "$ALBUMS" ]; then
+  # Sync the full library first so albums can link items from it instead of downloading them again
+  LIBRARY_DIR="$DOWNLOAD_DIR/ALL"
+  if echo ",$ALBUMS," | grep -q ',ALL,'; then
+    eval gphotos-cdp -dldir "$LIBRARY_DIR" $GPHOTOS_CDP_ARGS
+  fi
+  LIBRARY_ARGS=
+  if [ "$ALBUM_LINK_LIBRARY" != "false" ] && [ -d "$LIBRARY_DIR" ]; then
+    LIBRARY_ARGS="-library \"$LIBRARY_DIR\""
+  fi
   for ALBUM in $(echo $ALBUMS | tr ',' ' '); do
-    ALBUM_DL_DIR="$DOWNLOAD_DIR/$(basename "$ALBUM")"
     if [ "$ALBUM" = "ALL" ]; then
-      eval gphotos-cdp -dldir "$ALBUM_DL_DIR" $GPHOTOS_CDP_ARGS
-    else
-      eval gphotos-cdp -dldir "$ALBUM_DL_DIR" $GPHOTOS_CDP_ARGS -album $ALBUM
+      continue
     fi
+    ALBUM_DL_DIR="$DOWNLOAD_DIR/$(basename "$ALBUM")"
+    eval gphotos-cdp -dldir "$ALBUM_DL_DIR" $GPHOTOS_CDP_ARGS $LIBRARY_ARGS -album $ALBUM
   done
 else
   eval gphotos-cdp -dldir "$DOWNLOAD_DIR" $GPHOTOS_CDP_ARGS
@@ -1,21 +1,70 @@
 #!/usr/bin/env python3
 import os
 import json
+import re
+import time
+import sqlite3
+import gzip
+import zlib
+import queue
+import collections
+import threading
+import ctypes
+import ctypes.util
+import errno
+import select
+import struct
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import docker
-from flask import Flask, render_template, jsonify, Response, stream_with_context
+from flask import Flask, render_template, jsonify, Response, stream_with_context, request, g
 from datetime import datetime, timedelta
 from croniter import croniter
 import pytz
+from prometheus_client import Histogram, generate_latest, CONTENT_TYPE_LATEST, REGISTRY
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
 
 app = Flask(__name__)
 
+# Long buckets cover the profile start/recreate endpoints, whose Docker API calls
+# (image pulls and builds, container recreation) can take up to two minutes
+REQUEST_LATENCY = Histogram(
+    'gphotos_gui_request_duration_seconds',
+    'Web GUI request latency by route',
+    ['method', 'route', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.labels(request.method, route, str(response.status_code)).observe(time.perf_counter() - start)
+    return response
+
+# Paths inside the web GUI container. Both can be pointed at a scratch tree,
+# which is how the benchmarks in bench/ run the app outside Docker.
+WORKSPACE_DIR = os.getenv('WORKSPACE_DIR', '/workspace')
+HOST_ROOT = os.getenv('HOST_ROOT', '/host')
+
 # Initialize Docker client with explicit socket path
 try:
-    docker_client = docker.DockerClient(base_url='unix://var/run/docker.sock')
+    docker_client = docker.DockerClient(base_url=os.getenv('DOCKER_HOST', 'unix://var/run/docker.sock'))
 except Exception as e:
     print(f"Error connecting to Docker: {e}")
     docker_client = None
 
+def get_data_path(filename):
+    """Get the path of a file in the web GUI's persistent data directory"""
+    data_dir = os.getenv('GUI_DATA_DIR', os.path.join(WORKSPACE_DIR, '.web-gui'))
+    os.makedirs(data_dir, exist_ok=True)
+    return os.path.join(data_dir, filename)
+
 def get_container_prefix():
     """Get the container name prefix from environment or default"""
     return os.getenv('CONTAINER_PREFIX', 'gphotos-sync')
@@ -26,19 +75,65 @@ def get_sync_containers():
     containers = docker_client.containers.list(all=True, filters={'name': prefix})
     return containers
 
+class ScheduleEngine:
+    """Memoized cron schedules, one iterator per (schedule, timezone)
+
+    Upcoming run times are generated once and kept in order; runs that fall
+    into the past are dropped as each boundary passes, so the next run of a
+    schedule is a lookup instead of a fresh croniter on every poll.
+    """
+
+    def __init__(self, max_runs=5000):
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        self._schedules = {}
+
+    def _entry(self, schedule, tz):
+        key = (schedule, tz)
+        entry = self._schedules.get(key)
+        if entry is None:
+            timezone = pytz.timezone(tz)
+            entry = {
+                'timezone': timezone,
+                'cron': croniter(schedule, datetime.now(timezone)),
+                'runs': collections.deque()
+            }
+            self._schedules[key] = entry
+        return entry
+
+    def runs_between(self, schedule, tz, start, end):
+        """Run times in [start, end), as timezone-aware datetimes"""
+        with self._lock:
+            entry = self._entry(schedule, tz)
+            runs = entry['runs']
+            # Boundary passed: forget runs that already happened
+            while runs and runs[0] < start:
+                runs.popleft()
+            while (not runs or runs[-1] < end) and len(runs) < self.max_runs:
+                runs.append(entry['cron'].get_next(datetime))
+            return [run for run in runs if start <= run < end]
+
+    def next_run(self, schedule, tz):
+        """Next run time after now"""
+        now = datetime.now(pytz.utc)
+        with self._lock:
+            entry = self._entry(schedule, tz)
+            runs = entry['runs']
+            while runs and runs[0] <= now:
+                runs.popleft()
+            if not runs:
+                runs.append(entry['cron'].get_next(datetime))
+            return runs[0]
+
+schedule_engine = ScheduleEngine()
+
 def parse_cron_next_run(cron_schedule, tz='Europe/Rome'):
     """Calculate next run time from cron schedule"""
     try:
-        # Get timezone-aware current time
-        timezone = pytz.timezone(tz)
-        base_time = datetime.now(timezone)
-
-        # Calculate next cron run
-        cron = croniter(cron_schedule, base_time)
-        next_run = cron.get_next(datetime)
+        next_run = schedule_engine.next_run(cron_schedule, tz)
 
         # Calculate time difference
-        time_until = next_run - base_time
+        time_until = next_run - datetime.now(pytz.utc)
 
         hours = int(time_until.total_seconds() // 3600)
         minutes = int((time_until.total_seconds() % 3600) // 60)
@@ -53,7 +148,6 @@ def parse_cron_next_run(cron_schedule, tz='Europe/Rome'):
 def sanitize_profile_name(name):
     """Convert profile name to filesystem-safe format"""
     # Convert to lowercase, replace spaces/special chars with underscore
-    import re
     sanitized = re.sub(r'[^a-z0-9_-]', '_', name.lower().strip())
     # Remove multiple consecutive underscores
     sanitized = re.sub(r'_+', '_', sanitized)
@@ -63,7 +157,7 @@ def sanitize_profile_name(name):
 
 def get_profile_metadata(profile_name):
     """Get profile metadata from metadata file"""
-    metadata_file = f'/workspace/profiles/{profile_name}/.profile_metadata.json'
+    metadata_file = f'{WORKSPACE_DIR}/profiles/{profile_name}/.profile_metadata.json'
     try:
         if os.path.exists(metadata_file):
             with open(metadata_file, 'r') as f:
@@ -72,29 +166,430 @@ def get_profile_metadata(profile_name):
         pass
     return {'name': profile_name, 'display_name': profile_name}
 
-def check_sync_status(container):
-    """Check if the container has completed sync by looking at logs"""
+def save_worker_tuning(profile_name, tuning, tuned_at):
+    """Store the worker count an adaptive sync found best in the profile metadata"""
+    metadata_file = f'{WORKSPACE_DIR}/profiles/{profile_name}/.profile_metadata.json'
+    if not os.path.exists(metadata_file):
+        return
+    metadata = get_profile_metadata(profile_name)
+    metadata['worker_tuning'] = {
+        'recommended_workers': tuning['workers'],
+        'items_per_minute': round(tuning['items_per_minute'], 1),
+        'tuned_at': datetime.fromtimestamp(tuned_at).isoformat(timespec='seconds')
+    }
+    with open(metadata_file, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+def get_profile_photo_dir(profile_name):
+    """Download directory of a profile, as seen from inside this container"""
+    photo_dir = get_profile_metadata(profile_name).get('photo_dir', '')
+    if photo_dir:
+        # Custom directories are host paths; the host filesystem is mounted at /host
+        return os.path.join(HOST_ROOT, photo_dir.lstrip('/'))
+    return f'{WORKSPACE_DIR}/photos/{profile_name}'
+
+def profile_has_cookies(profile_name):
+    """Check if a profile has saved authentication cookies"""
+    cookies_file = f'{WORKSPACE_DIR}/profiles/{profile_name}/Default/Cookies'
+    return os.path.exists(cookies_file) and os.path.getsize(cookies_file) > 0
+
+# Phase banners gphotos-cdp prints (between "=====" lines) as it moves through a sync
+SYNC_PHASE_BANNERS = {
+    'AUTHENTICATION': 'authentication',
+    'LANGUAGE DETECTION': 'language_detection',
+    'FIRST NAVIGATION': 'first_navigation',
+    'STARTING SYNC': 'syncing',
+    'SYNC COMPLETED': 'completed',
+}
+
+def parse_docker_timestamp(ts):
+    """Convert a Docker RFC3339Nano log timestamp to (epoch seconds, nanoseconds)"""
+    base, _, frac = ts.rstrip('Z').partition('.')
+    seconds = int(datetime.strptime(base[:19], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=pytz.utc).timestamp())
+    nanos = int((frac + '000000000')[:9]) if frac else 0
+    return seconds, nanos
+
+def parse_log_line(line):
+    """Split a timestamped Docker log line into (timestamp key, record)
+
+    The record is the decoded JSON object for lines written by gphotos-cdp or log.sh,
+    otherwise a dict with the raw text as message.
+    """
+    ts, _, text = line.partition(' ')
     try:
-        # If container is not running, return stopped
-        if container.status != 'running':
-            return 'stopped'
-
-        # Get last 100 lines of logs (enough to find SYNC COMPLETED)
-        logs = container.logs(tail=100).decode('utf-8', errors='ignore')
+        key = parse_docker_timestamp(ts)
+    except ValueError:
+        return None, {'message': line}
+    text = text.strip()
+    if text.startswith('{'):
+        try:
+            record = json.loads(text)
+            if isinstance(record, dict):
+                return key, record
+        except ValueError:
+            pass
+    return key, {'message': text}
+
+# Fallback for progress lines written by gphotos-cdp builds without structured fields
+PROGRESS_MESSAGE_RE = re.compile(r'so far: downloaded (\d+) \((\d+) in queue\), progress: [\d.]+% \((\d+)/(\d+)\)')
+
+class SyncProgress:
+    """Per-run download counters derived from gphotos-cdp's JSON log output"""
+
+    # Window used for the current download rate
+    RATE_WINDOW = 300
+
+    def __init__(self, started_at=None):
+        self.started_at = started_at
+        self.updated_at = started_at
+        self.items_seen = 0
+        self.remaining = None
+        self.downloaded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes_written = 0
+        self._previous_passes_seen = 0  # items seen by earlier album passes of this run
+        self._pass_seen = 0
+        self._pass_skipped = 0
+        self._previous_passes_skipped = 0
+        self._download_times = collections.deque()
+
+    def feed(self, ts, record):
+        """Update the counters from one log record"""
+        message = str(record.get('message', ''))
+        level = str(record.get('level', '')).lower()
+        self.updated_at = ts
+
+        if message.startswith('downloaded file(s)'):
+            self.downloaded += 1
+            self.bytes_written += int(record.get('bytes', 0) or 0)
+            self._download_times.append(ts)
+        elif 'synced' in record:
+            self._pass_seen = int(record['synced'])
+            self._pass_skipped = int(record.get('skipped', self._pass_skipped))
+            self.remaining = int(record.get('remaining', 0))
+        elif message.startswith('so far:'):
+            match = PROGRESS_MESSAGE_RE.match(message)
+            if match:
+                self._pass_seen = int(match.group(3))
+                self.remaining = max(int(match.group(4)) - self._pass_seen, 0)
+        elif message == 'SYNC COMPLETED':
+            # The next album pass starts counting from zero again
+            self._previous_passes_seen += self._pass_seen
+            self._previous_passes_skipped += self._pass_skipped
+            self._pass_seen = 0
+            self._pass_skipped = 0
+            self.remaining = 0
+        elif level in ('error', 'fatal', 'panic'):
+            self.failed += 1
+
+        self.items_seen = self._previous_passes_seen + self._pass_seen
+        self.skipped = self._previous_passes_skipped + self._pass_skipped
+
+    def items_per_second(self, now=None):
+        """Download rate over the last RATE_WINDOW seconds"""
+        now = now or self.updated_at or time.time()
+        while self._download_times and self._download_times[0] < now - self.RATE_WINDOW:
+            self._download_times.popleft()
+        if not self._download_times or self.started_at is None:
+            return 0.0
+        window = min(self.RATE_WINDOW, max(now - self.started_at, 1))
+        return len(self._download_times) / window
+
+    def to_dict(self):
+        elapsed = (self.updated_at - self.started_at) if self.started_at and self.updated_at else 0
+        # The walk (not the downloads) decides when a sync ends, so the ETA uses the scan rate
+        scan_rate = self.items_seen / elapsed if elapsed > 0 else 0
+        eta = None
+        if self.remaining is not None and scan_rate > 0:
+            eta = int(self.remaining / scan_rate)
+        return {
+            'started_at': self.started_at,
+            'updated_at': self.updated_at,
+            'elapsed_seconds': int(elapsed),
+            'items_seen': self.items_seen,
+            'items_remaining': self.remaining,
+            'downloaded': self.downloaded,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'bytes_written': self.bytes_written,
+            'items_per_second': round(self.items_per_second(), 3),
+            'bytes_per_second': int(self.bytes_written / elapsed) if elapsed > 0 else 0,
+            'eta_seconds': eta
+        }
 
-        # Check if SYNC COMPLETED appears in logs
-        if 'SYNC COMPLETED' in logs:
-            return 'completed'
+class SyncStatusTracker:
+    """State machine for one container's sync, driven by its log lines"""
+
+    def __init__(self):
+        self.phase = 'idle'
+        self.phase_since = None
+        self.run_started_at = None
+        self.run_ended_at = None
+        self.run_status = None
+        self.exit_reason = None
+        self.phase_durations = {}
+        self.last_error = None
+        self.last_success_at = None
+        self.completed_runs = 0
+        self.failed_runs = 0
+        self.finished_runs = []  # summaries of runs that ended, drained by the monitor
+        self.progress = SyncProgress()
+        self.worker_limit = None   # current limit of an adaptive-workers run
+        self.tuned_workers = None  # best worker count reported by an adaptive-workers run
+
+    def feed(self, ts, record):
+        """Advance the state machine with one log record logged at ts (epoch seconds)"""
+        message = str(record.get('message', '')).strip()
+        level = str(record.get('level', '')).lower()
+
+        if message.startswith('starting sync.sh'):
+            self._start_run(ts)
+            self._set_phase('starting', ts)
+        elif message in SYNC_PHASE_BANNERS:
+            if not self.run_open:
+                # The run's first lines were not seen (e.g. beyond the initial tail)
+                self._start_run(ts)
+            self._set_phase(SYNC_PHASE_BANNERS[message], ts)
+        elif message.startswith('waiting for a sync slot'):
+            if self.run_open:
+                self._set_phase('waiting_for_slot', ts)
+        elif message.startswith('acquired sync slot'):
+            if self.run_open:
+                self._set_phase('starting', ts)
+        elif message.startswith('skipped sync.sh'):
+            # sync.sh gave up waiting for a slot; nothing was synced
+            if self.run_open:
+                self.end_run(ts, 'skipped', message)
+        elif message.startswith('completed sync.sh'):
+            if self.run_open:
+                self._set_phase('completed', ts)
+                self.last_success_at = ts
+                self.completed_runs += 1
+                self.end_run(ts, 'completed', 'completed')
+        elif level in ('fatal', 'panic'):
+            self.last_error = message
+            if self.run_open:
+                self._set_phase('failed', ts)
+                self.failed_runs += 1
+                self.end_run(ts, 'failed', message)
+        elif level == 'error':
+            self.last_error = message
+
+        if 'tunedWorkers' in record:
+            self.tuned_workers = {'workers': int(record['tunedWorkers']),
+                                  'items_per_minute': float(record.get('itemsPerMinute') or 0)}
+        elif 'workerLimit' in record:
+            self.worker_limit = int(record['workerLimit'])
+
+        if self.run_started_at is not None:
+            self.progress.feed(ts, record)
+
+    @property
+    def run_open(self):
+        return self.run_started_at is not None and self.run_ended_at is None
+
+    def _start_run(self, ts):
+        if self.run_open:
+            self.end_run(ts, 'interrupted', 'a new run started before this one finished')
+        self.run_started_at = ts
+        self.run_ended_at = None
+        self.run_status = 'running'
+        self.exit_reason = None
+        self.phase_durations = {}
+        self.last_error = None
+        self.progress = SyncProgress(ts)
+        self.worker_limit = None
+        self.tuned_workers = None
+
+    def end_run(self, ts, status, reason):
+        """Close the open run and queue its summary for the history store"""
+        self._account_phase(ts)
+        self.run_ended_at = ts
+        self.run_status = status
+        self.exit_reason = reason
+        if status in ('interrupted', 'skipped'):
+            self._set_phase('idle', ts)
+        self.finished_runs.append(self.run_summary())
+
+    def run_summary(self):
+        """Summary of the current (or last) run for the history store"""
+        progress = self.progress.to_dict()
+        return {
+            'started_at': self.run_started_at,
+            'ended_at': self.run_ended_at,
+            'status': self.run_status,
+            'exit_reason': self.exit_reason,
+            'phase_durations': dict(self.phase_durations),
+            'items_seen': progress['items_seen'],
+            'items_downloaded': progress['downloaded'],
+            'items_skipped': progress['skipped'],
+            'failures': progress['failed'],
+            'bytes_written': progress['bytes_written'],
+            'tuned_workers': self.tuned_workers
+        }
 
-        # Check if sync is running (look for specific log patterns)
-        if 'downloading' in logs.lower() or 'processing' in logs.lower() or 'navigating' in logs.lower():
-            return 'syncing'
+    def _account_phase(self, ts):
+        """Add the time spent in the current phase to the run's phase durations"""
+        if self.run_open and self.phase_since is not None and self.phase not in ('idle', 'completed', 'failed'):
+            self.phase_durations[self.phase] = round(self.phase_durations.get(self.phase, 0) + ts - self.phase_since, 3)
+
+    def _set_phase(self, phase, ts):
+        if phase != self.phase:
+            self._account_phase(ts)
+            self.phase = phase
+            self.phase_since = ts
+
+    @property
+    def sync_status(self):
+        """Collapse the phase into the dashboard's completed/failed/syncing/idle status"""
+        if self.phase in ('completed', 'failed', 'idle'):
+            return self.phase
+        return 'syncing'
+
+class LogCursor:
+    """Reads only the log lines a container wrote since the previous poll"""
+
+    def __init__(self, initial_tail=1000):
+        self.initial_tail = initial_tail
+        self.last_key = None
+
+    def poll(self, client, container_id):
+        """Yield (timestamp key, record) for every new log line"""
+        if self.last_key is None:
+            raw = client.api.logs(container_id, timestamps=True, tail=self.initial_tail)
+        else:
+            # since only has second resolution, lines at the boundary are filtered below
+            raw = client.api.logs(container_id, timestamps=True, since=self.last_key[0])
+
+        for line in raw.decode('utf-8', errors='ignore').splitlines():
+            key, record = parse_log_line(line)
+            if key is None:
+                continue
+            if self.last_key is not None and key <= self.last_key:
+                continue
+            self.last_key = key
+            yield key, record
+
+class SyncStatusMonitor:
+    """Keeps a log cursor and state machine per sync container, polled in the background.
+
+    Status lookups are answered from memory; each poll only transfers the log lines
+    written since the previous one.
+    """
+
+    def __init__(self, client, poll_interval=3, initial_tail=1000):
+        self.client = client
+        self.poll_interval = poll_interval
+        self.initial_tail = initial_tail
+        self._lock = threading.Lock()
+        self._cursors = {}   # short container id -> LogCursor
+        self._trackers = {}  # short container id -> SyncStatusTracker
+        self._drained = set()  # stopped containers whose final lines were already read
+        self._poll_lock = threading.Lock()  # polls come from the monitor thread and from jobs removing containers
+
+    def start(self):
+        """Start the background polling thread"""
+        threading.Thread(target=self._poll_loop, name='sync-status-monitor', daemon=True).start()
+
+    def tracker(self, container_id):
+        """Get the tracker for a container, or None if it has not been polled yet"""
+        with self._lock:
+            return self._trackers.get(container_id[:12])
+
+    def poll_container(self, container_id, profile=None, stopped=False):
+        """Consume new log lines of one container"""
+        container_id = container_id[:12]
+        with self._lock:
+            cursor = self._cursors.setdefault(container_id, LogCursor(self.initial_tail))
+            tracker = self._trackers.setdefault(container_id, SyncStatusTracker())
+        before = (tracker.phase, tracker.last_error, tracker.progress.updated_at)
+        entries = []
+        with self._poll_lock:
+            for key, record in cursor.poll(self.client, container_id):
+                tracker.feed(key[0] + key[1] / 1e9, record)
+                entries.append((key, record))
+        if profile is not None and entries:
+            try:
+                log_archive.append(profile, entries)
+            except Exception as e:
+                print(f"Warning: Could not archive logs of {profile}: {e}")
+        if stopped and tracker.run_open:
+            tracker.end_run(tracker.progress.updated_at or time.time(), 'interrupted', 'container stopped')
+        changed = (tracker.phase, tracker.last_error, tracker.progress.updated_at) != before
+
+        if profile is not None:
+            self._record_history(profile, tracker, changed)
+        if changed:
+            dashboard_events.notify()
+
+    def _record_history(self, profile, tracker, changed):
+        """Persist finished runs and the progress of the open one"""
+        try:
+            while tracker.finished_runs:
+                run = tracker.finished_runs[0]
+                run_history.record_run(profile, run)
+                if run['status'] == 'completed' and run['tuned_workers']:
+                    save_worker_tuning(profile, run['tuned_workers'], run['ended_at'])
+                tracker.finished_runs.pop(0)
+                # New downloads landed; refresh the library index in the background
+                library_index.request_scan(profile)
+            if changed and tracker.run_open:
+                run_history.record_run(profile, tracker.run_summary())
+        except Exception as e:
+            print(f"Warning: Could not record sync history for {profile}: {e}")
+
+    def _poll_loop(self):
+        while True:
+            records = container_cache.snapshot()
+            for record in records:
+                # Stopped containers get one last poll to pick up their final lines
+                if record['status'] != 'running':
+                    if record['id'] in self._drained:
+                        continue
+                    self._drained.add(record['id'])
+                else:
+                    self._drained.discard(record['id'])
+                try:
+                    self.poll_container(record['id'], record['profile'], stopped=record['status'] != 'running')
+                except docker.errors.NotFound:
+                    continue
+                except Exception as e:
+                    print(f"Warning: Could not read logs of {record['name']}: {e}")
+            self._forget_missing({r['id'] for r in records})
+            try:
+                log_archive.rotate_aged()
+            except Exception as e:
+                print(f"Warning: Could not rotate the log archive: {e}")
+            time.sleep(self.poll_interval)
+
+    def _forget_missing(self, container_ids):
+        with self._lock:
+            for container_id in list(self._trackers):
+                if container_id not in container_ids:
+                    self._trackers.pop(container_id, None)
+                    self._cursors.pop(container_id, None)
+                    self._drained.discard(container_id)
+
+def add_sync_status(info):
+    """Add the current sync status and phase to a container record"""
+    info = dict(info)
+    tracker = sync_monitor.tracker(info['id'])
+
+    # If container is not running, return stopped
+    if info['status'] != 'running':
+        info['sync_status'] = 'stopped'
+    elif tracker is None:
+        info['sync_status'] = 'unknown'
+    else:
+        info['sync_status'] = tracker.sync_status
 
-        # If container is running but no clear indication
-        return 'idle'
-    except Exception as e:
-        # If we can't get logs, return unknown
-        return 'unknown'
+    if tracker is not None:
+        info['sync_phase'] = tracker.phase
+        info['sync_phase_since'] = tracker.phase_since
+        info['last_error'] = tracker.last_error
+        info['progress'] = tracker.progress.to_dict() if tracker.run_started_at else None
+    return info
 
 def get_container_info(container):
     """Extract relevant info from container"""
@@ -109,14 +604,6 @@ def get_container_info(container):
     cmd = container.attrs.get('Config', {}).get('Cmd', [])
     has_cron = not (cmd and 'no-cron' in cmd)
 
-    # Only calculate next run if cron is enabled
-    if has_cron and env_vars.get('CRON_SCHEDULE'):
-        # Get timezone from container env, default to Europe/Rome
-        tz = env_vars.get('TZ', 'Europe/Rome')
-        cron_info = parse_cron_next_run(env_vars.get('CRON_SCHEDULE', '0 2 * * *'), tz)
-    else:
-        cron_info = {'next_run': 'Disabled (no-cron mode)', 'time_until': 'N/A'}
-
     # Extract profile name from container name (e.g., "gphotos-sync-family" -> "family")
     profile_name = container.name.replace(get_container_prefix() + '-', '', 1)
     if not profile_name:
@@ -126,9 +613,6 @@ def get_container_info(container):
     metadata = get_profile_metadata(profile_name)
     display_name = metadata.get('display_name', profile_name)
 
-    # Get sync status
-    sync_status = check_sync_status(container)
-
     return {
         'id': container.id[:12],
         'name': container.name,
@@ -137,15 +621,141 @@ def get_container_info(container):
         'status': container.status,
         'state': container.attrs['State']['Status'],
         'created': container.attrs['Created'],
+        'cron_enabled': has_cron and bool(env_vars.get('CRON_SCHEDULE')),
         'cron_schedule': env_vars.get('CRON_SCHEDULE', 'N/A'),
+        'timezone': env_vars.get('TZ', 'Europe/Rome'),
         'run_on_startup': env_vars.get('RUN_ON_STARTUP', 'false'),
         'loglevel': env_vars.get('LOGLEVEL', 'info'),
         'worker_count': env_vars.get('WORKER_COUNT', '6'),
-        'next_run': cron_info['next_run'],
-        'time_until': cron_info['time_until'],
-        'sync_status': sync_status
+        'worker_mode': env_vars.get('WORKER_MODE', 'fixed')
     }
 
+def add_schedule_info(info):
+    """Return a copy of a container record with next run fields computed for now"""
+    info = dict(info)
+
+    # Only calculate next run if cron is enabled
+    if info.get('cron_enabled'):
+        cron_info = parse_cron_next_run(info['cron_schedule'], info.get('timezone', 'Europe/Rome'))
+    else:
+        cron_info = {'next_run': 'Disabled (no-cron mode)', 'time_until': 'N/A'}
+
+    info['next_run'] = cron_info['next_run']
+    info['time_until'] = cron_info['time_until']
+    return info
+
+# Docker event actions that change what the dashboard shows for a container
+WATCHED_CONTAINER_ACTIONS = {'create', 'start', 'restart', 'stop', 'die', 'kill', 'pause', 'unpause', 'rename', 'destroy'}
+
+class ContainerStateCache:
+    """In-memory view of the sync containers, kept current by the Docker events stream.
+
+    API handlers read from here instead of listing containers and inspecting each one
+    on every poll. A background reconciler periodically re-lists the containers to
+    correct any drift from missed events.
+    """
+
+    def __init__(self, client, reconcile_interval=30):
+        self.client = client
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._records = {}  # full container id -> info dict from get_container_info
+        self._ready = threading.Event()
+
+    def start(self):
+        """Start the event watcher and reconciler threads"""
+        threading.Thread(target=self._watch_events, name='container-events', daemon=True).start()
+        threading.Thread(target=self._reconcile_loop, name='container-reconciler', daemon=True).start()
+
+    def snapshot(self):
+        """Get a list of all cached container records"""
+        self._ready.wait(timeout=10)
+        with self._lock:
+            return list(self._records.values())
+
+    def reconcile(self):
+        """Rebuild the cache from a full container listing"""
+        records = {}
+        for container in get_sync_containers():
+            try:
+                records[container.id] = get_container_info(container)
+            except docker.errors.NotFound:
+                continue
+        with self._lock:
+            self._records = records
+        self._ready.set()
+        dashboard_events.notify()
+
+    def refresh_container(self, container_id):
+        """Re-inspect a single container and update (or drop) its record"""
+        try:
+            container = self.client.containers.get(container_id)
+        except docker.errors.NotFound:
+            self.remove_container(container_id)
+            return
+        if not container.name.startswith(get_container_prefix()):
+            return
+        info = get_container_info(container)
+        with self._lock:
+            self._records[container.id] = info
+        dashboard_events.notify()
+
+    def remove_container(self, container_id):
+        """Drop a container record, accepting full or short ids"""
+        with self._lock:
+            for full_id in list(self._records):
+                if full_id.startswith(container_id):
+                    del self._records[full_id]
+        dashboard_events.notify()
+
+    def _watch_events(self):
+        """Apply container events as they arrive, reconnecting if the stream drops"""
+        prefix = get_container_prefix()
+        while True:
+            try:
+                for event in self.client.events(decode=True, filters={'type': 'container'}):
+                    action = event.get('Action') or event.get('status') or ''
+                    # Exec events look like "exec_start: sh -c ..."
+                    action = action.split(':', 1)[0]
+                    if action not in WATCHED_CONTAINER_ACTIONS:
+                        continue
+                    name = event.get('Actor', {}).get('Attributes', {}).get('name', '')
+                    if not name.startswith(prefix):
+                        continue
+                    container_id = event.get('id') or event.get('Actor', {}).get('ID')
+                    if action == 'destroy':
+                        self.remove_container(container_id)
+                    else:
+                        self.refresh_container(container_id)
+            except Exception as e:
+                print(f"Warning: Docker event stream interrupted: {e}")
+            time.sleep(5)
+            # Events may have been missed while disconnected
+            self._safe_reconcile()
+
+    def _reconcile_loop(self):
+        """Periodically re-list containers to catch anything the event stream missed"""
+        while True:
+            self._safe_reconcile()
+            time.sleep(self.reconcile_interval)
+
+    def _safe_reconcile(self):
+        try:
+            self.reconcile()
+        except Exception as e:
+            print(f"Warning: Container reconcile failed: {e}")
+
+container_cache = ContainerStateCache(
+    docker_client,
+    reconcile_interval=int(os.getenv('CONTAINER_RECONCILE_INTERVAL', '30'))
+)
+
+sync_monitor = SyncStatusMonitor(
+    docker_client,
+    poll_interval=float(os.getenv('LOG_POLL_INTERVAL', '3')),
+    initial_tail=int(os.getenv('LOG_CURSOR_INITIAL_TAIL', '1000'))
+)
+
 @app.route('/')
 def index():
     """Main dashboard"""
@@ -154,31 +764,2301 @@ def index():
 @app.route('/api/containers')
 def api_containers():
     """Get all container info"""
-    containers = get_sync_containers()
-    return jsonify([get_container_info(c) for c in containers])
+    records = sorted(container_cache.snapshot(), key=lambda r: r['name'])
+    return jsonify([add_disk_usage(add_sync_status(add_schedule_info(r))) for r in records])
+
+def find_container_record(profile_name):
+    """Find the cached container record of a profile"""
+    container_name = f'{get_container_prefix()}-{profile_name}'
+    for record in container_cache.snapshot():
+        if record['name'] == container_name:
+            return record
+    return None
+
+@app.route('/api/profile/<profile_name>/progress')
+def api_profile_progress(profile_name):
+    """Get live download counters of a profile's current (or last) sync run"""
+    record = find_container_record(profile_name)
+    if record is None:
+        return jsonify({'error': f'No container found for profile {profile_name}'}), 404
+
+    tracker = sync_monitor.tracker(record['id'])
+    if tracker is None or tracker.run_started_at is None:
+        return jsonify({'profile': profile_name, 'phase': tracker.phase if tracker else 'unknown', 'progress': None})
+
+    return jsonify({
+        'profile': profile_name,
+        'phase': tracker.phase,
+        'running': record['status'] == 'running' and tracker.sync_status == 'syncing',
+        'worker_count': record['worker_count'],
+        'progress': tracker.progress.to_dict()
+    })
+
+class SyncFleetCollector:
+    """Prometheus collector exposing per-profile sync state from the in-memory trackers"""
+
+    def collect(self):
+        up = GaugeMetricFamily('gphotos_sync_container_up', 'Whether the sync container is running', labels=['profile'])
+        syncing = GaugeMetricFamily('gphotos_sync_in_progress', 'Whether a sync run is in progress', labels=['profile'])
+        duration = GaugeMetricFamily('gphotos_sync_run_duration_seconds', 'Duration of the current or last sync run', labels=['profile'])
+        downloaded = GaugeMetricFamily('gphotos_sync_run_items_downloaded', 'Items downloaded by the current or last sync run', labels=['profile'])
+        skipped = GaugeMetricFamily('gphotos_sync_run_items_skipped', 'Items already present in the current or last sync run', labels=['profile'])
+        written = GaugeMetricFamily('gphotos_sync_run_bytes_written', 'Bytes written by the current or last sync run', labels=['profile'])
+        errors = GaugeMetricFamily('gphotos_sync_run_errors', 'Errors logged by the current or last sync run', labels=['profile'])
+        rate = GaugeMetricFamily('gphotos_sync_items_per_second', 'Current download rate', labels=['profile'])
+        last_success = GaugeMetricFamily('gphotos_sync_last_success_timestamp_seconds', 'End time of the last successful sync run', labels=['profile'])
+        runs = CounterMetricFamily('gphotos_sync_runs', 'Sync runs seen since the web GUI started, by result', labels=['profile', 'result'])
+        cpu = GaugeMetricFamily('gphotos_sync_container_cpu_percent', 'CPU use of the sync container over the last sample interval (100 = one core)', labels=['profile'])
+        memory = GaugeMetricFamily('gphotos_sync_container_memory_bytes', 'Memory use of the sync container, excluding page cache', labels=['profile'])
+        disk = GaugeMetricFamily('gphotos_sync_disk_usage_bytes', "Size of the profile's photo directory", labels=['profile'])
+        quota = GaugeMetricFamily('gphotos_sync_disk_quota_bytes', 'Disk quota of the profile', labels=['profile'])
+
+        for record in container_cache.snapshot():
+            profile = record['profile']
+            up.add_metric([profile], 1 if record['status'] == 'running' else 0)
+
+            stream = resource_sampler.stream(record['id'])
+            latest = stream.latest() if stream is not None and stream.active else None
+            if latest is not None:
+                cpu.add_metric([profile], latest['cpu_percent'])
+                memory.add_metric([profile], latest['memory_bytes'])
+
+            usage = disk_usage.usage(profile)
+            if usage is not None and not usage['scanning']:
+                disk.add_metric([profile], usage['bytes'])
+                if usage['quota_bytes']:
+                    quota.add_metric([profile], usage['quota_bytes'])
+
+            tracker = sync_monitor.tracker(record['id'])
+            if tracker is None:
+                continue
+            syncing.add_metric([profile], 1 if record['status'] == 'running' and tracker.sync_status == 'syncing' else 0)
+            runs.add_metric([profile, 'completed'], tracker.completed_runs)
+            runs.add_metric([profile, 'failed'], tracker.failed_runs)
+            if tracker.last_success_at is not None:
+                last_success.add_metric([profile], tracker.last_success_at)
+            if tracker.run_started_at is not None:
+                progress = tracker.progress.to_dict()
+                duration.add_metric([profile], progress['elapsed_seconds'])
+                downloaded.add_metric([profile], progress['downloaded'])
+                skipped.add_metric([profile], progress['skipped'])
+                written.add_metric([profile], progress['bytes_written'])
+                errors.add_metric([profile], progress['failed'])
+                rate.add_metric([profile], progress['items_per_second'])
+
+        return [up, syncing, duration, downloaded, skipped, written, errors, rate, last_success, runs, cpu, memory, disk, quota]
+
+REGISTRY.register(SyncFleetCollector())
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for the web GUI and the sync containers"""
+    return Response(generate_latest(REGISTRY), content_type=CONTENT_TYPE_LATEST)
+
+class RunHistoryStore:
+    """SQLite-backed history of sync runs, indexed by profile and start time"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sync_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile TEXT NOT NULL,
+            started_at REAL NOT NULL,
+            ended_at REAL,
+            status TEXT NOT NULL,
+            exit_reason TEXT,
+            phase_durations TEXT NOT NULL DEFAULT '{}',
+            items_seen INTEGER NOT NULL DEFAULT 0,
+            items_downloaded INTEGER NOT NULL DEFAULT 0,
+            items_skipped INTEGER NOT NULL DEFAULT 0,
+            failures INTEGER NOT NULL DEFAULT 0,
+            bytes_written INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (profile, started_at)
+        );
+        CREATE INDEX IF NOT EXISTS idx_sync_runs_profile_started ON sync_runs (profile, started_at);
+        CREATE INDEX IF NOT EXISTS idx_sync_runs_started ON sync_runs (started_at);
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(get_data_path(self.filename), check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def record_run(self, profile, run):
+        """Insert or update a run, identified by profile and start time"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("""
+                INSERT INTO sync_runs (profile, started_at, ended_at, status, exit_reason, phase_durations,
+                                       items_seen, items_downloaded, items_skipped, failures, bytes_written)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (profile, started_at) DO UPDATE SET
+                    ended_at = excluded.ended_at, status = excluded.status, exit_reason = excluded.exit_reason,
+                    phase_durations = excluded.phase_durations, items_seen = excluded.items_seen,
+                    items_downloaded = excluded.items_downloaded, items_skipped = excluded.items_skipped,
+                    failures = excluded.failures, bytes_written = excluded.bytes_written
+            """, (
+                profile, run['started_at'], run['ended_at'], run['status'], run['exit_reason'],
+                json.dumps(run['phase_durations']), run['items_seen'], run['items_downloaded'],
+                run['items_skipped'], run['failures'], run['bytes_written']
+            ))
+            conn.commit()
+
+    def _where(self, profile, since, until):
+        clauses, params = [], []
+        if profile:
+            clauses.append('profile = ?')
+            params.append(profile)
+        if since is not None:
+            clauses.append('started_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('started_at < ?')
+            params.append(until)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def query(self, profile=None, since=None, until=None, page=1, per_page=50):
+        """Get one page of runs, newest first, plus the total number of matching runs"""
+        where, params = self._where(profile, since, until)
+        with self._lock:
+            conn = self._connection()
+            total = conn.execute(f'SELECT COUNT(*) FROM sync_runs{where}', params).fetchone()[0]
+            rows = conn.execute(
+                f'SELECT * FROM sync_runs{where} ORDER BY started_at DESC LIMIT ? OFFSET ?',
+                params + [per_page, (page - 1) * per_page]
+            ).fetchall()
+
+        runs = []
+        for row in rows:
+            run = dict(row)
+            run['phase_durations'] = json.loads(run['phase_durations'] or '{}')
+            run['duration_seconds'] = round(run['ended_at'] - run['started_at'], 3) if run['ended_at'] else None
+            runs.append(run)
+        return runs, total
+
+    def aggregates(self, profile=None, since=None, until=None):
+        """Per-profile totals and weekly throughput for the matching runs"""
+        where, params = self._where(profile, since, until)
+        finished = (where + ' AND' if where else ' WHERE') + ' ended_at IS NOT NULL'
+        with self._lock:
+            conn = self._connection()
+            per_profile = conn.execute(f"""
+                SELECT profile, COUNT(*) AS runs,
+                       SUM(status = 'completed') AS completed, SUM(status = 'failed') AS failed,
+                       AVG(ended_at - started_at) AS avg_duration_seconds,
+                       SUM(items_downloaded) AS items_downloaded, SUM(bytes_written) AS bytes_written,
+                       SUM(failures) AS failures,
+                       SUM(items_downloaded) / NULLIF(SUM(ended_at - started_at), 0) AS items_per_second,
+                       MAX(CASE WHEN status = 'completed' THEN ended_at END) AS last_success_at
+                FROM sync_runs{finished} GROUP BY profile ORDER BY profile
+            """, params).fetchall()
+            weekly = conn.execute(f"""
+                SELECT profile, strftime('%Y-W%W', started_at, 'unixepoch') AS week, COUNT(*) AS runs,
+                       AVG(ended_at - started_at) AS avg_duration_seconds,
+                       SUM(items_downloaded) AS items_downloaded,
+                       SUM(items_downloaded) / NULLIF(SUM(ended_at - started_at), 0) AS items_per_second
+                FROM sync_runs{finished} GROUP BY profile, week ORDER BY profile, week
+            """, params).fetchall()
+        return {
+            'profiles': [dict(row) for row in per_profile],
+            'weekly': [dict(row) for row in weekly]
+        }
+
+run_history = RunHistoryStore('history.db')
+
+@app.route('/api/history')
+def api_history():
+    """Get past sync runs with pagination and aggregates
+
+    Query parameters: profile, since and until (epoch seconds), page, per_page.
+    """
+    profile = request.args.get('profile') or None
+    since = request.args.get('since', type=float)
+    until = request.args.get('until', type=float)
+    page = max(request.args.get('page', default=1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', default=50, type=int), 1), 500)
+
+    try:
+        runs, total = run_history.query(profile, since, until, page, per_page)
+        return jsonify({
+            'runs': runs,
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page,
+            'aggregates': run_history.aggregates(profile, since, until)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def suggest_staggered_schedule(schedule, offset_minutes):
+    """Shift a daily-style cron (numeric minute and hour) by offset_minutes
+
+    Returns None for schedules that can't be shifted mechanically
+    (ranges, steps or lists in the minute or hour field).
+    """
+    fields = schedule.split()
+    if len(fields) != 5 or not fields[0].isdigit() or not fields[1].isdigit():
+        return None
+    total = int(fields[1]) * 60 + int(fields[0]) + offset_minutes
+    if total >= 24 * 60:
+        # Would spill into the next day and change which weekdays it runs on
+        return None
+    return ' '.join([str(total % 60), str(total // 60)] + fields[2:])
+
+def build_schedule_timeline(records, days, durations, default_duration):
+    """Upcoming runs of every cron-enabled container, with overlaps and stagger suggestions"""
+    now = datetime.now(pytz.utc)
+    end = now + timedelta(days=days)
+
+    runs = []
+    truncated = []
+    profiles = {}
+    for record in records:
+        if not record.get('cron_enabled'):
+            continue
+        schedule, tz = record['cron_schedule'], record.get('timezone', 'Europe/Rome')
+        try:
+            starts = schedule_engine.runs_between(schedule, tz, now, end)
+        except Exception as e:
+            print(f"Warning: Invalid schedule for {record['profile']}: {e}")
+            continue
+        if len(starts) >= schedule_engine.max_runs:
+            truncated.append(record['profile'])
+
+        duration = durations.get(record['profile']) or default_duration
+        profiles[record['profile']] = {'schedule': schedule, 'timezone': tz, 'duration': duration}
+        for start, next_start in zip(starts, starts[1:] + [None]):
+            run_end = start + timedelta(seconds=duration)
+            # Cron's flock skips a run while the previous one still holds the lock
+            if next_start is not None:
+                run_end = min(run_end, next_start)
+            runs.append({'profile': record['profile'], 'start': start, 'end': run_end})
+    runs.sort(key=lambda run: (run['start'], run['profile']))
+
+    # Sweep the runs in start order; a run overlaps a group while it starts before the group ends
+    overlaps = []
+    group = None
+    for run in runs:
+        if group and run['start'] < group['end']:
+            group['runs'].append(run)
+            group['end'] = max(group['end'], run['end'])
+        else:
+            if group and len(group['runs']) > 1:
+                overlaps.append(group)
+            group = {'start': run['start'], 'end': run['end'], 'runs': [run]}
+    if group and len(group['runs']) > 1:
+        overlaps.append(group)
+
+    # Stagger each overlap: every profile starts when the previous one is expected to end
+    suggestions = {}
+    for overlap in overlaps:
+        first = overlap['runs'][0]
+        ordered = []
+        for run in overlap['runs']:
+            if run['profile'] not in (item['profile'] for item in ordered):
+                ordered.append(run)
+        slot = 0
+        for previous, run in zip(ordered, ordered[1:]):
+            if suggest_staggered_schedule(profiles[previous['profile']]['schedule'], 0) is None:
+                # Runs at several times a day; there is no single slot to plan around
+                break
+            # Round each slot up to 5 minutes
+            slot += -(-profiles[previous['profile']]['duration'] // 300) * 5
+            shift = slot - int((run['start'] - first['start']).total_seconds() // 60)
+            if shift <= 0 or run['profile'] in suggestions:
+                continue
+            suggestions[run['profile']] = {
+                'profile': run['profile'],
+                'current': profiles[run['profile']]['schedule'],
+                'suggested': suggest_staggered_schedule(profiles[run['profile']]['schedule'], shift),
+                'shift_minutes': shift,
+                'reason': f"overlaps {first['profile']} at {first['start'].isoformat()}"
+            }
+
+    def iso(value):
+        return value.isoformat()
+
+    return {
+        'generated_at': iso(now),
+        'days': days,
+        'runs': [
+            {**run, 'start': iso(run['start']), 'end': iso(run['end']),
+             'estimated_duration_seconds': profiles[run['profile']]['duration']}
+            for run in runs
+        ],
+        'overlaps': [
+            {'start': iso(o['start']), 'end': iso(o['end']),
+             'profiles': sorted({run['profile'] for run in o['runs']})}
+            for o in overlaps
+        ],
+        'suggestions': sorted(suggestions.values(), key=lambda item: item['profile']),
+        'truncated': truncated
+    }
+
+class LibraryIndex:
+    """SQLite index of what each profile has downloaded
+
+    gphotos-cdp writes every item to <dldir>/<imageId>/ and, when albums are
+    synced, uses one such dldir per album below the photo directory. The index
+    remembers the mtime of every item directory, so a rescan lists each root
+    but only reads item directories whose mtime moved (files added, removed or
+    replaced in them). Files rewritten in place leave the directory mtime alone,
+    so every full_rescan_interval seconds a scan reads all items instead. The
+    photo date is the file mtime, which gphotos-cdp sets to the date shown in
+    Google Photos.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS library_roots (
+            profile TEXT NOT NULL,
+            album TEXT NOT NULL,
+            dir_mtime_ns INTEGER NOT NULL,
+            PRIMARY KEY (profile, album)
+        );
+        CREATE TABLE IF NOT EXISTS library_items (
+            profile TEXT NOT NULL,
+            album TEXT NOT NULL,
+            image_id TEXT NOT NULL,
+            dir_mtime_ns INTEGER NOT NULL,
+            file_count INTEGER NOT NULL,
+            total_bytes INTEGER NOT NULL,
+            photo_date REAL,
+            indexed_at REAL NOT NULL,
+            PRIMARY KEY (profile, album, image_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_library_items_date ON library_items (profile, photo_date);
+        CREATE TABLE IF NOT EXISTS library_files (
+            profile TEXT NOT NULL,
+            album TEXT NOT NULL,
+            image_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            PRIMARY KEY (profile, album, image_id, name)
+        );
+        CREATE TABLE IF NOT EXISTS library_scans (
+            profile TEXT PRIMARY KEY,
+            started_at REAL NOT NULL,
+            finished_at REAL,
+            full_scan INTEGER NOT NULL,
+            roots_listed INTEGER NOT NULL DEFAULT 0,
+            items_read INTEGER NOT NULL DEFAULT 0,
+            items_removed INTEGER NOT NULL DEFAULT 0,
+            error TEXT
+        );
+        CREATE TABLE IF NOT EXISTS library_full_scans (
+            profile TEXT PRIMARY KEY,
+            finished_at REAL NOT NULL
+        );
+    """
+
+    # Top-level entries of a download dir that are not items
+    SKIP_DIRS = {'tmp', '.removed-archive'}
+
+    def __init__(self, filename, rescan_interval=300, full_rescan_interval=86400):
+        self.filename = filename
+        self.rescan_interval = rescan_interval
+        self.full_rescan_interval = full_rescan_interval
+        self._lock = threading.Lock()
+        self._conn = None
+        self._scanning = set()
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(get_data_path(self.filename), check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    @staticmethod
+    def _is_library_root(path):
+        # gphotos-cdp creates <dldir>/tmp for in-flight downloads
+        return os.path.isdir(os.path.join(path, 'tmp'))
+
+    def roots(self, photo_dir):
+        """Library roots below a photo dir: '' for the dir itself, plus one per album"""
+        roots = {'': photo_dir}
+        with os.scandir(photo_dir) as entries:
+            for entry in entries:
+                if entry.is_dir() and entry.name not in self.SKIP_DIRS and self._is_library_root(entry.path):
+                    roots[entry.name] = entry.path
+        return roots
+
+    def _read_item(self, path):
+        """(files, photo date) of one item directory"""
+        files = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    files.append((entry.name, stat.st_size, stat.st_mtime))
+        photo_date = min((mtime for _, _, mtime in files), default=None)
+        return files, photo_date
+
+    def scan(self, profile, full=False):
+        """Bring the index of one profile up to date with its photo dir"""
+        photo_dir = get_profile_photo_dir(profile)
+        started = time.time()
+        counts = {'roots_listed': 0, 'items_read': 0, 'items_removed': 0}
+        if not full and self.full_rescan_interval:
+            last_full = self._execute('SELECT finished_at FROM library_full_scans WHERE profile = ?', (profile,))
+            # A profile seen for the first time is read in full anyway, start its clock now
+            full = bool(last_full) and last_full[0][0] < started - self.full_rescan_interval
+        with self._lock:
+            conn = self._connection()
+            conn.execute('INSERT OR REPLACE INTO library_scans (profile, started_at, full_scan) VALUES (?, ?, ?)',
+                         (profile, started, int(full)))
+            conn.commit()
+
+        try:
+            roots = self.roots(photo_dir) if os.path.isdir(photo_dir) else {}
+            known_roots = {row['album']: row['dir_mtime_ns'] for row in self._execute(
+                'SELECT album, dir_mtime_ns FROM library_roots WHERE profile = ?', (profile,))}
+
+            for album in known_roots.keys() - roots.keys():
+                self._remove(profile, album)
+
+            for album, root in roots.items():
+                # Listed even when its mtime is unchanged: that only covers item dirs
+                # being added or removed, not files changing inside existing ones
+                root_mtime = os.stat(root).st_mtime_ns
+                counts['roots_listed'] += 1
+                self._scan_root(profile, album, root, full, counts)
+                with self._lock:
+                    conn = self._connection()
+                    conn.execute('INSERT OR REPLACE INTO library_roots VALUES (?, ?, ?)', (profile, album, root_mtime))
+                    conn.commit()
+            error = None
+        except Exception as e:
+            error = str(e)
+            print(f"Warning: Library scan of {profile} failed: {e}")
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute("""
+                UPDATE library_scans SET finished_at = ?, roots_listed = ?, items_read = ?, items_removed = ?, error = ?
+                WHERE profile = ?
+            """, (time.time(), counts['roots_listed'], counts['items_read'], counts['items_removed'], error, profile))
+            if error is None and (full or not known_roots):
+                conn.execute('INSERT OR REPLACE INTO library_full_scans VALUES (?, ?)', (profile, time.time()))
+            conn.commit()
+        return counts
+
+    def _scan_root(self, profile, album, root, full, counts):
+        known = {row['image_id']: row['dir_mtime_ns'] for row in self._execute(
+            'SELECT image_id, dir_mtime_ns FROM library_items WHERE profile = ? AND album = ?', (profile, album))}
+        seen = set()
+        batch = []
+
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False) or entry.name in self.SKIP_DIRS:
+                    continue
+                if album == '' and self._is_library_root(entry.path):
+                    continue
+                seen.add(entry.name)
+                mtime = entry.stat(follow_symlinks=False).st_mtime_ns
+                if not full and known.get(entry.name) == mtime:
+                    continue
+                files, photo_date = self._read_item(entry.path)
+                batch.append((entry.name, mtime, files, photo_date))
+                if len(batch) >= 500:
+                    self._store(profile, album, batch)
+                    counts['items_read'] += len(batch)
+                    batch = []
+                    # Let requests run between batches
+                    time.sleep(0)
+        self._store(profile, album, batch)
+        counts['items_read'] += len(batch)
+
+        removed = known.keys() - seen
+        if removed:
+            with self._lock:
+                conn = self._connection()
+                for table in ('library_items', 'library_files'):
+                    conn.executemany(f'DELETE FROM {table} WHERE profile = ? AND album = ? AND image_id = ?',
+                                     [(profile, album, image_id) for image_id in removed])
+                conn.commit()
+            counts['items_removed'] += len(removed)
+
+    def _store(self, profile, album, batch):
+        if not batch:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            for image_id, mtime, files, photo_date in batch:
+                conn.execute('DELETE FROM library_files WHERE profile = ? AND album = ? AND image_id = ?',
+                             (profile, album, image_id))
+                conn.executemany('INSERT INTO library_files VALUES (?, ?, ?, ?, ?, ?)',
+                                 [(profile, album, image_id, name, size, file_mtime) for name, size, file_mtime in files])
+                conn.execute('INSERT OR REPLACE INTO library_items VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (
+                    profile, album, image_id, mtime, len(files), sum(size for _, size, _ in files), photo_date, now))
+            conn.commit()
+
+    def _remove(self, profile, album):
+        with self._lock:
+            conn = self._connection()
+            for table in ('library_roots', 'library_items', 'library_files'):
+                conn.execute(f'DELETE FROM {table} WHERE profile = ? AND album = ?', (profile, album))
+            conn.commit()
+
+    def request_scan(self, profile, full=False):
+        """Queue a background scan unless one is already running; returns the job or None"""
+        with self._lock:
+            if profile in self._scanning:
+                return None
+            self._scanning.add(profile)
+
+        def run():
+            try:
+                return {'profile': profile, **self.scan(profile, full)}, 200
+            finally:
+                with self._lock:
+                    self._scanning.discard(profile)
+
+        return jobs.submit('library-scan', profile, run, lane='scan')
+
+    def files_with_shared_sizes(self, min_size):
+        """Indexed files whose size occurs more than once, across all profiles"""
+        return self._execute("""
+            SELECT profile, album, image_id, name, size FROM library_files
+            WHERE size IN (
+                SELECT size FROM library_files WHERE size >= ? GROUP BY size HAVING COUNT(*) > 1
+            )
+            ORDER BY size
+        """, (min_size,))
+
+    def last_scan(self, profile):
+        rows = self._execute('SELECT * FROM library_scans WHERE profile = ?', (profile,))
+        return dict(rows[0]) if rows else None
+
+    def is_stale(self, profile):
+        scan = self.last_scan(profile)
+        return scan is None or (scan['finished_at'] or 0) < time.time() - self.rescan_interval
+
+    def stats(self, profile):
+        totals = self._execute("""
+            SELECT COUNT(*) AS items, COALESCE(SUM(file_count), 0) AS files,
+                   COALESCE(SUM(total_bytes), 0) AS total_bytes,
+                   SUM(total_bytes = 0) AS empty_items,
+                   MIN(photo_date) AS oldest_photo, MAX(photo_date) AS newest_photo
+            FROM library_items WHERE profile = ?
+        """, (profile,))[0]
+        by_year = self._execute("""
+            SELECT strftime('%Y', photo_date, 'unixepoch') AS year, COUNT(*) AS items, SUM(total_bytes) AS bytes
+            FROM library_items WHERE profile = ? AND photo_date IS NOT NULL GROUP BY year ORDER BY year
+        """, (profile,))
+        by_album = self._execute("""
+            SELECT album, COUNT(*) AS items, SUM(total_bytes) AS bytes
+            FROM library_items WHERE profile = ? GROUP BY album ORDER BY album
+        """, (profile,))
+        return {
+            **dict(totals),
+            'empty_items': totals['empty_items'] or 0,
+            'by_year': [dict(row) for row in by_year],
+            'albums': [dict(row) for row in by_album]
+        }
+
+    def query(self, profile, album=None, prefix=None, since=None, until=None, order='date', page=1, per_page=100):
+        """One page of indexed items with their files"""
+        clauses, params = ['profile = ?'], [profile]
+        if album is not None:
+            clauses.append('album = ?')
+            params.append(album)
+        if prefix:
+            clauses.append('substr(image_id, 1, ?) = ?')
+            params.extend([len(prefix), prefix])
+        if since is not None:
+            clauses.append('photo_date >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('photo_date < ?')
+            params.append(until)
+        where = ' AND '.join(clauses)
+        order_by = {'date': 'photo_date DESC', 'size': 'total_bytes DESC', 'id': 'image_id'}.get(order, 'photo_date DESC')
+
+        total = self._execute(f'SELECT COUNT(*) FROM library_items WHERE {where}', params)[0][0]
+        rows = self._execute(
+            f'SELECT * FROM library_items WHERE {where} ORDER BY {order_by} LIMIT ? OFFSET ?',
+            params + [per_page, (page - 1) * per_page])
+
+        # Files for the whole page in a few queries, chunked to stay under SQLite's variable limit
+        keys = [(row['album'], row['image_id']) for row in rows]
+        files = collections.defaultdict(list)
+        for start in range(0, len(keys), 400):
+            chunk = keys[start:start + 400]
+            for f in self._execute(
+                    'SELECT album, image_id, name, size, mtime FROM library_files WHERE profile = ? '
+                    f"AND (album, image_id) IN (VALUES {', '.join(['(?, ?)'] * len(chunk))}) ORDER BY name",
+                    [profile] + [value for key in chunk for value in key]):
+                files[(f['album'], f['image_id'])].append({'name': f['name'], 'size': f['size'], 'mtime': f['mtime']})
+
+        items = []
+        for row in rows:
+            item = dict(row)
+            item.pop('profile')
+            item['files'] = files.get((row['album'], row['image_id']), [])
+            items.append(item)
+        return items, total
+
+library_index = LibraryIndex(
+    'library.db',
+    rescan_interval=int(os.getenv('LIBRARY_RESCAN_INTERVAL', '300')),
+    full_rescan_interval=int(os.getenv('LIBRARY_FULL_RESCAN_INTERVAL', '86400'))
+)
+
+def parse_date_param(value):
+    """Epoch seconds or an ISO date from a query parameter"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+@app.route('/api/profile/<profile_name>/library')
+def api_profile_library(profile_name):
+    """Stats and a page of items from a profile's library index
+
+    Query parameters: album, q (image id prefix), since and until (photo date,
+    epoch seconds or ISO), order (date, size, id), page, per_page, and
+    rescan=1|full to force a background rescan.
+    """
+    if not os.path.exists(f'{WORKSPACE_DIR}/profiles/{profile_name}'):
+        return jsonify({'error': f'Profile {profile_name} not found'}), 404
+
+    rescan = request.args.get('rescan')
+    page = max(request.args.get('page', default=1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', default=100, type=int), 1), 1000)
+
+    try:
+        since = parse_date_param(request.args.get('since'))
+        until = parse_date_param(request.args.get('until'))
+    except ValueError:
+        return jsonify({'error': 'Invalid since or until'}), 400
+
+    try:
+        job = None
+        if rescan or library_index.is_stale(profile_name):
+            job = library_index.request_scan(profile_name, full=rescan == 'full')
+
+        items, total = library_index.query(
+            profile_name,
+            album=request.args.get('album'),
+            prefix=request.args.get('q'),
+            since=since,
+            until=until,
+            order=request.args.get('order', 'date'),
+            page=page,
+            per_page=per_page
+        )
+        return jsonify({
+            'profile': profile_name,
+            'photo_dir': get_profile_photo_dir(profile_name),
+            'stats': library_index.stats(profile_name),
+            'last_scan': library_index.last_scan(profile_name),
+            'scan_job': job['id'] if job else None,
+            'items': items,
+            'page': page,
+            'per_page': per_page,
+            'total': total
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+class Inotify:
+    """Minimal inotify binding through libc, without an extra dependency"""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+    def add_watch(self, path, mask):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout):
+        """Wait up to timeout for events, returning [(wd, mask, name)]"""
+        # Wait in select so gevent can run other greenlets; the fd never blocks
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+def count_dir_files(path):
+    """(bytes, files, hard links) of the files directly in path, and its subdirectory paths.
+
+    bytes only covers files with a single link. Files with several hard links
+    (album links, dedup) are returned as {(st_dev, st_ino): size} instead, so the
+    caller can count each inode once however many of its links it sees.
+    """
+    size = files = 0
+    links = {}
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    if stat.st_nlink > 1:
+                        links[(stat.st_dev, stat.st_ino)] = stat.st_size
+                    else:
+                        size += stat.st_size
+                    files += 1
+            except OSError:
+                continue
+    return size, files, links, subdirs
+
+class WatchedDir:
+    """A directory below a profile's photo dir, with the totals of its own files"""
+
+    __slots__ = ('usage', 'path', 'wd', 'bytes', 'files', 'links', 'children', 'attached')
+
+    def __init__(self, usage, path, wd, size, files, links):
+        self.usage = usage
+        self.path = path
+        self.wd = wd
+        self.bytes = size  # files with a single link
+        self.files = files
+        self.links = links  # (st_dev, st_ino) -> size of hard-linked files
+        self.children = {}  # name -> WatchedDir
+        self.attached = True  # False once taken out of the totals
+
+class ProfileDiskUsage:
+    """Running totals of one profile's photo dir"""
+
+    def __init__(self, profile, root):
+        self.profile = profile
+        self.root = root
+        self.bytes = 0
+        self.files = 0
+        self.dirs = 0
+        self.tree = None
+        self.active = True
+        self.scanning = True
+        self.scanned_at = None
+        self.unwatched = 0  # directories counted without a watch, which need periodic rescans
+        self.error = None
+        self.quota_bytes = None
+        self.free_bytes = None
+        self.inodes = {}  # (st_dev, st_ino) -> [size, links seen] of hard-linked files
+        self.samples = collections.deque(maxlen=24 * 60 + 1)  # (time, bytes), one a minute
+
+    def growth_per_day(self):
+        """Bytes added per day over the sampled window, or None before ten minutes of samples"""
+        if len(self.samples) < 2 or self.samples[-1][0] - self.samples[0][0] < 600:
+            return None
+        (start, start_bytes), (end, end_bytes) = self.samples[0], self.samples[-1]
+        return (end_bytes - start_bytes) / (end - start) * 86400
+
+    def to_dict(self, warn_ratio, warn_days):
+        growth = self.growth_per_day()
+        info = {
+            'bytes': self.bytes,
+            'files': self.files,
+            'scanning': self.scanning,
+            'scanned_at': self.scanned_at,
+            'live': not self.scanning and self.unwatched == 0 and self.error is None,
+            'growth_bytes_per_day': round(growth) if growth is not None else None,
+            'quota_bytes': self.quota_bytes,
+            'quota_percent': round(self.bytes / self.quota_bytes * 100, 1) if self.quota_bytes else None,
+            'free_bytes': self.free_bytes,
+            'days_until_full': None,
+            'warning': None
+        }
+        if growth and growth > 0:
+            room = [self.free_bytes] if self.free_bytes is not None else []
+            if self.quota_bytes:
+                room.append(max(self.quota_bytes - self.bytes, 0))
+            if room:
+                info['days_until_full'] = round(min(room) / growth, 1)
+
+        if self.quota_bytes and self.bytes >= self.quota_bytes:
+            info['warning'] = 'Disk quota exceeded'
+        elif self.quota_bytes and self.bytes >= self.quota_bytes * warn_ratio:
+            info['warning'] = f"{info['quota_percent']:.0f}% of disk quota used"
+        elif info['days_until_full'] is not None and info['days_until_full'] < warn_days:
+            info['warning'] = f"Full in about {info['days_until_full']:.0f} days at the current growth"
+        return info
+
+class DiskUsageService:
+    """Per-profile disk usage of the photo dirs, kept current with inotify.
+
+    Each profile's photo dir is walked once in the background, adding a watch to
+    every directory on the way. After that, events only trigger a re-read of the
+    directory they happened in (gphotos-cdp keeps a handful of files per item
+    directory), so the totals follow the downloads without walking the tree again.
+    Directories that could not be watched (e.g. fs.inotify.max_user_watches
+    reached, or inotify not available) are covered by a full rescan every
+    rescan_interval seconds instead.
+
+    Hard-linked files are counted once per profile by inode. Adding a link turns
+    the original into a linked file without an event in its directory, so it
+    would still be counted as a single-link file too: gphotos-cdp links album
+    items from the library item of the same id, so that one is re-read when an
+    album item turns out to be linked, and after a dedup run the profiles are
+    rescanned.
+    """
+
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+
+    def __init__(self, check_interval=30, rescan_interval=3600, warn_ratio=0.9, warn_days=7):
+        self.check_interval = check_interval
+        self.rescan_interval = rescan_interval
+        self.warn_ratio = warn_ratio
+        self.warn_days = warn_days
+        self._lock = threading.Lock()
+        self._usage = {}  # profile -> ProfileDiskUsage
+        self._nodes = {}  # watch descriptor -> WatchedDir
+        self._rescan = set()  # profiles whose totals can no longer be trusted
+        self._inotify = None
+
+    def start(self):
+        """Start the event reader and the thread that scans and samples profiles"""
+        try:
+            self._inotify = Inotify()
+            threading.Thread(target=self._event_loop, name='disk-usage-events', daemon=True).start()
+        except (OSError, AttributeError) as e:
+            print(f"Warning: inotify not available, disk usage is rescanned every {self.rescan_interval}s: {e}")
+        threading.Thread(target=self._supervise_loop, name='disk-usage', daemon=True).start()
+
+    def request_rescan(self, profiles=None):
+        """Walk the given (default: all) profiles again on the next check"""
+        with self._lock:
+            self._rescan.update(self._usage if profiles is None else profiles)
+
+    def usage(self, profile):
+        """Disk usage summary of a profile, or None if it is not tracked"""
+        with self._lock:
+            usage = self._usage.get(profile)
+            return usage.to_dict(self.warn_ratio, self.warn_days) if usage is not None else None
+
+    def track(self, profiles):
+        """Scan new profiles, rescan changed or stale ones and sample the totals of all"""
+        for profile in profiles:
+            root = get_profile_photo_dir(profile)
+            quota_gb = get_profile_metadata(profile).get('disk_quota_gb') or 0
+            with self._lock:
+                usage = self._usage.get(profile)
+                stale = profile in self._rescan
+                self._rescan.discard(profile)
+            if usage is None or usage.root != root or stale or (
+                    (usage.unwatched or usage.error) and time.time() - (usage.scanned_at or 0) >= self.rescan_interval):
+                usage = self._scan(profile, root)
+
+            usage.quota_bytes = int(float(quota_gb) * 1024 ** 3) or None
+            try:
+                stat = os.statvfs(root)
+                usage.free_bytes = stat.f_bavail * stat.f_frsize
+            except OSError:
+                usage.free_bytes = None
+            now = time.time()
+            if not usage.samples or now - usage.samples[-1][0] >= 60:
+                usage.samples.append((now, usage.bytes))
+
+        with self._lock:
+            for profile in self._usage.keys() - set(profiles):
+                self._forget(self._usage.pop(profile))
+
+    def _scan(self, profile, root):
+        """Walk a profile's photo dir from scratch, replacing its previous totals"""
+        usage = ProfileDiskUsage(profile, root)
+        with self._lock:
+            previous = self._usage.get(profile)
+            if previous is not None:
+                self._forget(previous)
+                # Growth is about the same directory; keep the history across rescans
+                if previous.root == root:
+                    usage.samples = previous.samples
+            self._usage[profile] = usage
+        if os.path.isdir(root):
+            try:
+                self._add_tree(usage, None, root)
+            except Exception as e:
+                usage.error = str(e)
+                print(f"Warning: Disk usage scan of {profile} failed: {e}")
+        else:
+            usage.error = f'{root} does not exist'
+        usage.scanning = False
+        usage.scanned_at = time.time()
+        return usage
+
+    def _forget(self, usage):
+        """Stop watching a profile's directories (called with the lock held)"""
+        usage.active = False
+        stack = [usage.tree] if usage.tree else []
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children.values())
+            if node.wd is not None and self._nodes.get(node.wd) is node:
+                del self._nodes[node.wd]
+                self._inotify.rm_watch(node.wd)
+
+    def _add_watch(self, usage, path):
+        if self._inotify is None:
+            return None
+        try:
+            wd = self._inotify.add_watch(path, self.WATCH_MASK)
+        except OSError as e:
+            if e.errno == errno.ENOSPC and not usage.unwatched:
+                print(f"Warning: inotify watch limit reached while scanning {usage.profile}, "
+                      f"raise fs.inotify.max_user_watches for live disk usage")
+            return None
+        other = self._nodes.get(wd)
+        if other is not None and other.usage is not usage and other.usage.active:
+            # Photo dirs of two profiles overlap; the first one keeps the watch
+            return None
+        return wd
+
+    def _add_tree(self, usage, parent, path):
+        """Count and watch path and everything below it, attached under parent"""
+        stack = [(parent, path)]
+        while stack:
+            parent, path = stack.pop()
+            if not usage.active:
+                return
+            # Watch before listing, so nothing written in between is missed
+            wd = self._add_watch(usage, path)
+            try:
+                size, files, links, subdirs = count_dir_files(path)
+            except OSError:
+                continue
+            node = WatchedDir(usage, path, wd, size, files, links)
+            library_copy = None
+            with self._lock:
+                if not usage.active:
+                    return
+                if parent is not None and not parent.attached:
+                    # Replaced meanwhile; the walk of the replacement covers this directory
+                    continue
+                if parent is None:
+                    usage.tree = node
+                else:
+                    name = os.path.basename(path)
+                    if name in parent.children:
+                        # Reported both by the scan and by an event
+                        self._drop_tree(parent.children[name])
+                    parent.children[name] = node
+                if wd is not None:
+                    self._nodes[wd] = node
+                else:
+                    usage.unwatched += 1
+                usage.bytes += size
+                usage.files += files
+                usage.dirs += 1
+                self._add_links(usage, links)
+                if links:
+                    library_copy = self._library_copy(node)
+            if library_copy is not None:
+                self._refresh_dir(library_copy)
+            stack.extend((node, subdir) for subdir in subdirs)
+
+    def _drop_tree(self, node):
+        """Take a directory and everything below it out of the totals (called with the lock held)"""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children.values())
+            node.attached = False
+            usage = node.usage
+            usage.bytes -= node.bytes
+            usage.files -= node.files
+            usage.dirs -= 1
+            self._remove_links(usage, node.links)
+            if node.wd is None:
+                usage.unwatched -= 1
+            elif self._nodes.get(node.wd) is node:
+                # A directory moved elsewhere keeps its watch; moving it back in reuses it
+                del self._nodes[node.wd]
+
+    @staticmethod
+    def _add_links(usage, links):
+        """Count hard-linked files whose inode is new to the profile (called with the lock held)"""
+        for key, size in links.items():
+            entry = usage.inodes.get(key)
+            if entry is None:
+                usage.inodes[key] = [size, 1]
+                usage.bytes += size
+            else:
+                usage.bytes += size - entry[0]
+                entry[0] = size
+                entry[1] += 1
+
+    @staticmethod
+    def _remove_links(usage, links):
+        """Uncount hard-linked files whose last link in the profile is gone (called with the lock held)"""
+        for key in links:
+            entry = usage.inodes[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del usage.inodes[key]
+                usage.bytes -= entry[0]
+
+    def _library_copy(self, node):
+        """The library item an album item's files may be linked from (called with the lock held)"""
+        usage = node.usage
+        parts = os.path.relpath(node.path, usage.root).split(os.sep)
+        if len(parts) != 2 or usage.tree is None:
+            return None
+        library_item = usage.tree.children.get(parts[1])
+        return library_item if library_item is not node else None
+
+    def _refresh_dir(self, node):
+        """Re-read the files of one directory after events in it"""
+        try:
+            size, files, links, _ = count_dir_files(node.path)
+        except OSError:
+            return
+        library_copy = None
+        with self._lock:
+            if not node.attached:
+                return
+            node.usage.bytes += size - node.bytes
+            node.usage.files += files - node.files
+            self._add_links(node.usage, links)
+            self._remove_links(node.usage, node.links)
+            node.bytes, node.files, node.links = size, files, links
+            if links:
+                library_copy = self._library_copy(node)
+        if library_copy is not None:
+            self._refresh_dir(library_copy)
+
+    def _event_loop(self):
+        dirty = {}  # wd -> WatchedDir with changed files
+        last_flush = time.time()
+        while True:
+            try:
+                new_dirs = []
+                for wd, mask, name in self._inotify.read(timeout=1):
+                    if mask & IN_Q_OVERFLOW:
+                        # Events were lost; totals are only right after a fresh walk
+                        with self._lock:
+                            self._rescan.update(self._usage)
+                        continue
+                    with self._lock:
+                        node = self._nodes.get(wd)
+                        if node is None:
+                            continue
+                        if mask & IN_IGNORED:
+                            # The directory itself is gone; its parent reports the removal
+                            del self._nodes[wd]
+                            node.wd = None
+                            node.usage.unwatched += 1
+                            if node is node.usage.tree:
+                                self._rescan.add(node.usage.profile)
+                        elif mask & IN_ISDIR:
+                            if mask & (IN_DELETE | IN_MOVED_FROM):
+                                child = node.children.pop(name, None)
+                                if child is not None:
+                                    self._drop_tree(child)
+                            elif mask & (IN_CREATE | IN_MOVED_TO):
+                                new_dirs.append((node, os.path.join(node.path, name)))
+                        else:
+                            dirty[wd] = node
+                for node, path in new_dirs:
+                    self._add_tree(node.usage, node, path)
+
+                # New item directories fill up over a few seconds; re-read them in batches
+                if dirty and time.time() - last_flush >= 1:
+                    for node in dirty.values():
+                        self._refresh_dir(node)
+                    dirty = {}
+                    last_flush = time.time()
+            except Exception as e:
+                print(f"Warning: Disk usage event handling failed: {e}")
+                time.sleep(1)
+
+    def _supervise_loop(self):
+        while True:
+            try:
+                self.track(sorted({r['profile'] for r in container_cache.snapshot()}))
+            except Exception as e:
+                print(f"Warning: Could not update disk usage: {e}")
+            time.sleep(self.check_interval)
+
+disk_usage = DiskUsageService(
+    rescan_interval=int(os.getenv('DISK_USAGE_RESCAN_INTERVAL', '3600')),
+    warn_ratio=float(os.getenv('DISK_QUOTA_WARN_PERCENT', '90')) / 100,
+    warn_days=float(os.getenv('DISK_FULL_WARN_DAYS', '7'))
+)
+
+def add_disk_usage(info):
+    """Add the disk usage of the container's profile to a container record"""
+    info = dict(info)
+    info['disk_usage'] = disk_usage.usage(info['profile'])
+    return info
+
+REMOVED_ARCHIVE_DIR = '.removed-archive'
+
+def read_removed_lists(profile):
+    """{album: (download dir, image ids)} from the .removed files gphotos-cdp wrote for a profile"""
+    photo_dir = get_profile_photo_dir(profile)
+    lists = {}
+    if not os.path.isdir(photo_dir):
+        return lists
+    for album, root in library_index.roots(photo_dir).items():
+        try:
+            with open(os.path.join(root, '.removed')) as f:
+                image_ids = [line.strip() for line in f if line.strip()]
+        except FileNotFoundError:
+            continue
+        if image_ids:
+            lists[album] = (root, image_ids)
+    return lists
+
+def item_dir_size(path):
+    """(file count, total bytes) of one item directory, None if it is gone"""
+    try:
+        with os.scandir(path) as entries:
+            sizes = [entry.stat().st_size for entry in entries if entry.is_file()]
+    except FileNotFoundError:
+        return None
+    return len(sizes), sum(sizes)
+
+def write_removed_list(root, image_ids):
+    path = os.path.join(root, '.removed')
+    if not image_ids:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path + '.tmp', 'w') as f:
+        f.write('\n'.join(image_ids))
+    os.replace(path + '.tmp', path)
+
+def process_removed_items(profile, action, selected=None):
+    """Archive or delete the listed items of a profile, then drop them from .removed
+
+    Archived items are moved to <photo dir>/.removed-archive/<album>/<image id>,
+    which gphotos-cdp and the library index both ignore.
+    """
+    import shutil
+
+    photo_dir = get_profile_photo_dir(profile)
+    handled, missing, failed, freed = 0, 0, [], 0
+    for album, (root, image_ids) in read_removed_lists(profile).items():
+        remaining = []
+        for image_id in image_ids:
+            if selected is not None and (album, image_id) not in selected:
+                remaining.append(image_id)
+                continue
+            src = os.path.join(root, image_id)
+            try:
+                size = item_dir_size(src)
+                if size is None:
+                    missing += 1
+                    continue
+                if action == 'delete':
+                    shutil.rmtree(src)
+                    freed += size[1]
+                else:
+                    dst = os.path.join(photo_dir, REMOVED_ARCHIVE_DIR, album, image_id)
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    if os.path.exists(dst):
+                        shutil.rmtree(dst)
+                    shutil.move(src, dst)
+                handled += 1
+            except OSError as e:
+                failed.append({'album': album, 'image_id': image_id, 'error': str(e)})
+                remaining.append(image_id)
+        write_removed_list(root, remaining)
+
+    library_index.request_scan(profile)
+    return {
+        'profile': profile,
+        'action': action,
+        'handled': handled,
+        'missing': missing,
+        'freed_bytes': freed,
+        'failed': failed
+    }, 200 if not failed else 500
+
+@app.route('/api/profile/<profile_name>/removed', methods=['GET'])
+def api_profile_removed(profile_name):
+    """Items gphotos-cdp found locally but no longer on Google Photos, with their size on disk"""
+    if not os.path.exists(f'{WORKSPACE_DIR}/profiles/{profile_name}'):
+        return jsonify({'error': f'Profile {profile_name} not found'}), 404
+
+    try:
+        items = []
+        for album, (root, image_ids) in read_removed_lists(profile_name).items():
+            for image_id in image_ids:
+                size = item_dir_size(os.path.join(root, image_id))
+                items.append({
+                    'album': album,
+                    'image_id': image_id,
+                    'exists': size is not None,
+                    'files': size[0] if size else 0,
+                    'bytes': size[1] if size else 0
+                })
+        photo_dir = get_profile_photo_dir(profile_name)
+        return jsonify({
+            'profile': profile_name,
+            'photo_dir': photo_dir,
+            'writable': os.access(photo_dir, os.W_OK),
+            'items': items,
+            'total_items': len(items),
+            'total_bytes': sum(item['bytes'] for item in items)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/profile/<profile_name>/removed', methods=['POST'])
+def api_profile_removed_action(profile_name):
+    """Archive or delete removed items in the background
+
+    Body: {"action": "archive" | "delete", "items": [{"album": "", "image_id": "..."}]}.
+    Without items, every entry of the profile's .removed files is handled.
+    """
+    if not os.path.exists(f'{WORKSPACE_DIR}/profiles/{profile_name}'):
+        return jsonify({'error': f'Profile {profile_name} not found'}), 404
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Body must be a JSON object'}), 400
+    action = data.get('action')
+    if action not in ('archive', 'delete'):
+        return jsonify({'error': 'action must be archive or delete'}), 400
+    items = data.get('items')
+    if items is not None and not (isinstance(items, list) and all(
+            isinstance(item, dict) and isinstance(item.get('image_id'), str)
+            and isinstance(item.get('album', ''), str) for item in items)):
+        return jsonify({'error': 'items must be a list of {"album", "image_id"} objects'}), 400
+    if not os.access(get_profile_photo_dir(profile_name), os.W_OK):
+        return jsonify({'error': 'Photo directory is not writable'}), 409
+
+    selected = None
+    if items is not None:
+        # Only entries listed in a .removed file can be touched
+        selected = {(item.get('album', ''), item['image_id']) for item in items}
+
+    job = jobs.submit(f'removed-{action}', profile_name, process_removed_items, profile_name, action, selected,
+                      lane='removed')
+    return job_response(job)
+
+class DedupService:
+    """Replaces duplicate downloads with hardlinks to a single copy
+
+    Candidates come from the library index: only files whose size occurs
+    more than once, across all profiles and album dirs, are hashed. Hashes
+    are stored with the file's size and mtime, so a stopped or interrupted
+    run resumes without re-reading anything that hasn't changed. Files on
+    read-only mounts (custom photo dirs under /host) are left alone.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS file_hashes (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            device INTEGER NOT NULL,
+            sha256 TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_file_hashes_sha256 ON file_hashes (sha256);
+        CREATE TABLE IF NOT EXISTS dedup_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at REAL NOT NULL,
+            finished_at REAL,
+            status TEXT NOT NULL,
+            candidates INTEGER NOT NULL DEFAULT 0,
+            hashed INTEGER NOT NULL DEFAULT 0,
+            hashed_bytes INTEGER NOT NULL DEFAULT 0,
+            duplicates INTEGER NOT NULL DEFAULT 0,
+            linked INTEGER NOT NULL DEFAULT 0,
+            reclaimed_bytes INTEGER NOT NULL DEFAULT 0,
+            error TEXT
+        );
+    """
+
+    def __init__(self, filename, min_size=64 * 1024):
+        self.filename = filename
+        self.min_size = min_size
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stop = threading.Event()
+        self._running = False
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(get_data_path(self.filename), check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def _execute(self, sql, params=(), commit=False):
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(sql, params).fetchall()
+            if commit:
+                conn.commit()
+            return rows
+
+    def start(self):
+        """Queue a dedup run; returns the job, or None if one is already running"""
+        with self._lock:
+            if self._running:
+                return None
+            self._running = True
+        self._stop.clear()
+        return jobs.submit('dedup', 'all-profiles', self._run, lane='scan')
+
+    def stop(self):
+        """Ask the running job to stop at the next file; it can be resumed later"""
+        self._stop.set()
+
+    def status(self):
+        rows = self._execute('SELECT * FROM dedup_runs ORDER BY id DESC LIMIT 1')
+        return {'running': self._running, 'last_run': dict(rows[0]) if rows else None}
+
+    def _run(self):
+        try:
+            return self._dedup(), 200
+        finally:
+            with self._lock:
+                self._running = False
+            # Linking moved the shares of files outside the directories that had events
+            disk_usage.request_rescan()
+
+    def _candidates(self):
+        """Groups of writable files that share a size, from the library index"""
+        groups = collections.defaultdict(list)
+        writable = {}
+        for row in library_index.files_with_shared_sizes(self.min_size):
+            profile = row['profile']
+            if profile not in writable:
+                photo_dir = get_profile_photo_dir(profile)
+                writable[profile] = photo_dir if os.access(photo_dir, os.W_OK) else None
+            if writable[profile] is None:
+                continue
+            groups[row['size']].append(os.path.join(writable[profile], row['album'], row['image_id'], row['name']))
+        return [paths for paths in groups.values() if len(paths) > 1]
+
+    def _hash(self, path, stat):
+        """sha256 of a file, from the table when size and mtime are unchanged"""
+        import hashlib
+
+        rows = self._execute('SELECT size, mtime_ns, sha256 FROM file_hashes WHERE path = ?', (path,))
+        if rows and rows[0]['size'] == stat.st_size and rows[0]['mtime_ns'] == stat.st_mtime_ns:
+            return rows[0]['sha256'], False
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+                # Hashing is the long part; let requests run in between
+                time.sleep(0)
+        self._execute('INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?)',
+                      (path, stat.st_size, stat.st_mtime_ns, stat.st_dev, digest.hexdigest()), commit=True)
+        return digest.hexdigest(), True
+
+    def _link(self, keep, duplicate, expected, sha256):
+        """Atomically replace duplicate with a hardlink to keep"""
+        current = os.stat(duplicate)
+        if (current.st_size, current.st_mtime_ns) != (expected.st_size, expected.st_mtime_ns):
+            # Changed since it was hashed; leave it for the next run
+            return 0
+        freed = current.st_size if current.st_nlink == 1 else 0
+        temp = f'{duplicate}.dedup-tmp'
+        if os.path.lexists(temp):
+            os.unlink(temp)  # Left over from an interrupted run
+        os.link(keep, temp)
+        try:
+            os.replace(temp, duplicate)
+        except OSError:
+            os.unlink(temp)
+            raise
+        # The path now shares keep's inode; record it so the next run doesn't re-read it
+        linked = os.stat(duplicate)
+        self._execute('INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?)',
+                      (duplicate, linked.st_size, linked.st_mtime_ns, linked.st_dev, sha256), commit=True)
+        return freed
+
+    def _dedup(self):
+        # Bring every profile's index up to date first
+        for profile in sorted(os.listdir(f'{WORKSPACE_DIR}/profiles')) if os.path.isdir(f'{WORKSPACE_DIR}/profiles') else []:
+            library_index.scan(profile)
+
+        counts = {'candidates': 0, 'hashed': 0, 'hashed_bytes': 0, 'duplicates': 0, 'linked': 0, 'reclaimed_bytes': 0}
+        with self._lock:
+            conn = self._connection()
+            run_id = conn.execute("INSERT INTO dedup_runs (started_at, status) VALUES (?, 'running')",
+                                  (time.time(),)).lastrowid
+            conn.commit()
+
+        def save(status, error=None):
+            self._execute(f"""
+                UPDATE dedup_runs SET status = ?, error = ?, finished_at = ?,
+                    {', '.join(f'{key} = ?' for key in counts)} WHERE id = ?
+            """, (status, error, time.time() if status != 'running' else None, *counts.values(), run_id), commit=True)
+
+        try:
+            groups = self._candidates()
+            counts['candidates'] = sum(len(paths) for paths in groups)
+            for number, paths in enumerate(groups, 1):
+                if self._stop.is_set():
+                    save('stopped')
+                    return {'status': 'stopped', **counts}
+
+                # Same content on the same filesystem, keyed by (device, hash)
+                by_content = collections.defaultdict(list)
+                for path in paths:
+                    try:
+                        stat = os.stat(path)
+                        sha256, read = self._hash(path, stat)
+                    except OSError:
+                        continue  # Removed or unreadable since it was indexed
+                    if read:
+                        counts['hashed'] += 1
+                        counts['hashed_bytes'] += stat.st_size
+                    by_content[(stat.st_dev, sha256)].append((path, stat))
+
+                for (_, sha256), copies in by_content.items():
+                    # Keep the copy that already has the most links
+                    copies.sort(key=lambda item: (-item[1].st_nlink, item[0]))
+                    keep, keep_stat = copies[0]
+                    for path, stat in copies[1:]:
+                        if stat.st_ino == keep_stat.st_ino:
+                            continue
+                        counts['duplicates'] += 1
+                        try:
+                            counts['reclaimed_bytes'] += self._link(keep, path, stat, sha256)
+                            counts['linked'] += 1
+                        except OSError as e:
+                            print(f"Warning: Could not hardlink {path}: {e}")
+
+                if number % 100 == 0:
+                    save('running')
+            save('completed')
+            return {'status': 'completed', **counts}
+        except Exception as e:
+            save('failed', str(e))
+            raise
+
+dedup_service = DedupService('dedup.db', min_size=int(os.getenv('DEDUP_MIN_SIZE', str(64 * 1024))))
+
+@app.route('/api/dedup', methods=['GET'])
+def api_dedup_status():
+    """Progress of the running or last dedup run"""
+    return jsonify(dedup_service.status())
+
+@app.route('/api/dedup', methods=['POST'])
+def api_dedup_start():
+    """Start (or resume) replacing duplicate downloads with hardlinks"""
+    job = dedup_service.start()
+    if job is None:
+        return jsonify({'error': 'Dedup is already running'}), 409
+    return job_response(job)
+
+@app.route('/api/dedup', methods=['DELETE'])
+def api_dedup_stop():
+    """Stop the running dedup job; the next start resumes from the stored hashes"""
+    dedup_service.stop()
+    return jsonify({'status': 'stopping'})
+
+@app.route('/api/schedule')
+def api_schedule():
+    """Timeline of upcoming scheduled runs for the next ?days=N days (default 7, max 31)"""
+    days = min(max(request.args.get('days', default=7, type=int), 1), 31)
+    default_duration = int(os.getenv('SCHEDULE_DEFAULT_RUN_MINUTES', '60')) * 60
+
+    # Estimate run lengths from the last 30 days of history
+    durations = {}
+    try:
+        for row in run_history.aggregates(since=time.time() - 30 * 86400)['profiles']:
+            if row['avg_duration_seconds']:
+                durations[row['profile']] = int(row['avg_duration_seconds'])
+    except Exception as e:
+        print(f"Warning: Could not read run history: {e}")
+
+    try:
+        return jsonify(build_schedule_timeline(container_cache.snapshot(), days, durations, default_duration))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+class SyncSlotCoordinator:
+    """Host-wide admission control for sync runs
+
+    sync.sh asks for a slot before launching gphotos-cdp. At most `limit`
+    profiles hold a slot at once (0 means no limit); the rest wait in a
+    queue ordered by priority, then arrival. Holders keep their lease alive
+    with heartbeats and waiters by polling, so a container that dies
+    without releasing frees its place after `lease_seconds`.
+    """
+
+    def __init__(self, limit=0, lease_seconds=300, wait_seconds=60):
+        self.limit = limit
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+        self._lock = threading.Lock()
+        self._holders = {}
+        self._waiters = {}
+
+    def _expire(self, now):
+        for table in (self._holders, self._waiters):
+            for profile in [p for p, entry in table.items() if entry['expires_at'] < now]:
+                del table[profile]
+
+    def _queue(self):
+        return sorted(self._waiters.values(), key=lambda w: (-w['priority'], w['queued_at']))
+
+    def acquire(self, profile, priority=0):
+        """Grant a slot or queue the profile; returns the slot or queue entry"""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            holder = self._holders.get(profile)
+            if holder:
+                holder['expires_at'] = now + self.lease_seconds
+                return dict(holder, granted=True)
+
+            waiter = self._waiters.get(profile)
+            if waiter is None:
+                waiter = {'profile': profile, 'priority': priority, 'queued_at': now}
+                self._waiters[profile] = waiter
+            waiter['priority'] = priority
+            waiter['expires_at'] = now + self.wait_seconds
+
+            queue_order = self._queue()
+            free = self.limit - len(self._holders) if self.limit > 0 else len(queue_order)
+            position = queue_order.index(waiter)
+            if position < free:
+                del self._waiters[profile]
+                holder = {
+                    'profile': profile,
+                    'priority': priority,
+                    'token': uuid.uuid4().hex,
+                    'queued_at': waiter['queued_at'],
+                    'granted_at': now,
+                    'expires_at': now + self.lease_seconds
+                }
+                self._holders[profile] = holder
+                return dict(holder, granted=True)
+            return dict(waiter, granted=False, position=position - max(free, 0) + 1)
+
+    def heartbeat(self, profile, token):
+        """Extend a lease; unknown tokens are adopted (the GUI restarted mid-run)"""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            holder = self._holders.get(profile)
+            if holder is None or holder['token'] != token:
+                holder = {'profile': profile, 'priority': 0, 'token': token,
+                          'queued_at': now, 'granted_at': now}
+                self._holders[profile] = holder
+            holder['expires_at'] = now + self.lease_seconds
+            return dict(holder)
+
+    def release(self, profile, token=None):
+        with self._lock:
+            holder = self._holders.get(profile)
+            if holder and (token is None or holder['token'] == token):
+                del self._holders[profile]
+                return True
+            self._waiters.pop(profile, None)
+            return False
+
+    def status(self):
+        with self._lock:
+            self._expire(time.time())
+            return {
+                'limit': self.limit,
+                'running': [dict(h, token=None) for h in sorted(self._holders.values(), key=lambda h: h['granted_at'])],
+                'queued': [dict(w) for w in self._queue()]
+            }
+
+sync_slots = SyncSlotCoordinator(
+    limit=int(os.getenv('MAX_CONCURRENT_SYNCS', '0')),
+    lease_seconds=int(os.getenv('SYNC_SLOT_LEASE', '300'))
+)
+
+@app.route('/api/slots')
+def api_slots():
+    """Current slot holders and the waiting queue"""
+    return jsonify(sync_slots.status())
+
+@app.route('/api/slots/acquire', methods=['POST'])
+def api_slots_acquire():
+    """Ask for a sync slot: 200 with a token when granted, 202 with a queue position otherwise"""
+    data = request.get_json(silent=True) or {}
+    profile = data.get('profile')
+    if not profile:
+        return jsonify({'error': 'profile is required'}), 400
+    try:
+        priority = int(data.get('priority') or 0)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid priority'}), 400
+
+    slot = sync_slots.acquire(profile, priority)
+    dashboard_events.notify()
+    if slot['granted']:
+        return jsonify({**slot, 'lease_seconds': sync_slots.lease_seconds})
+    return jsonify({**slot, 'retry_after': 10}), 202
+
+@app.route('/api/slots/heartbeat', methods=['POST'])
+def api_slots_heartbeat():
+    """Keep a granted slot alive while the sync runs"""
+    data = request.get_json(silent=True) or {}
+    if not data.get('profile') or not data.get('token'):
+        return jsonify({'error': 'profile and token are required'}), 400
+    return jsonify(sync_slots.heartbeat(data['profile'], data['token']))
+
+@app.route('/api/slots/release', methods=['POST'])
+def api_slots_release():
+    """Give a slot back when the sync finishes"""
+    data = request.get_json(silent=True) or {}
+    if not data.get('profile'):
+        return jsonify({'error': 'profile is required'}), 400
+    released = sync_slots.release(data['profile'], data.get('token'))
+    dashboard_events.notify()
+    return jsonify({'released': released})
+
+class LogFollower:
+    """Follows one container's log stream into a ring buffer shared by all viewers"""
+
+    def __init__(self, client, container_id, capacity):
+        self.client = client
+        self.container_id = container_id
+        self.lines = collections.deque(maxlen=capacity)  # (sequence number, line)
+        self.seq = 0
+        self.subscribers = 0
+        self.last_used = time.time()
+        self.closed = False
+        self.error = None
+        self.primed = threading.Event()
+        self._cond = threading.Condition()
+        self._stream = None
+
+    def start(self):
+        threading.Thread(target=self._run, name=f'log-follower-{self.container_id}', daemon=True).start()
+
+    def stop(self):
+        """Close the Docker log stream, which ends the follower thread"""
+        self.closed = True
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+        with self._cond:
+            self._cond.notify_all()
+
+    def _append(self, lines):
+        with self._cond:
+            for line in lines:
+                self.seq += 1
+                self.lines.append((self.seq, line))
+            self._cond.notify_all()
+
+    def _run(self):
+        last_key = None
+        try:
+            # Fill the buffer with the recent backlog, then follow from there
+            backlog = self.client.api.logs(self.container_id, timestamps=True, tail=self.lines.maxlen)
+            lines = backlog.decode('utf-8', errors='ignore').splitlines()
+            self._append(lines)
+            if lines:
+                last_key, _ = parse_log_line(lines[-1])
+            self.primed.set()
+
+            self._stream = self.client.api.logs(
+                self.container_id, stream=True, follow=True, timestamps=True,
+                since=last_key[0] if last_key else None
+            )
+            partial = ''
+            for chunk in self._stream:
+                if self.closed:
+                    break
+                partial += chunk.decode('utf-8', errors='ignore')
+                *complete, partial = partial.split('\n')
+                new_lines = []
+                for line in complete:
+                    key, _ = parse_log_line(line)
+                    # since has second resolution, skip what the backlog already had
+                    if last_key is not None and key is not None and key <= last_key:
+                        continue
+                    new_lines.append(line)
+                if new_lines:
+                    self._append(new_lines)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.closed = True
+            self.primed.set()
+            with self._cond:
+                self._cond.notify_all()
+
+    def tail(self, n):
+        """Get the last n buffered lines"""
+        with self._cond:
+            return [line for _, line in list(self.lines)[-n:]]
+
+    def read_after(self, seq, timeout):
+        """Wait up to timeout for lines newer than seq, returning (lines, latest seq)"""
+        with self._cond:
+            if self.seq <= seq and not self.closed:
+                self._cond.wait(timeout)
+            first = self.lines[0][0] if self.lines else self.seq + 1
+            start = max(seq + 1, first)
+            buffered = list(self.lines)
+            return [line for n, line in buffered[start - first:]], self.seq
+
+class LogHub:
+    """One log follower per container, fanned out to any number of subscribers.
+
+    Followers start on first use and are closed after sitting without subscribers
+    for idle_timeout seconds.
+    """
+
+    def __init__(self, client, capacity=2000, idle_timeout=120):
+        self.client = client
+        self.capacity = capacity
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._followers = {}  # full container id -> LogFollower
+        self._full_ids = {}  # name, short or full id as requested -> full container id
+        self._reaper_started = False
+
+    def _resolve(self, container_id):
+        """Map a container name or (short) id to its full id, so every form shares a follower"""
+        with self._lock:
+            full_id = self._full_ids.get(container_id)
+            follower = self._followers.get(full_id)
+            if follower is not None and not follower.closed:
+                return full_id
+        # Unknown, or its container went away and the name may now belong to a new one
+        full_id = self.client.api.inspect_container(container_id)['Id']
+        with self._lock:
+            self._full_ids[container_id] = full_id
+        return full_id
+
+    def follower(self, container_id):
+        """Get a running follower for a container, starting one if needed"""
+        container_id = self._resolve(container_id)
+        with self._lock:
+            if not self._reaper_started:
+                threading.Thread(target=self._reap_idle, name='log-hub-reaper', daemon=True).start()
+                self._reaper_started = True
+            follower = self._followers.get(container_id)
+            if follower is None or follower.closed:
+                follower = LogFollower(self.client, container_id, self.capacity)
+                self._followers[container_id] = follower
+                follower.start()
+            follower.last_used = time.time()
+        follower.primed.wait(timeout=10)
+        return follower
+
+    def subscribe(self, container_id):
+        follower = self.follower(container_id)
+        with self._lock:
+            follower.subscribers += 1
+        return follower
+
+    def unsubscribe(self, follower):
+        with self._lock:
+            follower.subscribers -= 1
+            follower.last_used = time.time()
+
+    def _reap_idle(self):
+        while True:
+            time.sleep(30)
+            now = time.time()
+            with self._lock:
+                for container_id, follower in list(self._followers.items()):
+                    if follower.closed or (follower.subscribers == 0 and now - follower.last_used > self.idle_timeout):
+                        follower.stop()
+                        del self._followers[container_id]
+                for requested, full_id in list(self._full_ids.items()):
+                    if full_id not in self._followers:
+                        del self._full_ids[requested]
+
+log_hub = LogHub(
+    docker_client,
+    capacity=int(os.getenv('LOG_BUFFER_LINES', '2000')),
+    idle_timeout=int(os.getenv('LOG_FOLLOWER_IDLE_TIMEOUT', '120'))
+)
+
+# zerolog level names in increasing severity; log.sh uses the same names
+LOG_LEVELS = ('trace', 'debug', 'info', 'warn', 'error', 'fatal', 'panic')
+
+def log_level_rank(level):
+    """Severity rank of a level name; unknown or missing levels count as info"""
+    level = str(level or 'info').lower()
+    level = {'warning': 'warn', 'err': 'error'}.get(level, level)
+    return LOG_LEVELS.index(level) if level in LOG_LEVELS else LOG_LEVELS.index('info')
+
+# Record fields that have their own search parameters instead of being matched as text
+LOG_NON_TEXT_FIELDS = ('level', 'time')
+
+def log_record_text(record):
+    """The searchable text of a log record: its message and other field values, one per line"""
+    values = []
+    stack = [value for key, value in record.items() if key not in LOG_NON_TEXT_FIELDS]
+    while stack:
+        value = stack.pop(0)
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif value is not None:
+            values.append(str(value))
+    return '\n'.join(values)
+
+class TrigramBloom:
+    """Bloom filter of the lowercase character trigrams in a segment's record text.
+
+    Every trigram of a searched substring must be in the filter for the segment to
+    possibly contain it, so most segments are skipped without being decompressed.
+    """
+
+    BITS = 1 << 16
+
+    def __init__(self, data=None):
+        self.bits = bytearray(data) if data is not None else bytearray(self.BITS // 8)
+
+    @staticmethod
+    def trigrams(text):
+        text = text.lower()
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def _positions(self, trigram):
+        # Two 16-bit halves of one CRC as the two hash functions
+        h = zlib.crc32(trigram.encode('utf-8', errors='ignore'))
+        return h & 0xFFFF, h >> 16
+
+    def add(self, trigrams):
+        for trigram in trigrams:
+            for pos in self._positions(trigram):
+                self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def may_contain(self, text):
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7))
+            for trigram in self.trigrams(text) for pos in self._positions(trigram)
+        )
+
+class LogArchive:
+    """Per-profile archive of sync container log lines, kept across container removals.
+
+    Lines are appended to <dir>/<profile>/active.jsonl as {"ts": <ns>, "record": ...}.
+    Once the active file reaches segment_bytes or its first line is segment_seconds
+    old, it is gzipped into a segment named after its first timestamp and indexed in
+    SQLite with its time range, per-level counts and a trigram bloom filter. Searches
+    only decompress the segments that can match. Segments beyond max_age_days or
+    max_bytes (compressed, all profiles) are deleted, oldest first. rotate_aged
+    applies the age rules to profiles that stopped logging, e.g. whose container
+    was removed.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS log_segments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            first_ts REAL NOT NULL,
+            last_ts REAL NOT NULL,
+            last_ts_ns INTEGER NOT NULL,
+            lines INTEGER NOT NULL,
+            max_level INTEGER NOT NULL,
+            level_counts TEXT NOT NULL,
+            raw_bytes INTEGER NOT NULL,
+            compressed_bytes INTEGER NOT NULL,
+            trigrams BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_log_segments_profile_time ON log_segments (profile, last_ts);
+        CREATE INDEX IF NOT EXISTS idx_log_segments_time ON log_segments (last_ts);
+    """
+
+    ACTIVE_FILE = 'active.jsonl'
+
+    def __init__(self, filename, directory, segment_bytes=1024 * 1024, segment_seconds=3600,
+                 max_age_days=90, max_bytes=512 * 1024 * 1024):
+        self.filename = filename
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        self._active = {}  # profile -> summary of the active file, see _load_active
+        self._last_rotate_check = 0
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(get_data_path(self.filename), check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def _profile_dir(self, profile):
+        return os.path.join(get_data_path(self.directory), profile)
+
+    def _load_active(self, profile):
+        """Summary of a profile's active file, read from disk on first use (called with the lock held)"""
+        active = self._active.get(profile)
+        if active is not None:
+            return active
+        row = self._connection().execute(
+            'SELECT MAX(last_ts_ns) FROM log_segments WHERE profile = ?', (profile,)).fetchone()
+        active = {'first_ts': None, 'last_ts': row[0] or 0, 'lines': 0, 'bytes': 0, 'levels': collections.Counter()}
+        path = os.path.join(self._profile_dir(profile), self.ACTIVE_FILE)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                for raw in f:
+                    try:
+                        entry = json.loads(raw)
+                    except ValueError:
+                        continue  # Torn last line after a crash
+                    self._count(active, entry, len(raw))
+        self._active[profile] = active
+        return active
+
+    @staticmethod
+    def _count(active, entry, size):
+        if active['first_ts'] is None:
+            active['first_ts'] = entry['ts']
+        active['last_ts'] = max(active['last_ts'], entry['ts'])
+        active['lines'] += 1
+        active['bytes'] += size
+        active['levels'][LOG_LEVELS[log_level_rank(entry['record'].get('level'))]] += 1
+
+    def append(self, profile, entries):
+        """Archive (timestamp key, record) pairs; lines already archived are skipped
+
+        After a restart the status monitor re-reads the tail of each container log,
+        so anything not newer than the last archived line is a duplicate.
+        """
+        with self._lock:
+            active = self._load_active(profile)
+            lines = []
+            for (seconds, nanos), record in entries:
+                ts = seconds * 1_000_000_000 + nanos
+                if ts <= active['last_ts']:
+                    continue
+                entry = {'ts': ts, 'record': record}
+                # Unescaped, so text searches match what was logged
+                line = json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + '\n'
+                lines.append(line)
+                self._count(active, entry, len(line.encode()))
+            if not lines:
+                return
+            os.makedirs(self._profile_dir(profile), exist_ok=True)
+            with open(os.path.join(self._profile_dir(profile), self.ACTIVE_FILE), 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+
+            if active['bytes'] >= self.segment_bytes or self._is_aged(active):
+                self._rotate(profile, active)
+
+    def _is_aged(self, active):
+        return active['lines'] and time.time() - active['first_ts'] / 1e9 >= self.segment_seconds
+
+    def rotate_aged(self, interval=60):
+        """Rotate active files past segment_seconds and prune, at most every interval seconds
+
+        append only rotates when new lines arrive, so without this the last active
+        file of a profile that stopped logging would never be indexed or expire.
+        """
+        if time.time() - self._last_rotate_check < interval:
+            return
+        self._last_rotate_check = time.time()
+        root = get_data_path(self.directory)
+        with self._lock:
+            for profile in os.listdir(root) if os.path.isdir(root) else []:
+                active = self._load_active(profile)
+                if self._is_aged(active):
+                    self._rotate(profile, active)
+            self._prune(self._connection())
+
+    def _rotate(self, profile, active):
+        """Compress the active file into an indexed segment (called with the lock held)"""
+        profile_dir = self._profile_dir(profile)
+        active_path = os.path.join(profile_dir, self.ACTIVE_FILE)
+        with open(active_path, 'rb') as f:
+            data = f.read()
+
+        bloom = TrigramBloom()
+        for number, raw in enumerate(data.splitlines(), 1):
+            try:
+                bloom.add(TrigramBloom.trigrams(log_record_text(json.loads(raw)['record'])))
+            except ValueError:
+                continue
+            if number % 1000 == 0:
+                # Let requests run in between
+                time.sleep(0)
+
+        name = f"{active['first_ts']}.jsonl.gz"
+        segment_path = os.path.join(profile_dir, name)
+        with open(segment_path + '.tmp', 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=6))
+        os.replace(segment_path + '.tmp', segment_path)
+
+        levels = active['levels']
+        conn = self._connection()
+        conn.execute("""
+            INSERT INTO log_segments (profile, filename, first_ts, last_ts, last_ts_ns, lines, max_level,
+                                      level_counts, raw_bytes, compressed_bytes, trigrams)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            profile, name, active['first_ts'] / 1e9, active['last_ts'] / 1e9, active['last_ts'], active['lines'],
+            max(LOG_LEVELS.index(level) for level in levels), json.dumps(dict(levels)),
+            len(data), os.path.getsize(segment_path), bytes(bloom.bits)
+        ))
+        conn.commit()
+        os.remove(active_path)
+        self._active[profile] = {'first_ts': None, 'last_ts': active['last_ts'], 'lines': 0, 'bytes': 0,
+                                 'levels': collections.Counter()}
+        self._prune(conn)
+
+    def _prune(self, conn):
+        """Delete segments past the age or size limit (called with the lock held)"""
+        expired = conn.execute('SELECT id, profile, filename FROM log_segments WHERE last_ts < ?',
+                               (time.time() - self.max_age_days * 86400,)).fetchall()
+        total = conn.execute('SELECT COALESCE(SUM(compressed_bytes), 0) FROM log_segments').fetchone()[0]
+        expired_ids = {row['id'] for row in expired}
+        if total > self.max_bytes:
+            for row in conn.execute('SELECT id, profile, filename, compressed_bytes FROM log_segments ORDER BY last_ts'):
+                if total <= self.max_bytes:
+                    break
+                total -= row['compressed_bytes']
+                if row['id'] not in expired_ids:
+                    expired.append(row)
+                    expired_ids.add(row['id'])
+        for row in expired:
+            try:
+                os.remove(os.path.join(self._profile_dir(row['profile']), row['filename']))
+            except FileNotFoundError:
+                pass
+            conn.execute('DELETE FROM log_segments WHERE id = ?', (row['id'],))
+        conn.commit()
+
+    def _candidates(self, profile, since, until, min_level, text):
+        """Segments that may hold matching lines, newest first, as (profile, path, last_ts)"""
+        clauses, params = ['max_level >= ?'], [min_level]
+        if profile:
+            clauses.append('profile = ?')
+            params.append(profile)
+        if since is not None:
+            clauses.append('last_ts >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('first_ts < ?')
+            params.append(until)
+
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                f"SELECT profile, filename, last_ts, trigrams FROM log_segments WHERE {' AND '.join(clauses)}",
+                params).fetchall()
+            if profile:
+                profiles = [profile]
+            else:
+                root = get_data_path(self.directory)
+                profiles = os.listdir(root) if os.path.isdir(root) else []
+            active = [(name, self._load_active(name)) for name in profiles]
+
+        candidates, skipped = [], 0
+        for row in rows:
+            if text and len(text) >= 3 and not TrigramBloom(row['trigrams']).may_contain(text):
+                skipped += 1
+                continue
+            candidates.append((row['profile'], os.path.join(self._profile_dir(row['profile']), row['filename']),
+                               row['last_ts']))
+        for name, summary in active:
+            if summary['lines'] and (since is None or summary['last_ts'] / 1e9 >= since) and \
+                    (until is None or summary['first_ts'] / 1e9 < until):
+                candidates.append((name, os.path.join(self._profile_dir(name), self.ACTIVE_FILE),
+                                   summary['last_ts'] / 1e9))
+        candidates.sort(key=lambda c: c[2], reverse=True)
+        return candidates, skipped
+
+    def search(self, profile=None, since=None, until=None, level=None, text=None, limit=100):
+        """Matching lines, newest first, and how many segments were read and skipped
+
+        since and until are epoch seconds; level is the minimum level; text is a
+        case-insensitive substring of the message or another field value.
+        """
+        min_level = log_level_rank(level) if level else 0
+        needle = text.lower() if text else None
+        # Text without characters JSON escapes or that could span two values appears
+        # verbatim in the stored line, so lines without it can be skipped unparsed
+        prefilter = needle if needle and not re.search(r'[\s"\\\x00-\x1f]', needle) else None
+        candidates, skipped = self._candidates(profile, since, until, min_level, text)
+
+        matches = []
+        read = 0
+        for segment_profile, path, last_ts in candidates:
+            # Once the limit is reached, older segments can't add anything newer
+            if len(matches) >= limit and last_ts < matches[limit - 1]['ts']:
+                break
+            opener = gzip.open if path.endswith('.gz') else open
+            try:
+                with opener(path, 'rt', encoding='utf-8', errors='ignore') as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                continue  # Pruned or rotated since the index was read
+            read += 1
+            for raw in lines:
+                if prefilter and prefilter not in raw.lower():
+                    continue
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    continue
+                ts = entry['ts'] / 1e9
+                record = entry['record']
+                if needle and needle not in log_record_text(record).lower():
+                    continue
+                if (since is not None and ts < since) or (until is not None and ts >= until):
+                    continue
+                if log_level_rank(record.get('level')) < min_level:
+                    continue
+                matches.append({
+                    'profile': segment_profile,
+                    'ts': ts,
+                    'level': LOG_LEVELS[log_level_rank(record.get('level'))],
+                    'message': record.get('message', ''),
+                    'record': record
+                })
+            matches.sort(key=lambda m: m['ts'], reverse=True)
+
+        return {
+            'lines': matches[:limit],
+            'truncated': len(matches) > limit,
+            'segments_read': read,
+            'segments_skipped': skipped
+        }
+
+log_archive = LogArchive(
+    'logs.db', 'logs',
+    segment_bytes=int(os.getenv('LOG_ARCHIVE_SEGMENT_KB', '1024')) * 1024,
+    segment_seconds=int(os.getenv('LOG_ARCHIVE_SEGMENT_SECONDS', '3600')),
+    max_age_days=int(os.getenv('LOG_ARCHIVE_DAYS', '90')),
+    max_bytes=int(os.getenv('LOG_ARCHIVE_MAX_MB', '512')) * 1024 * 1024
+)
+
+@app.route('/api/logs/search')
+def api_logs_search():
+    """Search the archived log lines of all profiles
+
+    Query parameters: profile, since and until (epoch seconds), level (minimum
+    level), q (case-insensitive text) and limit. Results are newest first; pass
+    the oldest returned ts as until to get the next page.
+    """
+    level = request.args.get('level')
+    if level and str(level).lower() not in LOG_LEVELS + ('warning', 'err'):
+        return jsonify({'error': f'Invalid level {level}'}), 400
+    limit = min(max(request.args.get('limit', default=100, type=int), 1), 1000)
+
+    try:
+        return jsonify(log_archive.search(
+            profile=request.args.get('profile') or None,
+            since=request.args.get('since', type=float),
+            until=request.args.get('until', type=float),
+            level=level,
+            text=request.args.get('q') or None,
+            limit=limit
+        ))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/container/<container_id>/logs')
 def api_logs(container_id):
     """Get container logs (last 30 lines)"""
     try:
-        container = docker_client.containers.get(container_id)
-        logs = container.logs(tail=30, timestamps=True).decode('utf-8')
-        return jsonify({'logs': logs})
+        follower = log_hub.follower(container_id)
+        if follower.error and not follower.lines:
+            return jsonify({'error': follower.error}), 404
+        return jsonify({'logs': '\n'.join(follower.tail(30))})
     except Exception as e:
         return jsonify({'error': str(e)}), 404
 
 @app.route('/api/container/<container_id>/logs/stream')
 def stream_logs(container_id):
-    """Stream container logs in real-time"""
+    """Stream container logs in real-time, starting with the recent backlog"""
+    backlog = request.args.get('backlog', default=200, type=int)
+
     def generate():
         try:
-            container = docker_client.containers.get(container_id)
-            for log in container.logs(stream=True, follow=True, timestamps=True):
-                yield f"data: {log.decode('utf-8')}\n\n"
+            follower = log_hub.subscribe(container_id)
         except Exception as e:
             yield f"data: Error: {str(e)}\n\n"
-
-    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+            return
+        try:
+            lines = follower.tail(backlog)
+            seq = follower.seq
+            while True:
+                if lines:
+                    # One event per batch, one data field per line
+                    yield ''.join(f"data: {line}\n" for line in lines) + "\n"
+                else:
+                    yield ": keepalive\n\n"
+                if follower.closed:
+                    # The container stopped; stay connected so the browser does not
+                    # reconnect and replay the backlog
+                    if follower.error:
+                        yield f"data: Error: {follower.error}\n\n"
+                    while True:
+                        time.sleep(15)
+                        yield ": keepalive\n\n"
+                # Short pause so bursts are sent as one batch
+                time.sleep(0.25)
+                lines, seq = follower.read_after(seq, timeout=15)
+        finally:
+            log_hub.unsubscribe(follower)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/container/<container_id>/start', methods=['POST'])
 def start_container(container_id):
@@ -186,6 +3066,7 @@ def start_container(container_id):
     try:
         container = docker_client.containers.get(container_id)
         container.start()
+        container_cache.refresh_container(container.id)
         return jsonify({'status': 'started'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -196,6 +3077,7 @@ def stop_container(container_id):
     try:
         container = docker_client.containers.get(container_id)
         container.stop()
+        container_cache.refresh_container(container.id)
         return jsonify({'status': 'stopped'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -206,16 +3088,215 @@ def restart_container(container_id):
     try:
         container = docker_client.containers.get(container_id)
         container.restart()
+        container_cache.refresh_container(container.id)
         return jsonify({'status': 'restarted'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Columns of a resource sample; rates are averaged over the sample interval
+RESOURCE_FIELDS = (
+    'timestamp', 'cpu_percent', 'memory_bytes',
+    'net_rx_bytes_per_second', 'net_tx_bytes_per_second',
+    'block_read_bytes_per_second', 'block_write_bytes_per_second', 'pids'
+)
+
+def parse_stats_counters(stats):
+    """Reduce one Docker stats document to its cumulative counters and current gauges"""
+    cpu = stats.get('cpu_stats') or {}
+    cpu_usage = cpu.get('cpu_usage') or {}
+    memory = stats.get('memory_stats') or {}
+    memory_detail = memory.get('stats') or {}
+    # Like `docker stats`, leave out reclaimable page cache (cgroup v2 key, then v1)
+    cache = memory_detail.get('inactive_file', memory_detail.get('total_inactive_file', 0))
+    networks = list((stats.get('networks') or {}).values())
+    blkio = (stats.get('blkio_stats') or {}).get('io_service_bytes_recursive') or []
+    return {
+        'cpu_total': cpu_usage.get('total_usage', 0),
+        'cpu_system': cpu.get('system_cpu_usage', 0),
+        'online_cpus': cpu.get('online_cpus') or len(cpu_usage.get('percpu_usage') or []) or 1,
+        'memory': max(0, memory.get('usage', 0) - cache),
+        'memory_limit': memory.get('limit', 0),
+        'net_rx': sum(n.get('rx_bytes', 0) for n in networks),
+        'net_tx': sum(n.get('tx_bytes', 0) for n in networks),
+        'block_read': sum(e.get('value', 0) for e in blkio if str(e.get('op', '')).lower() == 'read'),
+        'block_write': sum(e.get('value', 0) for e in blkio if str(e.get('op', '')).lower() == 'write'),
+        'pids': (stats.get('pids_stats') or {}).get('current', 0)
+    }
+
+class ResourceStream:
+    """Follows one container's Docker stats stream into a ring buffer of samples.
+
+    Docker sends a stats document every second; one sample is kept per interval,
+    computed from the cumulative counters so nothing between samples is lost.
+    """
+
+    def __init__(self, client, container_id, interval, capacity):
+        self.client = client
+        self.container_id = container_id
+        self.interval = interval
+        self.samples = collections.deque(maxlen=capacity)  # tuples in RESOURCE_FIELDS order
+        self.memory_limit = 0
+        self.active = False
+        self.error = None
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._last = None  # (time, counters) of the last kept sample
+
+    def start(self):
+        """Start following the stats stream, e.g. after the container (re)started"""
+        with self._lock:
+            self._generation += 1
+            self._last = None
+            self.active = True
+            self.error = None
+            generation = self._generation
+        threading.Thread(target=self._run, args=(generation,), name=f'resource-stream-{self.container_id}', daemon=True).start()
+
+    def stop(self):
+        """Stop following; the thread exits when the next stats document arrives"""
+        with self._lock:
+            self._generation += 1
+            self.active = False
+
+    def _run(self, generation):
+        try:
+            for stats in self.client.api.stats(self.container_id, stream=True, decode=True):
+                if generation != self._generation:
+                    return
+                self._add(time.time(), parse_stats_counters(stats))
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            with self._lock:
+                if generation == self._generation:
+                    self.active = False
+
+    def _add(self, now, counters):
+        if self._last is None:
+            self._last = (now, counters)
+            return
+        last_time, last = self._last
+        elapsed = now - last_time
+        if elapsed < self.interval:
+            return
+
+        system = counters['cpu_system'] - last['cpu_system']
+        cpu = (counters['cpu_total'] - last['cpu_total']) / system * counters['online_cpus'] * 100 if system > 0 else 0.0
+
+        def rate(key):
+            # Counters restart from zero with the container
+            return round(max(0, counters[key] - last[key]) / elapsed)
+
+        sample = (
+            round(now, 3), round(max(0.0, cpu), 1), counters['memory'],
+            rate('net_rx'), rate('net_tx'), rate('block_read'), rate('block_write'), counters['pids']
+        )
+        with self._lock:
+            self.samples.append(sample)
+            self.memory_limit = counters['memory_limit']
+        self._last = (now, counters)
+
+    def latest(self):
+        """Get the newest sample as a dict, or None"""
+        with self._lock:
+            return dict(zip(RESOURCE_FIELDS, self.samples[-1])) if self.samples else None
+
+    def to_dict(self, since=None, points=None):
+        """Get the buffered samples as one list per field, optionally after since and averaged down to points"""
+        with self._lock:
+            samples = list(self.samples)
+            memory_limit = self.memory_limit
+        if since is not None:
+            samples = [s for s in samples if s[0] > since]
+        if points and len(samples) > points:
+            size = -(-len(samples) // points)
+            buckets = [samples[i:i + size] for i in range(0, len(samples), size)]
+            samples = [
+                (bucket[-1][0],) + tuple(round(sum(col) / len(bucket), 1 if i == 0 else None) for i, col in enumerate(list(zip(*bucket))[1:]))
+                for bucket in buckets
+            ]
+        return {
+            'interval': self.interval,
+            'streaming': self.active,
+            'error': self.error,
+            'memory_limit': memory_limit,
+            'latest': dict(zip(RESOURCE_FIELDS, samples[-1])) if samples else None,
+            'series': {field: [s[i] for s in samples] for i, field in enumerate(RESOURCE_FIELDS)}
+        }
+
+class ContainerResourceSampler:
+    """Keeps a resource time series per sync container, fed by the Docker stats streams.
+
+    A one-shot stats call makes Docker wait for two CPU readings, which would add a
+    second or two per container to every dashboard poll. Instead each running
+    container's stream is followed in the background and handlers read the buffers.
+    History survives container restarts and is dropped when the container is removed.
+    """
+
+    def __init__(self, client, interval=5, capacity=720, check_interval=10):
+        self.client = client
+        self.interval = interval
+        self.capacity = capacity
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._streams = {}  # short container id -> ResourceStream
+
+    def start(self):
+        """Start the thread that matches streams to the running containers"""
+        threading.Thread(target=self._supervise_loop, name='resource-sampler', daemon=True).start()
+
+    def stream(self, container_id):
+        """Get the stream of a container, or None if it was never sampled"""
+        with self._lock:
+            return self._streams.get(container_id[:12])
+
+    def sync_streams(self, records):
+        """Follow every running container and stop following the others"""
+        running = {r['id'] for r in records if r['status'] == 'running'}
+        known = {r['id'] for r in records}
+        with self._lock:
+            for container_id in running:
+                stream = self._streams.get(container_id)
+                if stream is None:
+                    stream = self._streams[container_id] = ResourceStream(self.client, container_id, self.interval, self.capacity)
+                if not stream.active:
+                    stream.start()
+            for container_id, stream in list(self._streams.items()):
+                if container_id not in running and stream.active:
+                    stream.stop()
+                if container_id not in known:
+                    del self._streams[container_id]
+
+    def _supervise_loop(self):
+        while True:
+            try:
+                self.sync_streams(container_cache.snapshot())
+            except Exception as e:
+                print(f"Warning: Could not update resource sampling: {e}")
+            time.sleep(self.check_interval)
+
+resource_sampler = ContainerResourceSampler(
+    docker_client,
+    interval=int(os.getenv('RESOURCE_SAMPLE_INTERVAL', '5')),
+    capacity=int(os.getenv('RESOURCE_HISTORY_SAMPLES', '720'))
+)
+
+@app.route('/api/container/<container_id>/resources')
+def api_container_resources(container_id):
+    """Get the sampled CPU, memory, network and block I/O of a container"""
+    stream = resource_sampler.stream(container_id)
+    if stream is None:
+        return jsonify({'error': f'No resource samples for container {container_id}'}), 404
+    since = request.args.get('since', type=float)
+    points = request.args.get('points', type=int)
+    return jsonify({'container_id': container_id[:12], **stream.to_dict(since, points)})
+
 @app.route('/api/stats')
 def api_stats():
     """Get overall stats"""
-    containers = get_sync_containers()
-    total = len(containers)
-    running = sum(1 for c in containers if c.status == 'running')
+    records = container_cache.snapshot()
+    total = len(records)
+    running = sum(1 for r in records if r['status'] == 'running')
     stopped = total - running
 
     return jsonify({
@@ -224,22 +3305,19 @@ def api_stats():
         'stopped': stopped
     })
 
-@app.route('/api/available-profiles')
-def api_available_profiles():
+def get_available_profiles():
     """Get profiles that exist but don't have running containers"""
-    import os
     import glob
 
     # Find all profile directories in /workspace/profiles/
-    profile_dirs = glob.glob('/workspace/profiles/*')
+    profile_dirs = glob.glob(f'{WORKSPACE_DIR}/profiles/*')
     available_profiles = []
 
     # Get running container names
-    containers = get_sync_containers()
     running_profiles = set()
-    for c in containers:
+    for record in container_cache.snapshot():
         # Extract profile name from container name (e.g., "gphotos-sync-family" -> "family")
-        profile_name = c.name.replace(get_container_prefix() + '-', '', 1)
+        profile_name = record['name'].replace(get_container_prefix() + '-', '', 1)
         running_profiles.add(profile_name)
 
     # Check each profile directory
@@ -250,7 +3328,7 @@ def api_available_profiles():
         if profile_name in running_profiles:
             continue
 
-        compose_file = f'/workspace/docker-compose.{profile_name}.yml'
+        compose_file = f'{WORKSPACE_DIR}/docker-compose.{profile_name}.yml'
         has_compose = os.path.exists(compose_file)
 
         # Get metadata for display name
@@ -263,10 +3341,132 @@ def api_available_profiles():
             'display_name': display_name,
             'path': profile_path,
             'has_compose': has_compose,
-            'compose_file': f'docker-compose.{profile_name}.yml'
+            'compose_file': f'docker-compose.{profile_name}.yml',
+            'authenticated': profile_has_cookies(profile_name)
         })
 
-    return jsonify(sorted(available_profiles, key=lambda x: x['display_name']))
+    return sorted(available_profiles, key=lambda x: x['display_name'])
+
+@app.route('/api/available-profiles')
+def api_available_profiles():
+    """Get profiles that exist but don't have running containers"""
+    return jsonify(get_available_profiles())
+
+def build_dashboard_state():
+    """Build every record the dashboard shows, keyed by (event type, record key)"""
+    records = [add_disk_usage(add_sync_status(add_schedule_info(r))) for r in container_cache.snapshot()]
+    running = sum(1 for r in records if r['status'] == 'running')
+
+    state = {('stats', 'stats'): {'total': len(records), 'running': running, 'stopped': len(records) - running}}
+    for record in records:
+        state[('container', record['id'])] = record
+    for profile in get_available_profiles():
+        state[('profile', profile['name'])] = profile
+    return state
+
+class DashboardEvents:
+    """Pushes changed dashboard records to server-sent-event subscribers.
+
+    Producers call notify() when something may have changed; a single publisher
+    thread rebuilds the dashboard state from memory, diffs it against what was last
+    sent and fans out only the changed records. Nothing is rebuilt while nobody is
+    subscribed.
+    """
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._changed = threading.Event()
+        self._last_state = {}
+
+    def start(self):
+        """Start the publisher thread"""
+        threading.Thread(target=self._publish_loop, name='dashboard-events', daemon=True).start()
+
+    def notify(self):
+        """Signal that dashboard data may have changed"""
+        self._changed.set()
+
+    def subscribe(self):
+        """Register a subscriber and queue a full snapshot for it"""
+        subscriber = queue.Queue(maxsize=1000)
+        with self._lock:
+            self._publish_changes(build_dashboard_state())
+            subscriber.put(('snapshot', self._snapshot_payload()))
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _snapshot_payload(self):
+        snapshot = {'containers': [], 'profiles': [], 'stats': {}}
+        for (kind, _), record in self._last_state.items():
+            if kind == 'container':
+                snapshot['containers'].append(record)
+            elif kind == 'profile':
+                snapshot['profiles'].append(record)
+            else:
+                snapshot['stats'] = record
+        return snapshot
+
+    def _publish_changes(self, state):
+        """Diff state against the last published state and send the differences"""
+        events = []
+        for key, record in state.items():
+            if self._last_state.get(key) != record:
+                events.append((key[0], record))
+        for key in self._last_state.keys() - state.keys():
+            events.append((f'{key[0]}-removed', {'id': key[1]}))
+        self._last_state = state
+
+        for subscriber in list(self._subscribers):
+            for event in events:
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    # Slow client, it will resync from a snapshot when it reconnects
+                    self._subscribers.discard(subscriber)
+                    break
+
+    def _publish_loop(self):
+        while True:
+            # Schedule fields (time until next run) drift even without events
+            self._changed.wait(timeout=self.refresh_interval)
+            self._changed.clear()
+            with self._lock:
+                if not self._subscribers:
+                    self._last_state = {}
+                    continue
+                try:
+                    self._publish_changes(build_dashboard_state())
+                except Exception as e:
+                    print(f"Warning: Could not publish dashboard changes: {e}")
+
+dashboard_events = DashboardEvents(refresh_interval=int(os.getenv('DASHBOARD_REFRESH_INTERVAL', '30')))
+
+@app.route('/api/events')
+def api_events():
+    """Server-sent events stream of dashboard changes"""
+    subscriber = dashboard_events.subscribe()
+
+    def generate():
+        try:
+            while True:
+                try:
+                    event, data = subscriber.get(timeout=15)
+                except queue.Empty:
+                    # Keep proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            dashboard_events.unsubscribe(subscriber)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 def get_host_workspace_path():
     """Get the real host path that is mounted as /workspace in this container"""
@@ -279,7 +3479,7 @@ def get_host_workspace_path():
     except:
         pass
     # Fallback to /workspace if we can't determine (for local dev)
-    return '/workspace'
+    return WORKSPACE_DIR
 
 @app.route('/api/create-compose/<profile_name>', methods=['POST'])
 def create_compose(profile_name):
@@ -299,6 +3499,14 @@ def create_compose(profile_name):
     run_on_startup = config.get('run_on_startup', True)
     loglevel = config.get('loglevel', 'info')
     worker_count = config.get('worker_count', 6)
+    worker_mode = config.get('worker_mode', 'fixed')
+    try:
+        worker_count = int(worker_count)
+        worker_min = int(config.get('worker_min', 1) or 1)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid worker_count or worker_min'}), 400
+    if worker_mode == 'adaptive' and not 1 <= worker_min <= worker_count:
+        return jsonify({'error': 'worker_min must be between 1 and worker_count'}), 400
     albums = config.get('albums', '')
     timezone = config.get('timezone', 'Europe/Rome')
     puid = config.get('puid', 1000)
@@ -308,6 +3516,23 @@ def create_compose(profile_name):
     # Advanced options
     restart_schedule = config.get('restart_schedule', '')
     healthcheck_url = config.get('healthcheck_url', '')
+    try:
+        sync_priority = int(config.get('sync_priority') or 0)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid sync_priority'}), 400
+    sync_mode = config.get('sync_mode', 'full')
+    try:
+        full_rescan_days = int(config.get('full_rescan_days', 7) or 0)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid full_rescan_days'}), 400
+    if full_rescan_days < 0:
+        return jsonify({'error': 'full_rescan_days cannot be negative'}), 400
+    try:
+        disk_quota_gb = float(config.get('disk_quota_gb') or 0)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid disk_quota_gb'}), 400
+    if not 0 <= disk_quota_gb < float('inf'):
+        return jsonify({'error': 'disk_quota_gb must be a positive number, or 0 for no quota'}), 400
 
     # Build environment section
     env_vars = [
@@ -315,7 +3540,8 @@ def create_compose(profile_name):
         f'      - PGID={pgid}',
         f'      - LOGLEVEL={loglevel}',
         f'      - TZ={timezone}',
-        f'      - WORKER_COUNT={worker_count}'
+        f'      - WORKER_COUNT={worker_count}',
+        f'      - PROFILE_NAME={profile_name}'
     ]
 
     # Only add cron-related env vars if cron is enabled
@@ -327,6 +3553,20 @@ def create_compose(profile_name):
     if albums and albums.strip() and albums.strip().upper() != 'ALL':
         env_vars.append(f'      - ALBUMS={albums.strip()}')
 
+    # Add sync slot priority if not the default
+    if sync_priority:
+        env_vars.append(f'      - SYNC_PRIORITY={sync_priority}')
+
+    # Incremental syncs with a periodic full rescan
+    if sync_mode == 'incremental':
+        env_vars.append('      - SYNC_MODE=incremental')
+        env_vars.append(f'      - FULL_RESCAN_DAYS={full_rescan_days}')
+
+    # Adaptive workers tune the count during each sync, with WORKER_COUNT as the upper bound
+    if worker_mode == 'adaptive':
+        env_vars.append('      - WORKER_MODE=adaptive')
+        env_vars.append(f'      - WORKER_MIN={worker_min}')
+
     # Add restart schedule if specified
     if restart_schedule and restart_schedule.strip():
         env_vars.append(f'      - RESTART_SCHEDULE={restart_schedule.strip()}')
@@ -380,14 +3620,14 @@ networks:
     external: true
 """
 
-    compose_file = f'/workspace/docker-compose.{profile_name}.yml'
+    compose_file = f'{WORKSPACE_DIR}/docker-compose.{profile_name}.yml'
 
     try:
         with open(compose_file, 'w') as f:
             f.write(compose_content)
 
         # Save photo_dir in profile metadata for later retrieval
-        metadata_file = f'/workspace/profiles/{profile_name}/.profile_metadata.json'
+        metadata_file = f'{WORKSPACE_DIR}/profiles/{profile_name}/.profile_metadata.json'
         try:
             if os.path.exists(metadata_file):
                 with open(metadata_file, 'r') as f:
@@ -397,6 +3637,8 @@ networks:
 
             # Update metadata with photo_dir
             metadata['photo_dir'] = photo_dir if photo_dir and photo_dir.strip() else ''
+            # Disk usage above this raises a warning on the dashboard (0 = no quota)
+            metadata['disk_quota_gb'] = disk_quota_gb
 
             with open(metadata_file, 'w') as f:
                 json.dump(metadata, f, indent=2)
@@ -404,6 +3646,8 @@ networks:
             # Don't fail if metadata update fails, just log it
             print(f"Warning: Could not update metadata: {meta_error}")
 
+        dashboard_events.notify()
+
         return jsonify({
             'status': 'created',
             'file': f'docker-compose.{profile_name}.yml',
@@ -416,16 +3660,14 @@ networks:
 @app.route('/api/check-auth/<profile_name>', methods=['GET'])
 def check_auth(profile_name):
     """Check if profile has authentication cookies"""
-    cookies_file = f'/workspace/profiles/{profile_name}/Default/Cookies'
-    has_cookies = os.path.exists(cookies_file) and os.path.getsize(cookies_file) > 0
-    return jsonify({'authenticated': has_cookies})
+    return jsonify({'authenticated': profile_has_cookies(profile_name)})
 
 @app.route('/api/get-config/<profile_name>', methods=['GET'])
 def get_config(profile_name):
     """Get current configuration from docker-compose file"""
     import yaml
 
-    compose_file = f'/workspace/docker-compose.{profile_name}.yml'
+    compose_file = f'{WORKSPACE_DIR}/docker-compose.{profile_name}.yml'
 
     if not os.path.exists(compose_file):
         return jsonify({'error': 'Docker compose file not found'}), 404
@@ -449,12 +3691,17 @@ def get_config(profile_name):
             'run_on_startup': True,
             'loglevel': 'info',
             'worker_count': 6,
+            'worker_mode': 'fixed',
+            'worker_min': 1,
             'albums': '',
             'timezone': 'Europe/Rome',
             'puid': 1000,
             'pgid': 1000,
             'restart_schedule': '',
-            'healthcheck_url': ''
+            'healthcheck_url': '',
+            'sync_priority': 0,
+            'sync_mode': 'full',
+            'full_rescan_days': 7
         }
 
         # Track healthcheck components
@@ -475,6 +3722,10 @@ def get_config(profile_name):
                     config['loglevel'] = val
                 elif key == 'WORKER_COUNT':
                     config['worker_count'] = int(val)
+                elif key == 'WORKER_MODE':
+                    config['worker_mode'] = val
+                elif key == 'WORKER_MIN':
+                    config['worker_min'] = int(val)
                 elif key == 'ALBUMS':
                     config['albums'] = val
                 elif key == 'TZ':
@@ -485,11 +3736,22 @@ def get_config(profile_name):
                     config['pgid'] = int(val)
                 elif key == 'RESTART_SCHEDULE':
                     config['restart_schedule'] = val
+                elif key == 'SYNC_PRIORITY':
+                    config['sync_priority'] = int(val)
+                elif key == 'SYNC_MODE':
+                    config['sync_mode'] = val
+                elif key == 'FULL_RESCAN_DAYS':
+                    config['full_rescan_days'] = int(val)
                 elif key == 'HEALTHCHECK_HOST':
                     healthcheck_host = val
                 elif key == 'HEALTHCHECK_ID':
                     healthcheck_id = val
 
+        # Worker count found best by adaptive syncs, shown as a recommendation
+        metadata = get_profile_metadata(profile_name)
+        config['worker_tuning'] = metadata.get('worker_tuning')
+        config['disk_quota_gb'] = metadata.get('disk_quota_gb', 0)
+
         # Reconstruct full healthcheck URL if both parts are present
         if healthcheck_host and healthcheck_id:
             config['healthcheck_url'] = f"{healthcheck_host}/{healthcheck_id}"
@@ -512,45 +3774,340 @@ def get_config(profile_name):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/start-profile/<profile_name>', methods=['POST'])
-def start_profile(profile_name):
-    """Start a profile container using docker-compose"""
-    import subprocess
+class ComposeEngine:
+    """Brings up the compose files this app writes, through the Docker API
+
+    Only the subset of the compose format used by create_compose and
+    auth/docker-compose.yml is understood: image or build, container_name,
+    command, restart, privileged, ports, volumes, environment and networks,
+    with ${VAR} / ${VAR:-default} interpolation. Containers get the same
+    names and com.docker.compose.* labels the compose CLI would give them,
+    so both tools can manage them interchangeably.
+    """
+
+    VARIABLE_RE = re.compile(r'\$\{(\w+)(?::?-([^}]*))?\}|\$(\w+)')
+    CONFIG_HASH_LABEL = 'com.docker.compose.config-hash'
+
+    def __init__(self, client):
+        self.client = client
+
+    def load(self, compose_file, env=None):
+        """Parse a compose file, substituting variables from env"""
+        import yaml
+
+        env = os.environ if env is None else env
+        with open(compose_file) as f:
+            text = f.read()
+        text = self.VARIABLE_RE.sub(
+            lambda m: env.get(m.group(1) or m.group(3)) or (m.group(2) or ''), text)
+        return yaml.safe_load(text) or {}
+
+    def up(self, compose_file, host_dir=None, env=None, force_recreate=False):
+        """Create and start every service; returns the container names
+
+        Containers whose configuration is unchanged are started in place,
+        like `docker compose up -d`. host_dir is the compose file's directory
+        as the Docker daemon sees it, used to resolve relative bind mounts.
+        """
+        env = os.environ if env is None else env
+        spec = self.load(compose_file, env)
+        project_dir = os.path.dirname(os.path.abspath(compose_file))
+        project = os.path.basename(project_dir)
+        networks = self._ensure_networks(project, spec.get('networks') or {})
+
+        names = []
+        for service, config in (spec.get('services') or {}).items():
+            names.append(self._up_service(project, project_dir, host_dir or project_dir,
+                                          service, config, networks, env, force_recreate))
+        return names
+
+    def down(self, compose_file, env=None):
+        """Stop and remove the project's containers and its default network"""
+        spec = self.load(compose_file, env)
+        project = os.path.basename(os.path.dirname(os.path.abspath(compose_file)))
+        removed = []
+        for container in self.client.containers.list(
+                all=True, filters={'label': f'com.docker.compose.project={project}'}):
+            if container.labels.get('com.docker.compose.service') not in (spec.get('services') or {}):
+                continue
+            container.stop(timeout=10)
+            container.remove()
+            removed.append(container.name)
+        if not spec.get('networks'):
+            for network in self.client.networks.list(names=[f'{project}_default']):
+                if network.name != f'{project}_default':
+                    continue
+                try:
+                    network.remove()
+                except docker.errors.APIError:
+                    pass  # Still used by a container outside this file
+        return removed
+
+    def _ensure_networks(self, project, networks):
+        """Map compose network keys to Docker network names, creating them if needed"""
+        if not networks:
+            networks = {'default': {}}
+        names = {}
+        for key, config in networks.items():
+            config = config or {}
+            name = config.get('name') or (key if config.get('external') else f'{project}_{key}')
+            if not any(network.name == name for network in self.client.networks.list(names=[name])):
+                if config.get('external'):
+                    raise RuntimeError(f'External network {name} not found')
+                self.client.networks.create(name, driver=config.get('driver', 'bridge'), labels={
+                    'com.docker.compose.project': project,
+                    'com.docker.compose.network': key
+                })
+            names[key] = name
+        return names
+
+    def _image(self, project, project_dir, service, config):
+        """Resolve the service's image and its ID, building or pulling it when missing"""
+        build = config.get('build')
+        image = config.get('image') or (f'{project}-{service}' if build else None)
+        try:
+            resolved = self.client.images.get(image)
+        except docker.errors.ImageNotFound:
+            if build:
+                context = build if isinstance(build, str) else build.get('context', '.')
+                resolved, _ = self.client.images.build(
+                    path=os.path.normpath(os.path.join(project_dir, context)), tag=image, rm=True)
+            else:
+                resolved = self.client.images.pull(image)
+        return image, resolved.id
+
+    def _run_options(self, project, host_dir, service, config, networks, env):
+        """Translate a service definition into containers.create() arguments"""
+        environment = {}
+        raw_env = config.get('environment') or {}
+        items = raw_env.items() if isinstance(raw_env, dict) else (
+            entry.split('=', 1) if '=' in entry else (entry, None) for entry in raw_env)
+        for key, value in items:
+            # A bare name passes the variable through from our environment
+            value = env.get(key) if value is None else value
+            if value is not None:
+                environment[key] = str(value)
+
+        volumes = []
+        for entry in config.get('volumes') or []:
+            source, _, target = str(entry).partition(':')
+            if source.startswith('.'):
+                source = os.path.normpath(os.path.join(host_dir, source))
+            volumes.append(f'{source}:{target}')
+
+        ports = {}
+        for entry in config.get('ports') or []:
+            # [[ip:]host:]container[/proto]; the ip may be a bracketed IPv6 address
+            binding, _, container_port = str(entry).rpartition(':')
+            host_ip, _, host_port = binding.rpartition(':')
+            host_ip = host_ip.strip('[]')
+            if '/' not in container_port:
+                container_port += '/tcp'
+            host_port = int(host_port) if host_port.isdigit() else (host_port or None)
+            if host_ip:
+                ports[container_port] = (host_ip, host_port) if host_port else (host_ip,)
+            else:
+                ports[container_port] = host_port
+
+        # YAML reads a bare `no` as False, so normalize before naming the policy
+        restart = config.get('restart')
+        restart = 'no' if restart in (None, False) else str(restart).strip().lower()
+        restart_name, _, retries = restart.partition(':')
+        restart_policy = None
+        if restart_name != 'no':
+            restart_policy = {'Name': restart_name}
+            if retries.isdigit():
+                restart_policy['MaximumRetryCount'] = int(retries)
+
+        # Like compose, every network the service joins gets the service name as an alias
+        service_networks = config.get('networks') or ['default']
+        if not isinstance(service_networks, dict):
+            service_networks = {key: None for key in service_networks}
+        endpoints = {}
+        for key, network_config in service_networks.items():
+            aliases = [service] + list((network_config or {}).get('aliases') or [])
+            endpoints[networks[key]] = aliases
+
+        return {
+            'name': config.get('container_name') or f'{project}-{service}-1',
+            'command': config.get('command'),
+            'environment': environment,
+            'volumes': volumes,
+            'ports': ports,
+            'privileged': bool(config.get('privileged', False)),
+            'restart_policy': restart_policy,
+            'networks': endpoints,
+            'labels': {
+                'com.docker.compose.project': project,
+                'com.docker.compose.service': service,
+                'com.docker.compose.container-number': '1',
+                'com.docker.compose.oneoff': 'False'
+            }
+        }
 
-    compose_file = f'/workspace/docker-compose.{profile_name}.yml'
+    def _up_service(self, project, project_dir, host_dir, service, config, networks, env, force_recreate):
+        import hashlib
+
+        image, image_id = self._image(project, project_dir, service, config)
+        options = self._run_options(project, host_dir, service, config, networks, env)
+        # The image ID makes a rebuilt or re-pulled tag recreate the container
+        config_hash = hashlib.sha256(json.dumps([image, image_id, options], sort_keys=True).encode()).hexdigest()
+        options['labels'][self.CONFIG_HASH_LABEL] = config_hash
+
+        try:
+            existing = self.client.containers.get(options['name'])
+            if not force_recreate and existing.labels.get(self.CONFIG_HASH_LABEL) == config_hash:
+                if existing.status != 'running':
+                    existing.start()
+                return options['name']
+            existing.remove(force=True)
+        except docker.errors.NotFound:
+            pass
+
+        # create() attaches one network; the rest are connected before start
+        endpoints = list(options.pop('networks').items())
+        network, aliases = endpoints[0]
+        container = self.client.containers.create(
+            image, detach=True, network=network,
+            networking_config={network: self.client.api.create_endpoint_config(aliases=aliases)},
+            **options)
+        for network, aliases in endpoints[1:]:
+            self.client.networks.get(network).connect(container, aliases=aliases)
+        container.start()
+        return options['name']
+
+compose_engine = ComposeEngine(docker_client)
+
+class JobManager:
+    """Runs slow profile operations on a bounded thread pool
+
+    Each job wraps a function returning (payload, http_status), the same
+    shape the synchronous routes used to return. Finished jobs are kept
+    for a while so clients can fetch the result from /api/jobs/<id>.
+
+    lanes maps a lane name to its own executor width. Jobs submitted to a
+    lane queue there instead of on the shared pool, so a width-1 lane runs
+    its jobs one at a time and long scans never starve quick operations.
+    """
+
+    def __init__(self, max_workers=4, keep_finished=200, lanes=None):
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._lanes = {name: ThreadPoolExecutor(max_workers=width, thread_name_prefix=f'job-{name}')
+                       for name, width in (lanes or {}).items()}
+        self._lock = threading.Lock()
+        self._jobs = collections.OrderedDict()
+
+    def submit(self, kind, target, fn, *args, lane=None):
+        """Queue fn(*args) on the shared pool, or on lane, and return the new job record"""
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'kind': kind,
+            'target': target,
+            'status': 'queued',
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'http_status': None,
+            'result': None
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+            self._prune()
+        executor = self._lanes[lane] if lane else self._executor
+        executor.submit(self._run, job, fn, args)
+        return dict(job)
+
+    def _run(self, job, fn, args):
+        self._update(job, status='running', started_at=time.time())
+        try:
+            payload, status = fn(*args)
+        except Exception as e:
+            payload, status = {'error': str(e)}, 500
+        self._update(job, status='succeeded' if status < 400 else 'failed',
+                     finished_at=time.time(), http_status=status, result=payload)
+        dashboard_events.notify()
+
+    def _update(self, job, **fields):
+        with self._lock:
+            job.update(fields)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job['finished_at']]
+        for job_id in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self):
+        with self._lock:
+            return [dict(job) for job in reversed(self._jobs.values())]
+
+# One auth container and one .removed pass at a time; scans are long and get their own threads
+jobs = JobManager(max_workers=int(os.getenv('JOB_WORKERS', '4')),
+                  lanes={'auth': 1, 'removed': 1, 'scan': int(os.getenv('SCAN_WORKERS', '2'))})
+
+def job_response(job):
+    """202 response pointing the client at a queued job"""
+    return jsonify({
+        'status': 'queued',
+        'job_id': job['id'],
+        'job_url': f"/api/jobs/{job['id']}"
+    }), 202
+
+@app.route('/api/jobs')
+def api_jobs():
+    """List recent jobs, newest first"""
+    return jsonify({'jobs': jobs.list()})
+
+@app.route('/api/jobs/<job_id>')
+def api_job(job_id):
+    """Get the status (and, once finished, the result) of a job"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    return jsonify(job)
+
+def start_profile_job(profile_name):
+    """Start a profile container from its docker-compose file"""
+    compose_file = f'{WORKSPACE_DIR}/docker-compose.{profile_name}.yml'
 
     if not os.path.exists(compose_file):
-        return jsonify({'error': f'docker-compose.{profile_name}.yml not found'}), 404
+        return {'error': f'docker-compose.{profile_name}.yml not found'}, 404
 
     try:
-        # Run docker compose up -d
-        result = subprocess.run(
-            ['docker', 'compose', '-f', compose_file, 'up', '-d'],
-            cwd='/workspace',
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
+        started = compose_engine.up(compose_file, host_dir=get_host_workspace_path())
+        return {
+            'status': 'started',
+            'message': f'Profile {profile_name} started successfully',
+            'output': f"Started {', '.join(started)}"
+        }, 200
 
-        if result.returncode == 0:
-            return jsonify({
-                'status': 'started',
-                'message': f'Profile {profile_name} started successfully',
-                'output': result.stdout
-            })
-        else:
-            return jsonify({
-                'error': f'Failed to start profile {profile_name}',
-                'output': result.stderr
-            }), 500
+    except Exception as e:
+        return {
+            'error': f'Failed to start profile {profile_name}',
+            'output': str(e)
+        }, 500
 
-    except subprocess.TimeoutExpired:
-        return jsonify({'error': 'Command timed out'}), 500
+@app.route('/api/start-profile/<profile_name>', methods=['POST'])
+def start_profile(profile_name):
+    """Queue a job that starts a profile container"""
+    if not os.path.exists(f'{WORKSPACE_DIR}/docker-compose.{profile_name}.yml'):
+        return jsonify({'error': f'docker-compose.{profile_name}.yml not found'}), 404
+
+    return job_response(jobs.submit('start-profile', profile_name, start_profile_job, profile_name))
+
+def drain_container_logs(container, profile_name):
+    """Feed a container's unread log lines to the status monitor and log archive before it is removed"""
+    try:
+        sync_monitor.poll_container(container.id, profile_name, stopped=True)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        print(f"Warning: Could not read the last logs of {container.name}: {e}")
 
-@app.route('/api/stop-profile/<profile_name>', methods=['POST'])
-def stop_profile(profile_name):
+def stop_profile_job(profile_name):
     """Stop and remove a profile container directly using docker commands"""
     container_name = f'gphotos-sync-{profile_name}'
 
@@ -561,78 +4118,143 @@ def stop_profile(profile_name):
         # Stop the container
         container.stop(timeout=10)
 
-        # Remove the container
+        # Remove the container, after archiving its last log lines
+        drain_container_logs(container, profile_name)
         container.remove()
+        container_cache.remove_container(container.id)
 
-        return jsonify({
+        return {
             'status': 'stopped',
             'message': f'Profile {profile_name} stopped and removed successfully'
-        })
+        }, 200
 
     except docker.errors.NotFound:
-        return jsonify({
+        return {
             'status': 'stopped',
             'message': f'Container {container_name} not found (already removed)'
-        })
+        }, 200
     except Exception as e:
-        return jsonify({
+        return {
             'error': f'Failed to stop profile {profile_name}',
             'details': str(e)
-        }), 500
+        }, 500
 
-@app.route('/api/recreate-profile/<profile_name>', methods=['POST'])
-def recreate_profile(profile_name):
-    """Stop, remove and recreate a profile container using docker-compose to apply new config"""
-    import subprocess
+@app.route('/api/stop-profile/<profile_name>', methods=['POST'])
+def stop_profile(profile_name):
+    """Stop and remove a profile container"""
+    payload, status = stop_profile_job(profile_name)
+    return jsonify(payload), status
+
+def recreate_profile_job(profile_name):
+    """Stop, remove and recreate a profile container from its compose file to apply new config"""
 
     container_name = f'gphotos-sync-{profile_name}'
-    compose_file = f'/workspace/docker-compose.{profile_name}.yml'
+    compose_file = f'{WORKSPACE_DIR}/docker-compose.{profile_name}.yml'
 
     if not os.path.exists(compose_file):
-        return jsonify({'error': f'docker-compose.{profile_name}.yml not found'}), 404
+        return {'error': f'docker-compose.{profile_name}.yml not found'}, 404
 
     try:
         # Step 1: Stop and remove the container using Docker API (doesn't affect other containers)
         try:
             container = docker_client.containers.get(container_name)
             container.stop(timeout=10)
+            drain_container_logs(container, profile_name)
             container.remove()
+            container_cache.remove_container(container.id)
         except docker.errors.NotFound:
             pass  # Container already removed, that's fine
 
-        # Step 2: Start the container using docker-compose (reads new config from yaml)
-        result = subprocess.run(
-            ['docker', 'compose', '-f', compose_file, 'up', '-d', '--no-recreate'],
-            cwd='/workspace',
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
+        # Step 2: Start the container from the compose file (reads new config from yaml)
+        started = compose_engine.up(compose_file, host_dir=get_host_workspace_path())
 
-        if result.returncode == 0:
-            return jsonify({
-                'status': 'recreated',
-                'message': f'Profile {profile_name} recreated with new configuration',
-                'output': result.stdout
-            })
-        else:
-            return jsonify({
-                'error': f'Failed to recreate profile {profile_name}',
-                'output': result.stderr
-            }), 500
+        return {
+            'status': 'recreated',
+            'message': f'Profile {profile_name} recreated with new configuration',
+            'output': f"Started {', '.join(started)}"
+        }, 200
 
-    except subprocess.TimeoutExpired:
-        return jsonify({'error': 'Command timed out'}), 500
     except Exception as e:
-        return jsonify({
+        return {
             'error': f'Failed to recreate profile {profile_name}',
             'details': str(e)
-        }), 500
+        }, 500
+
+@app.route('/api/recreate-profile/<profile_name>', methods=['POST'])
+def recreate_profile(profile_name):
+    """Queue a job that recreates a profile container to apply new config"""
+    if not os.path.exists(f'{WORKSPACE_DIR}/docker-compose.{profile_name}.yml'):
+        return jsonify({'error': f'docker-compose.{profile_name}.yml not found'}), 404
+
+    return job_response(jobs.submit('recreate-profile', profile_name, recreate_profile_job, profile_name))
+
+def run_bulk(fn, profile_names, concurrency):
+    """Run fn on every profile with at most `concurrency` in flight"""
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bulk') as executor:
+        for profile_name, (payload, status) in zip(profile_names, executor.map(fn, profile_names)):
+            results[profile_name] = {'ok': status < 400, 'http_status': status, 'result': payload}
+
+    failed = sorted(name for name, result in results.items() if not result['ok'])
+    payload = {
+        'status': 'completed' if not failed else 'partial',
+        'total': len(profile_names),
+        'succeeded': len(profile_names) - len(failed),
+        'failed': failed,
+        'profiles': results
+    }
+    return payload, 200 if not failed else 500
+
+def compose_profiles():
+    """Profiles that have a docker-compose file"""
+    import glob
+
+    names = []
+    for compose_file in glob.glob(f'{WORKSPACE_DIR}/docker-compose.*.yml'):
+        names.append(os.path.basename(compose_file)[len('docker-compose.'):-len('.yml')])
+    return sorted(names)
+
+def bulk_response(kind, fn, default_profiles):
+    """Queue one job that fans fn out over the requested profiles"""
+    data = request.get_json(silent=True) or {}
+    profile_names = data.get('profiles') or default_profiles
+    try:
+        concurrency = int(data.get('concurrency') or os.getenv('BULK_CONCURRENCY', '4'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid concurrency'}), 400
+    concurrency = min(max(concurrency, 1), 32)
+
+    if not profile_names:
+        return jsonify({'error': 'No profiles to act on'}), 400
+
+    job = jobs.submit(kind, ','.join(profile_names), run_bulk, fn, profile_names, concurrency)
+    return jsonify({
+        'status': 'queued',
+        'job_id': job['id'],
+        'job_url': f"/api/jobs/{job['id']}",
+        'profiles': profile_names,
+        'concurrency': concurrency
+    }), 202
+
+@app.route('/api/start-all', methods=['POST'])
+def start_all_profiles():
+    """Start every configured profile that isn't running"""
+    running = {record['profile'] for record in container_cache.snapshot() if record['status'] == 'running'}
+    return bulk_response('start-all', start_profile_job, [name for name in compose_profiles() if name not in running])
+
+@app.route('/api/recreate-all', methods=['POST'])
+def recreate_all_profiles():
+    """Recreate every configured profile to apply new config"""
+    return bulk_response('recreate-all', recreate_profile_job, compose_profiles())
+
+@app.route('/api/stop-all', methods=['POST'])
+def stop_all_profiles():
+    """Stop and remove every profile container"""
+    return bulk_response('stop-all', stop_profile_job, sorted(record['profile'] for record in container_cache.snapshot()))
 
 @app.route('/api/create-new-profile', methods=['POST'])
 def create_new_profile():
     """Create a new profile directory with custom name"""
-    import subprocess
     from flask import request
 
     data = request.get_json()
@@ -645,8 +4267,8 @@ def create_new_profile():
     profile_name = sanitize_profile_name(display_name)
 
     # Check if profile already exists
-    profile_dir = f'/workspace/profiles/{profile_name}'
-    photos_dir = f'/workspace/photos/{profile_name}'
+    profile_dir = f'{WORKSPACE_DIR}/profiles/{profile_name}'
+    photos_dir = f'{WORKSPACE_DIR}/photos/{profile_name}'
 
     if os.path.exists(profile_dir):
         return jsonify({'error': f'Profile "{profile_name}" already exists'}), 400
@@ -657,8 +4279,8 @@ def create_new_profile():
         pgid = int(os.getenv('PGID', '1000'))
 
         # Create profiles base directory if needed
-        os.makedirs('/workspace/profiles', exist_ok=True)
-        os.makedirs('/workspace/photos', exist_ok=True)
+        os.makedirs(f'{WORKSPACE_DIR}/profiles', exist_ok=True)
+        os.makedirs(f'{WORKSPACE_DIR}/photos', exist_ok=True)
 
         # Create profile directory
         os.makedirs(profile_dir, exist_ok=True)
@@ -680,6 +4302,8 @@ def create_new_profile():
             json.dump(metadata, f, indent=2)
         os.chown(metadata_file, puid, pgid)
 
+        dashboard_events.notify()
+
         return jsonify({
             'status': 'created',
             'profile_name': profile_name,
@@ -692,14 +4316,12 @@ def create_new_profile():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/start-auth/<profile_name>', methods=['POST'])
-def start_auth(profile_name):
+def start_auth_job(profile_name):
     """Start VNC authentication container for a profile"""
-    import subprocess
 
     # Check if profile directory exists
-    if not os.path.exists(f'/workspace/profiles/{profile_name}'):
-        return jsonify({'error': f'Profile directory {profile_name} not found'}), 404
+    if not os.path.exists(f'{WORKSPACE_DIR}/profiles/{profile_name}'):
+        return {'error': f'Profile directory {profile_name} not found'}, 404
 
     try:
         # Get PUID and PGID from environment or use defaults
@@ -713,58 +4335,51 @@ def start_auth(profile_name):
         profile_dir = f'{host_workspace}/profiles/{profile_name}'
 
         # IMPORTANT: Stop any existing auth container first to avoid reusing wrong profile
-        subprocess.run(
-            ['docker', 'compose', '-f', 'docker-compose.yml', 'down'],
-            cwd='/workspace/auth',
-            capture_output=True,
-            timeout=30
-        )
+        compose_engine.down(f'{WORKSPACE_DIR}/auth/docker-compose.yml')
 
         # Start the auth container with correct profile
-        # Use --force-recreate to ensure the new PROFILE_DIR is used
-        result = subprocess.run(
-            ['docker', 'compose', '-f', 'docker-compose.yml', 'up', '-d', '--force-recreate'],
-            cwd='/workspace/auth',
-            capture_output=True,
-            text=True,
-            timeout=120,
+        # Force a recreate to ensure the new PROFILE_DIR is used
+        started = compose_engine.up(
+            f'{WORKSPACE_DIR}/auth/docker-compose.yml',
+            host_dir=f'{host_workspace}/auth',
             env={
                 **os.environ,
                 'PROFILE_DIR': profile_dir,
                 'PUID': str(puid),
                 'PGID': str(pgid)
-            }
+            },
+            force_recreate=True
         )
 
-        if result.returncode == 0:
-            return jsonify({
-                'status': 'started',
-                'profile_name': profile_name,
-                'vnc_url': 'http://localhost:6080',
-                'message': f'VNC container started for {profile_name}',
-                'output': result.stdout
-            })
-        else:
-            return jsonify({
-                'error': f'Failed to start VNC container',
-                'output': result.stderr
-            }), 500
+        return {
+            'status': 'started',
+            'profile_name': profile_name,
+            'vnc_url': 'http://localhost:6080',
+            'message': f'VNC container started for {profile_name}',
+            'output': f"Started {', '.join(started)}"
+        }, 200
 
-    except subprocess.TimeoutExpired:
-        return jsonify({'error': 'Command timed out'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return {
+            'error': f'Failed to start VNC container',
+            'output': str(e)
+        }, 500
 
-@app.route('/api/reauth-profile/<profile_name>', methods=['POST'])
-def reauth_profile(profile_name):
-    """Re-authenticate a running profile by loading it in VNC"""
-    import subprocess
+@app.route('/api/start-auth/<profile_name>', methods=['POST'])
+def start_auth(profile_name):
+    """Queue a job that starts the VNC authentication container for a profile"""
+    if not os.path.exists(f'{WORKSPACE_DIR}/profiles/{profile_name}'):
+        return jsonify({'error': f'Profile directory {profile_name} not found'}), 404
 
+    return job_response(jobs.submit('start-auth', profile_name, start_auth_job, profile_name, lane='auth'))
+
+def reauth_profile_job(profile_name):
+    """Re-authenticate a running profile by loading it in VNC"""
     container_name = f'gphotos-sync-{profile_name}'
 
     # Check if profile directory exists
-    if not os.path.exists(f'/workspace/profiles/{profile_name}'):
-        return jsonify({'error': f'Profile directory {profile_name} not found'}), 404
+    if not os.path.exists(f'{WORKSPACE_DIR}/profiles/{profile_name}'):
+        return {'error': f'Profile directory {profile_name} not found'}, 404
 
     try:
         # Get PUID and PGID from environment or use defaults
@@ -776,78 +4391,62 @@ def reauth_profile(profile_name):
         profile_dir = f'{host_workspace}/profiles/{profile_name}'
 
         # IMPORTANT: Stop any existing auth container first to avoid reusing wrong profile
-        subprocess.run(
-            ['docker', 'compose', '-f', 'docker-compose.yml', 'down'],
-            cwd='/workspace/auth',
-            capture_output=True,
-            timeout=30
-        )
+        compose_engine.down(f'{WORKSPACE_DIR}/auth/docker-compose.yml')
 
         # Start the auth container with the profile to re-authenticate
-        result = subprocess.run(
-            ['docker', 'compose', '-f', 'docker-compose.yml', 'up', '-d', '--force-recreate'],
-            cwd='/workspace/auth',
-            capture_output=True,
-            text=True,
-            timeout=120,
+        # Force a recreate to ensure the new PROFILE_DIR is used
+        started = compose_engine.up(
+            f'{WORKSPACE_DIR}/auth/docker-compose.yml',
+            host_dir=f'{host_workspace}/auth',
             env={
                 **os.environ,
                 'PROFILE_DIR': profile_dir,
                 'PUID': str(puid),
                 'PGID': str(pgid)
-            }
+            },
+            force_recreate=True
         )
 
-        if result.returncode == 0:
-            return jsonify({
-                'status': 'started',
-                'profile_name': profile_name,
-                'vnc_url': 'http://localhost:6080',
-                'message': f'VNC container started for re-authentication of {profile_name}',
-                'output': result.stdout
-            })
-        else:
-            return jsonify({
-                'error': f'Failed to start VNC container for re-auth',
-                'output': result.stderr
-            }), 500
+        return {
+            'status': 'started',
+            'profile_name': profile_name,
+            'vnc_url': 'http://localhost:6080',
+            'message': f'VNC container started for re-authentication of {profile_name}',
+            'output': f"Started {', '.join(started)}"
+        }, 200
 
-    except subprocess.TimeoutExpired:
-        return jsonify({'error': 'Command timed out'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return {
+            'error': f'Failed to start VNC container for re-auth',
+            'output': str(e)
+        }, 500
+
+@app.route('/api/reauth-profile/<profile_name>', methods=['POST'])
+def reauth_profile(profile_name):
+    """Queue a job that loads a running profile in VNC for re-authentication"""
+    if not os.path.exists(f'{WORKSPACE_DIR}/profiles/{profile_name}'):
+        return jsonify({'error': f'Profile directory {profile_name} not found'}), 404
+
+    return job_response(jobs.submit('reauth-profile', profile_name, reauth_profile_job, profile_name, lane='auth'))
 
 @app.route('/api/stop-auth', methods=['POST'])
 def stop_auth():
     """Stop VNC authentication container"""
-    import subprocess
-
     try:
         # Stop the auth container
-        result = subprocess.run(
-            ['docker', 'compose', '-f', 'docker-compose.yml', 'down'],
-            cwd='/workspace/auth',
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        stopped = compose_engine.down(f'{WORKSPACE_DIR}/auth/docker-compose.yml')
 
-        if result.returncode == 0:
-            return jsonify({
-                'status': 'stopped',
-                'message': 'VNC container stopped',
-                'output': result.stdout
-            })
-        else:
-            return jsonify({
-                'error': 'Failed to stop VNC container',
-                'output': result.stderr
-            }), 500
+        return jsonify({
+            'status': 'stopped',
+            'message': 'VNC container stopped',
+            'output': f"Removed {', '.join(stopped)}" if stopped else 'No auth container running'
+        })
 
-    except subprocess.TimeoutExpired:
-        return jsonify({'error': 'Command timed out'}), 500
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return jsonify({
+            'error': 'Failed to stop VNC container',
+            'output': str(e)
+        }), 500
 
 @app.route('/api/auth-status', methods=['GET'])
 def auth_status():
@@ -874,10 +4473,8 @@ def auth_status():
 @app.route('/api/delete-profile/<profile_name>', methods=['DELETE'])
 def delete_profile(profile_name):
     """Delete a profile: stop and remove container, delete docker-compose file"""
-    import subprocess
-
     container_name = f'{get_container_prefix()}-{profile_name}'
-    compose_file = f'/workspace/docker-compose.{profile_name}.yml'
+    compose_file = f'{WORKSPACE_DIR}/docker-compose.{profile_name}.yml'
 
     errors = []
     success_messages = []
@@ -895,6 +4492,7 @@ def delete_profile(profile_name):
                 success_messages.append(f'Container stop attempted (may already be stopped)')
             # Remove container (force=True to ensure removal even if stop failed)
             container.remove(force=True)
+            container_cache.remove_container(container.id)
             success_messages.append(f'Container {container_name} removed')
         except docker.errors.NotFound:
             success_messages.append(f'Container {container_name} not found (already deleted)')
@@ -911,6 +4509,8 @@ def delete_profile(profile_name):
         else:
             success_messages.append(f'Compose file not found (already deleted)')
 
+        dashboard_events.notify()
+
         # Return response
         if errors:
             return jsonify({
@@ -939,8 +4539,8 @@ def delete_profile_files(profile_name):
     """Delete only profile files (docker-compose, metadata, profile directory) without touching containers"""
     import shutil
 
-    compose_file = f'/workspace/docker-compose.{profile_name}.yml'
-    profile_dir = f'/workspace/profiles/{profile_name}'
+    compose_file = f'{WORKSPACE_DIR}/docker-compose.{profile_name}.yml'
+    profile_dir = f'{WORKSPACE_DIR}/profiles/{profile_name}'
 
     errors = []
     success_messages = []
@@ -966,6 +4566,8 @@ def delete_profile_files(profile_name):
         else:
             success_messages.append(f'Profile directory not found')
 
+        dashboard_events.notify()
+
         # Return response
         if errors:
             return jsonify({
@@ -989,86 +4591,156 @@ def delete_profile_files(profile_name):
             'errors': errors
         }), 500
 
+class DirectoryListingCache:
+    """Short-lived cache of directory listings, keyed by path and mtime
+
+    A directory's mtime changes whenever an entry is added, removed or
+    renamed in it, so a cached listing is reused until either the mtime
+    moves or the TTL expires (which also picks up entries that turned
+    from files into directories through a symlink).
+    """
+
+    def __init__(self, ttl=30, max_entries=64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, mtime_ns):
+        key = (path, mtime_ns)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and time.time() - cached[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return cached[1]
+        listing = self._scan(path)
+        with self._lock:
+            self._entries[key] = (time.time(), listing)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return listing
+
+    @staticmethod
+    def _scan(path):
+        """Split a directory into sorted subdirectory names and a file count
+
+        scandir returns the entry type with the name, so this is a single
+        pass without a stat per entry (except for symlinks).
+        """
+        directories = []
+        files_count = 0
+        with os.scandir(path) as entries:
+            for count, entry in enumerate(entries, 1):
+                try:
+                    if entry.is_dir():
+                        directories.append(entry.name)
+                    else:
+                        files_count += 1
+                except OSError:
+                    files_count += 1
+                if count % 1000 == 0:
+                    # Let other requests run while walking huge directories
+                    time.sleep(0)
+        directories.sort()
+        return {'directories': directories, 'files_count': files_count}
+
+directory_listings = DirectoryListingCache(ttl=int(os.getenv('BROWSE_CACHE_TTL', '30')))
+
 @app.route('/api/browse-directories', methods=['POST'])
 def browse_directories():
-    """Browse directories on the host system"""
+    """Browse directories on the host system
+
+    Accepts path, plus optional offset, limit and filter (case-insensitive
+    substring of the directory name) for paging through large directories.
+    """
     from flask import request
 
     data = request.get_json() or {}
     requested_path = data.get('path', '/')
+    name_filter = (data.get('filter') or '').strip().lower()
+    try:
+        offset = max(int(data.get('offset', 0)), 0)
+        limit = min(max(int(data.get('limit', 200)), 1), 1000)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid offset or limit'}), 400
 
     try:
         # Map the requested path to the host mount point
         # The host filesystem is mounted at /host in the container
-        if requested_path.startswith('/host'):
+        if requested_path.startswith(HOST_ROOT):
             # Already using host prefix
             container_path = requested_path
         else:
             # Convert user path to container path
             # User sees: /home/user/photos
             # Container needs: /host/home/user/photos
-            container_path = os.path.join('/host', requested_path.lstrip('/'))
+            container_path = os.path.join(HOST_ROOT, requested_path.lstrip('/'))
 
         # Resolve to absolute path
         container_path = os.path.abspath(container_path)
 
         # Security check: ensure path exists and is a directory
-        if not os.path.exists(container_path):
+        try:
+            stat = os.stat(container_path)
+        except FileNotFoundError:
             return jsonify({'error': 'Path does not exist'}), 404
+        except PermissionError:
+            return jsonify({'error': 'Permission denied'}), 403
 
         if not os.path.isdir(container_path):
             return jsonify({'error': 'Path is not a directory'}), 400
 
-        # List directories
-        directories = []
-        files_count = 0
-
         try:
-            entries = os.listdir(container_path)
-            for entry in sorted(entries):
-                entry_container_path = os.path.join(container_path, entry)
-                try:
-                    if os.path.isdir(entry_container_path):
-                        # Check if readable
-                        os.listdir(entry_container_path)
-
-                        # Convert back to user-facing path (remove /host prefix)
-                        entry_user_path = entry_container_path.replace('/host', '', 1) or '/'
-
-                        directories.append({
-                            'name': entry,
-                            'path': entry_user_path
-                        })
-                    else:
-                        files_count += 1
-                except PermissionError:
-                    # Skip directories we can't read
-                    entry_user_path = entry_container_path.replace('/host', '', 1) or '/'
-                    directories.append({
-                        'name': entry,
-                        'path': entry_user_path,
-                        'unreadable': True
-                    })
+            listing = directory_listings.get(container_path, stat.st_mtime_ns)
         except PermissionError:
             return jsonify({'error': 'Permission denied'}), 403
 
+        names = listing['directories']
+        if name_filter:
+            names = [name for name in names if name_filter in name.lower()]
+
+        # Only the entries on this page are checked for readability
+        directories = []
+        for name in names[offset:offset + limit]:
+            entry_container_path = os.path.join(container_path, name)
+            # Convert back to user-facing path (remove /host prefix)
+            entry = {
+                'name': name,
+                'path': entry_container_path.replace(HOST_ROOT, '', 1) or '/'
+            }
+            if not os.access(entry_container_path, os.R_OK | os.X_OK):
+                entry['unreadable'] = True
+            directories.append(entry)
+
         # Get parent directory
         parent_container_path = os.path.dirname(container_path)
-        parent_user_path = parent_container_path.replace('/host', '', 1) or '/'
-        parent_path = parent_user_path if parent_user_path != container_path.replace('/host', '', 1) else None
+        parent_user_path = parent_container_path.replace(HOST_ROOT, '', 1) or '/'
+        parent_path = parent_user_path if parent_user_path != container_path.replace(HOST_ROOT, '', 1) else None
 
         # Convert current path back to user-facing format
-        current_user_path = container_path.replace('/host', '', 1) or '/'
+        current_user_path = container_path.replace(HOST_ROOT, '', 1) or '/'
 
         return jsonify({
             'current_path': current_user_path,
             'parent_path': parent_path,
             'directories': directories,
-            'files_count': files_count
+            'files_count': listing['files_count'],
+            'total_directories': len(names),
+            'offset': offset,
+            'limit': limit,
+            'has_more': offset + limit < len(names)
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+if docker_client is not None:
+    container_cache.start()
+    sync_monitor.start()
+    dashboard_events.start()
+    resource_sampler.start()
+    disk_usage.start()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8080, debug=False)
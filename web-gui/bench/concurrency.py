@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the web GUI
+
+Holds a number of SSE streams open (dashboard events and, optionally, a
+container log stream) while several clients poll a JSON endpoint, then
+reports throughput and latency percentiles. Run it once per serving mode
+and compare:
+
+    python bench/concurrency.py --url http://localhost:8080 --streams 50 --clients 10
+    python bench/concurrency.py --container gphotos-sync-family --streams 100
+
+Every open stream pins a thread under the gthread worker, so requests stall
+once --streams reaches GUI_THREADS; the gevent worker stays flat. bench/modes.py
+runs this for every mode and records the results.
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def open_stream(host, port, path, opened, stop, errors):
+    """Open an SSE stream and keep reading it until told to stop"""
+    try:
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        conn.request('GET', path, headers={'Accept': 'text/event-stream'})
+        response = conn.getresponse()
+        if response.status != 200:
+            errors.append(f"{path}: HTTP {response.status}")
+            return
+        opened.append(path)
+        while not stop.is_set():
+            if not response.fp.readline():
+                break
+    except Exception as e:
+        if not stop.is_set():
+            errors.append(f"{path}: {e}")
+
+
+def poll_endpoint(host, port, path, deadline, latencies, errors):
+    """Request a JSON endpoint back-to-back until the deadline"""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(f"{path}: HTTP {response.status}")
+                continue
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(f"{path}: {e}")
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8080', help='Web GUI base URL')
+    parser.add_argument('--streams', type=int, default=50, help='SSE streams held open during the run')
+    parser.add_argument('--container', help='Container to open log streams for (half of --streams)')
+    parser.add_argument('--clients', type=int, default=10, help='Concurrent polling clients')
+    parser.add_argument('--path', default='/api/containers', help='Endpoint polled by the clients')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to poll for')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    host, port = url.hostname, url.port or 80
+
+    stream_paths = []
+    for i in range(args.streams):
+        if args.container and i % 2:
+            stream_paths.append(f"/api/container/{args.container}/logs/stream?backlog=0")
+        else:
+            stream_paths.append('/api/events')
+
+    stop = threading.Event()
+    opened, stream_errors = [], []
+    streams = [
+        threading.Thread(target=open_stream, args=(host, port, path, opened, stop, stream_errors), daemon=True)
+        for path in stream_paths
+    ]
+    for thread in streams:
+        thread.start()
+
+    # Give the streams a moment to connect before measuring
+    wait_until = time.time() + 10
+    while len(opened) + len(stream_errors) < len(stream_paths) and time.time() < wait_until:
+        time.sleep(0.1)
+
+    latencies, errors = [], []
+    deadline = time.time() + args.duration
+    clients = [
+        threading.Thread(target=poll_endpoint, args=(host, port, args.path, deadline, latencies, errors))
+        for _ in range(args.clients)
+    ]
+    started = time.time()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.time() - started
+    stop.set()
+
+    result = {
+        'url': args.url,
+        'path': args.path,
+        'streams_requested': len(stream_paths),
+        'streams_open': len(opened),
+        'clients': args.clients,
+        'duration_seconds': round(elapsed, 2),
+        'requests': len(latencies),
+        'errors': len(errors) + len(stream_errors),
+        'requests_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'latency_ms': {
+            name: round(value * 1000, 1) if value is not None else None
+            for name, value in (('p50', percentile(latencies, 50)),
+                                ('p95', percentile(latencies, 95)),
+                                ('p99', percentile(latencies, 99)),
+                                ('max', max(latencies) if latencies else None))
+        }
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"Streams open:  {result['streams_open']}/{result['streams_requested']}")
+    print(f"Requests:      {result['requests']} in {result['duration_seconds']}s "
+          f"({result['requests_per_second']} req/s, {result['clients']} clients)")
+    print("Latency (ms):  " + ', '.join(f"{k} {v}" for k, v in result['latency_ms'].items()))
+    print(f"Errors:        {result['errors']}")
+    for error in (stream_errors + errors)[:5]:
+        print(f"  {error}")
+
+
+if __name__ == '__main__':
+    main()
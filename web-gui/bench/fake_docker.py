@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the Docker Engine API, served on a unix socket
+
+Implements just the endpoints the web GUI uses, backed by an in-memory set
+of fake sync containers with synthetic gphotos-cdp logs:
+
+    GET  /_ping, /version
+    GET  /containers/json, /containers/<id>/json
+    GET  /containers/<id>/logs (tail, since, timestamps, follow)
+    GET  /containers/<id>/stats (stream or one-shot)
+    POST /containers/<id>/start, /stop, /restart
+    GET  /events (held open, never sends anything)
+
+Containers use a TTY, so logs are sent raw instead of multiplexed. Running
+containers keep appending progress lines while a log is followed. Run it on
+its own to poke at it with the Docker CLI:
+
+    python bench/fake_docker.py --socket /tmp/fake-docker.sock --containers 100
+    DOCKER_HOST=unix:///tmp/fake-docker.sock docker ps
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+API_VERSION = '1.43'
+
+
+def docker_timestamp(ts):
+    """RFC 3339 timestamp with nanoseconds, as in Docker log lines"""
+    whole = int(ts)
+    nanos = int((ts - whole) * 1e9)
+    return datetime.fromtimestamp(whole, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S') + f'.{nanos:09d}Z'
+
+
+class FakeContainer:
+    """One sync container with a growing log"""
+
+    def __init__(self, index, prefix, running, log_lines, rng):
+        self.name = f'{prefix}-profile{index:03d}'
+        self.id = hashlib.sha256(self.name.encode()).hexdigest()
+        self.running = running
+        self.created = time.time() - 86400 * rng.randint(1, 90)
+        self.rng = rng
+        self.cpu_total = 0
+        self.cron_schedule = f'{rng.randint(0, 59)} {rng.randint(0, 23)} * * *'
+        self.lock = threading.Lock()
+        self.log = []  # (timestamp, line)
+        self.synced = 0
+        self.downloaded = 0
+        start = time.time() - log_lines
+        self._append_log(start, 'info', 'starting sync.sh, pid: 42')
+        for i in range(log_lines - 1):
+            self._append_progress(start + i + 1)
+
+    @property
+    def profile(self):
+        return self.name.split('-')[-1]
+
+    def _append_log(self, ts, level, message, **fields):
+        record = {'level': level, **fields, 'time': docker_timestamp(ts)[:19] + 'Z', 'message': message}
+        self.log.append((ts, json.dumps(record, separators=(',', ':'))))
+
+    def _append_progress(self, ts):
+        self.synced += 1
+        if self.rng.random() < 0.6:
+            self.downloaded += 1
+            self._append_log(ts, 'info', f'downloaded file(s) IMG_{self.synced:05d}.jpg with date 2024-01-01',
+                             files=1, bytes=self.rng.randint(500_000, 5_000_000))
+        if self.synced % 20 == 0:
+            self._append_log(ts, 'info', f'so far: downloaded {self.downloaded} (0 in queue), progress: 50.00% '
+                             f'({self.synced}/{self.synced * 2})', synced=self.synced, downloaded=self.downloaded,
+                             queued=0, skipped=self.synced - self.downloaded, remaining=self.synced)
+
+    def grow(self):
+        """Append new log lines, as a running sync would"""
+        with self.lock:
+            self._append_progress(time.time())
+
+    def lines_since(self, since=None, tail=None, timestamps=True):
+        with self.lock:
+            entries = self.log if since is None else [e for e in self.log if e[0] >= since]
+            if tail is not None:
+                entries = entries[-tail:] if tail > 0 else []
+            return [f'{docker_timestamp(ts)} {line}' if timestamps else line for ts, line in entries]
+
+    def inspect(self):
+        status = 'running' if self.running else 'exited'
+        return {
+            'Id': self.id,
+            'Name': '/' + self.name,
+            'Created': docker_timestamp(self.created),
+            'State': {'Status': status, 'Running': self.running, 'ExitCode': 0, 'StartedAt': docker_timestamp(self.created)},
+            'Config': {
+                'Image': 'gphotos-sync:latest',
+                'Tty': True,
+                'Cmd': [''],
+                'Env': [
+                    f'PROFILE_NAME={self.profile}',
+                    f'CRON_SCHEDULE={self.cron_schedule}',
+                    'TZ=Europe/Rome',
+                    'RUN_ON_STARTUP=false',
+                    'LOGLEVEL=info',
+                    'WORKER_COUNT=6',
+                ],
+                'Labels': {'com.docker.compose.project': self.profile},
+            },
+            'HostConfig': {'NetworkMode': 'gphotos-network'},
+            'Mounts': [],
+        }
+
+    def summary(self):
+        return {
+            'Id': self.id,
+            'Names': ['/' + self.name],
+            'Image': 'gphotos-sync:latest',
+            'Created': int(self.created),
+            'State': 'running' if self.running else 'exited',
+            'Status': 'Up 2 hours' if self.running else 'Exited (0) 2 hours ago',
+            'Labels': {'com.docker.compose.project': self.profile},
+        }
+
+    def stats(self):
+        usage = self.rng.randint(100_000_000, 900_000_000)
+        # Cumulative counters, as the stream's consumers diff consecutive documents
+        now = time.time()
+        system = int(now * 4e9)
+        with self.lock:
+            precpu = self.cpu_total
+            self.cpu_total += self.rng.randint(10_000_000, 900_000_000)
+            cpu = self.cpu_total
+        return {
+            'read': docker_timestamp(now),
+            'cpu_stats': {'cpu_usage': {'total_usage': cpu}, 'system_cpu_usage': system, 'online_cpus': 4},
+            'precpu_stats': {'cpu_usage': {'total_usage': precpu}, 'system_cpu_usage': system - 4_000_000_000, 'online_cpus': 4},
+            'memory_stats': {'usage': usage, 'limit': 4_000_000_000, 'stats': {'inactive_file': usage // 10}},
+            'networks': {'eth0': {'rx_bytes': self.downloaded * 2_000_000, 'tx_bytes': self.synced * 10_000}},
+            'blkio_stats': {'io_service_bytes_recursive': [
+                {'op': 'read', 'value': self.synced * 1000}, {'op': 'write', 'value': self.downloaded * 2_000_000}]},
+            'pids_stats': {'current': 30 if self.running else 0},
+        }
+
+
+class FakeDocker:
+    """The container set behind the fake API"""
+
+    def __init__(self, containers=10, prefix='gphotos-sync', running_ratio=0.5, log_lines=500,
+                 log_interval=1.0, seed=1):
+        rng = random.Random(seed)
+        self.log_interval = log_interval
+        self.containers = [
+            FakeContainer(i, prefix, i < containers * running_ratio, log_lines, random.Random(rng.random()))
+            for i in range(containers)
+        ]
+        self.stopped = threading.Event()
+
+    def find(self, ref):
+        for container in self.containers:
+            if container.id.startswith(ref) or container.name == ref:
+                return container
+        return None
+
+    def list(self, show_all, filters):
+        names = filters.get('name', [])
+        result = []
+        for container in self.containers:
+            if not show_all and not container.running:
+                continue
+            if names and not any(re.search(name, container.name) for name in names):
+                continue
+            result.append(container.summary())
+        return result
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeDocker'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def docker(self):
+        return self.server.docker
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, status=204):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _not_found(self, what):
+        self._send_json({'message': f'No such {what}'}, 404)
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def _chunk(self, data):
+        self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+        self.wfile.flush()
+
+    def _route(self):
+        url = urlparse(self.path)
+        # Strip the API version prefix, e.g. /v1.43/containers/json
+        path = re.sub(r'^/v[\d.]+', '', url.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        return path, params
+
+    def do_HEAD(self):
+        self._send_empty(200)
+
+    def do_GET(self):
+        path, params = self._route()
+        if path == '/_ping':
+            body = b'OK'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Api-Version', API_VERSION)
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == '/version':
+            self._send_json({'Version': '24.0.0-fake', 'ApiVersion': API_VERSION, 'MinAPIVersion': '1.12',
+                             'Os': 'linux', 'Arch': 'amd64'})
+        elif path == '/containers/json':
+            filters = json.loads(params.get('filters') or '{}')
+            if isinstance(filters.get('name'), dict):
+                filters['name'] = list(filters['name'])
+            self._send_json(self.docker.list(params.get('all') in ('1', 'true', 'True'), filters))
+        elif path == '/events':
+            self._start_chunked('application/json')
+            self.docker.stopped.wait()
+        else:
+            match = re.match(r'^/containers/([^/]+)/(json|logs|stats)$', path)
+            if not match:
+                return self._not_found('endpoint')
+            container = self.docker.find(match.group(1))
+            if container is None:
+                return self._not_found(f'container: {match.group(1)}')
+            getattr(self, f'_container_{match.group(2)}')(container, params)
+
+    def do_POST(self):
+        path, _ = self._route()
+        match = re.match(r'^/containers/([^/]+)/(start|stop|restart)$', path)
+        if not match:
+            return self._not_found('endpoint')
+        container = self.docker.find(match.group(1))
+        if container is None:
+            return self._not_found(f'container: {match.group(1)}')
+        container.running = match.group(2) != 'stop'
+        self._send_empty()
+
+    def _container_json(self, container, params):
+        self._send_json(container.inspect())
+
+    def _container_logs(self, container, params):
+        timestamps = params.get('timestamps') in ('1', 'true', 'True')
+        tail = params.get('tail', 'all')
+        tail = None if tail == 'all' else int(tail)
+        since = float(params['since']) if params.get('since') not in (None, '', '0') else None
+        lines = container.lines_since(since, tail, timestamps)
+
+        if params.get('follow') not in ('1', 'true', 'True'):
+            body = ''.join(line + '\n' for line in lines).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/vnd.docker.raw-stream')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self._start_chunked('application/vnd.docker.raw-stream')
+        try:
+            if lines:
+                self._chunk(''.join(line + '\n' for line in lines).encode())
+            sent = len(container.log)
+            while not self.docker.stopped.is_set():
+                if not container.running:
+                    # Hold the stream like Docker does for a stopped container that gets restarted
+                    time.sleep(1)
+                    continue
+                time.sleep(self.docker.log_interval)
+                container.grow()
+                with container.lock:
+                    new = container.log[sent:]
+                    sent = len(container.log)
+                if new:
+                    self._chunk(''.join(
+                        (f'{docker_timestamp(ts)} {line}' if timestamps else line) + '\n' for ts, line in new
+                    ).encode())
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _container_stats(self, container, params):
+        if params.get('stream') in ('0', 'false', 'False'):
+            return self._send_json(container.stats())
+        self._start_chunked('application/json')
+        try:
+            while not self.docker.stopped.is_set():
+                self._chunk(json.dumps(container.stats()).encode() + b'\n')
+                time.sleep(1)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class FakeDockerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, docker):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self.docker = docker
+        super().__init__(socket_path, Handler)
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects an (address, port) tuple
+        return request, ('fake-docker', 0)
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive or streaming connections is normal here
+        if not isinstance(sys.exc_info()[1], (ConnectionError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name='fake-docker', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.docker.stopped.set()
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--socket', default='/tmp/fake-docker.sock', help='Unix socket to listen on')
+    parser.add_argument('--containers', type=int, default=10, help='Number of fake sync containers')
+    parser.add_argument('--prefix', default='gphotos-sync', help='Container name prefix')
+    parser.add_argument('--log-lines', type=int, default=500, help='Synthetic log lines per container')
+    parser.add_argument('--log-interval', type=float, default=1.0, help='Seconds between new lines of followed logs')
+    args = parser.parse_args()
+
+    docker = FakeDocker(args.containers, args.prefix, log_lines=args.log_lines, log_interval=args.log_interval)
+    server = FakeDockerServer(args.socket, docker)
+    print(f"Fake Docker API with {args.containers} containers on unix://{args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Compare the web GUI's serving modes with bench/concurrency.py
+
+Starts the app against the fake Docker daemon from fake_docker.py once per
+serving mode (Flask development server, gunicorn gthread, gunicorn gevent)
+and, for each number of open SSE streams, runs concurrency.py against it:
+half of the streams follow /api/events, half a container's log stream,
+while --clients poll /api/containers. The results are written to
+bench/concurrency_results.json.
+
+    python bench/modes.py
+    python bench/modes.py --streams 0,50,200 --duration 10
+
+Results depend on the machine; record them where you compare.
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+GUI_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_docker import FakeDocker, FakeDockerServer  # noqa: E402
+from run import build_workspace, free_port, wait_ready  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, 'concurrency_results.json')
+
+# Mode name -> command line, given the port
+MODES = {
+    'dev': lambda port: [sys.executable, '-c',
+                         f"import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"],
+    'gthread': lambda port: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                             '--bind', f'127.0.0.1:{port}', '--worker-class', 'gthread', 'app:app'],
+    'gevent': lambda port: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                            '--bind', f'127.0.0.1:{port}', '--worker-class', 'gevent', 'app:app'],
+}
+
+
+def run_mode(mode, args):
+    root = tempfile.mkdtemp(prefix=f'gui-modes-{mode}-')
+    server = None
+    gui = None
+    try:
+        workspace, host_root = build_workspace(root, args.containers, 10)
+        docker = FakeDocker(args.containers, log_interval=0.5)
+        socket_path = os.path.join(root, 'docker.sock')
+        server = FakeDockerServer(socket_path, docker).start()
+
+        port = free_port()
+        env = dict(os.environ,
+                   DOCKER_HOST=f'unix://{socket_path}',
+                   WORKSPACE_DIR=workspace,
+                   HOST_ROOT=host_root,
+                   GUI_DATA_DIR=os.path.join(root, 'data'),
+                   GUI_LOG_LEVEL='warning')
+        gui = subprocess.Popen(MODES[mode](port), cwd=GUI_DIR, env=env, stdout=subprocess.DEVNULL,
+                               stderr=None if args.verbose else subprocess.DEVNULL)
+        wait_ready(port, args.containers)
+
+        container = next(c.name for c in docker.containers if c.running)
+        results = {}
+        for streams in args.streams:
+            output = subprocess.run(
+                [sys.executable, os.path.join(BENCH_DIR, 'concurrency.py'), '--url', f'http://127.0.0.1:{port}',
+                 '--streams', str(streams), '--container', container, '--clients', str(args.clients),
+                 '--duration', str(args.duration), '--json'],
+                check=True, capture_output=True, text=True).stdout
+            result = json.loads(output)
+            results[str(streams)] = {
+                'streams_open': result['streams_open'],
+                'requests_per_second': result['requests_per_second'],
+                'errors': result['errors'],
+                **{f'{name}_ms': value for name, value in result['latency_ms'].items()}
+            }
+            print(f"  {mode:8} {streams:>4} streams ({result['streams_open']} open)  "
+                  f"{result['requests_per_second']:>8} req/s  p50 {result['latency_ms']['p50']} ms  "
+                  f"p95 {result['latency_ms']['p95']} ms  errors {result['errors']}")
+            # Let the streams of this round close before the next one
+            time.sleep(2)
+        return results
+    finally:
+        if gui is not None:
+            gui.send_signal(signal.SIGTERM)
+            try:
+                gui.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                gui.kill()
+        if server is not None:
+            server.stop()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated serving modes')
+    parser.add_argument('--streams', default='0,50,200', help='Comma-separated numbers of open SSE streams')
+    parser.add_argument('--containers', type=int, default=10, help='Fake gphotos-sync containers')
+    parser.add_argument('--clients', type=int, default=10, help='Concurrent clients polling /api/containers')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to poll for at each stream count')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Where to write the results')
+    parser.add_argument('--verbose', action='store_true', help='Show the web GUI output')
+    args = parser.parse_args()
+    args.streams = [int(streams) for streams in args.streams.split(',')]
+
+    results = {}
+    for mode in args.modes.split(','):
+        print(f"{mode}:")
+        results[mode] = run_mode(mode, args)
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'settings': {'containers': args.containers, 'clients': args.clients, 'duration': args.duration,
+                         'threads': int(os.getenv('GUI_THREADS', '32'))},
+            'results': results
+        }, f, indent=2)
+        f.write('\n')
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
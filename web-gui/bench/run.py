@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the web GUI against a fake Docker daemon
+
+For each fleet size it builds a scratch workspace (profiles, compose files,
+photo dirs and a large directory tree to browse), starts the fake Docker API
+from fake_docker.py on a unix socket with that many gphotos-sync containers,
+and runs the app under gunicorn pointed at both. Then it measures, with
+concurrent clients:
+
+    /api/containers, /api/available-profiles, /api/stats   GET, back-to-back
+    /api/browse-directories                                POST, paged listing
+    /api/container/<id>/logs/stream                        time to first event, lines/s
+
+Results are compared with bench/baseline.json; latency (p95) or throughput
+more than --tolerance worse than the baseline is reported as a regression.
+
+    python bench/run.py                         # 10, 100 and 500 containers
+    python bench/run.py --sizes 100 --duration 5
+    python bench/run.py --save-baseline         # after an intended change
+
+Baselines depend on the machine; record them where you compare.
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+GUI_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from concurrency import percentile  # noqa: E402
+from fake_docker import FakeDocker, FakeDockerServer  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+# Endpoint name -> (method, path, JSON body)
+ENDPOINTS = {
+    'containers': ('GET', '/api/containers', None),
+    'available_profiles': ('GET', '/api/available-profiles', None),
+    'stats': ('GET', '/api/stats', None),
+    'browse_directories': ('POST', '/api/browse-directories', {'path': '/photos', 'limit': 100, 'offset': 0}),
+}
+
+# Metrics compared against the baseline, and whether higher is better
+COMPARED = {
+    'requests_per_second': True,
+    'p95_ms': False,
+    'first_event_p95_ms': False,
+    'lines_per_second': True,
+}
+
+
+def build_workspace(root, containers, browse_dirs):
+    """Profiles for every container plus a few without one, and a big dir tree under HOST_ROOT"""
+    workspace = os.path.join(root, 'workspace')
+    for i in range(containers + max(containers // 5, 1)):
+        name = f'profile{i:03d}'
+        profile_dir = os.path.join(workspace, 'profiles', name)
+        os.makedirs(os.path.join(profile_dir, 'Default'))
+        with open(os.path.join(profile_dir, '.profile_metadata.json'), 'w') as f:
+            json.dump({'display_name': f'Profile {i}', 'created_at': '2024-01-01T00:00:00'}, f)
+        if i % 3:
+            open(os.path.join(profile_dir, 'Default', 'Cookies'), 'w').close()
+        photo_dir = os.path.join(workspace, 'photos', name)
+        os.makedirs(os.path.join(photo_dir, 'tmp'))
+        for item in range(20):
+            item_dir = os.path.join(photo_dir, f'item{item:04d}')
+            os.makedirs(item_dir)
+            with open(os.path.join(item_dir, 'IMG.jpg'), 'wb') as f:
+                f.write(b'\0' * 1024)
+        with open(os.path.join(workspace, f'docker-compose.{name}.yml'), 'w') as f:
+            f.write(f"services:\n  {name}:\n    container_name: gphotos-sync-{name}\n    image: gphotos-sync:latest\n")
+
+    host_root = os.path.join(root, 'host')
+    for i in range(browse_dirs):
+        os.makedirs(os.path.join(host_root, 'photos', f'album-{i:05d}'))
+    return workspace, host_root
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def request(port, method, path, body=None, timeout=30):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+    try:
+        payload = json.dumps(body) if body is not None else None
+        conn.request(method, path, body=payload, headers={'Content-Type': 'application/json'} if payload else {})
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def wait_ready(port, containers, timeout=60):
+    """Wait until the app answers and its container cache has the whole fleet"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            status, body = request(port, 'GET', '/api/stats', timeout=5)
+            if status == 200 and json.loads(body)['total'] == containers:
+                return
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'web GUI did not come up with {containers} containers within {timeout}s')
+
+
+def measure_endpoint(port, method, path, body, clients, duration):
+    """Back-to-back requests from concurrent clients on keep-alive connections"""
+    latencies, errors = [], []
+    payload = json.dumps(body) if body is not None else None
+    headers = {'Content-Type': 'application/json'} if payload else {}
+    deadline = time.time() + duration
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        while time.time() < deadline:
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(f'HTTP {response.status}')
+                    continue
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(str(e))
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+    }
+
+
+def measure_log_streams(port, container_ids, streams, duration):
+    """Open log streams spread over the containers, timing the first event and counting lines"""
+    first_events, errors = [], []
+    lines = [0]
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def follow(container_id):
+        started = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn.request('GET', f'/api/container/{container_id}/logs/stream?backlog=50')
+            response = conn.getresponse()
+            if response.status != 200:
+                errors.append(f'HTTP {response.status}')
+                return
+            first = True
+            while not stop.is_set():
+                line = response.fp.readline()
+                if not line:
+                    break
+                if line.startswith(b'data: '):
+                    with lock:
+                        if first:
+                            first_events.append(time.perf_counter() - started)
+                            first = False
+                        lines[0] += 1
+            conn.close()
+        except Exception as e:
+            if not stop.is_set():
+                errors.append(str(e))
+
+    threads = [threading.Thread(target=follow, args=(container_ids[i % len(container_ids)],), daemon=True)
+               for i in range(streams)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    elapsed = time.time() - started
+    return {
+        'streams': streams,
+        'streams_with_data': len(first_events),
+        'errors': len(errors),
+        'first_event_p50_ms': ms(percentile(first_events, 50)),
+        'first_event_p95_ms': ms(percentile(first_events, 95)),
+        'lines_per_second': round(lines[0] / elapsed, 1),
+    }
+
+
+def ms(value):
+    return round(value * 1000, 2) if value is not None else None
+
+
+def run_size(size, args):
+    root = tempfile.mkdtemp(prefix=f'gui-bench-{size}-')
+    server = None
+    gui = None
+    try:
+        workspace, host_root = build_workspace(root, size, args.browse_dirs)
+        docker = FakeDocker(size, log_lines=args.log_lines, log_interval=args.log_interval)
+        socket_path = os.path.join(root, 'docker.sock')
+        server = FakeDockerServer(socket_path, docker).start()
+
+        port = free_port()
+        env = dict(os.environ,
+                   DOCKER_HOST=f'unix://{socket_path}',
+                   WORKSPACE_DIR=workspace,
+                   HOST_ROOT=host_root,
+                   GUI_DATA_DIR=os.path.join(root, 'data'),
+                   GUI_PORT=str(port),
+                   GUI_WORKER_CLASS=args.worker_class,
+                   GUI_LOG_LEVEL='warning')
+        gui = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}', 'app:app'],
+            cwd=GUI_DIR, env=env, stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL)
+        wait_ready(port, size)
+
+        results = {}
+        for name, (method, path, body) in ENDPOINTS.items():
+            results[name] = measure_endpoint(port, method, path, body, args.clients, args.duration)
+            print(f"  {name:20} {results[name]['requests_per_second']:>8} req/s  "
+                  f"p50 {results[name]['p50_ms']} ms  p95 {results[name]['p95_ms']} ms  "
+                  f"errors {results[name]['errors']}")
+
+        running = [c.id[:12] for c in docker.containers if c.running]
+        results['log_stream'] = measure_log_streams(port, running, args.streams, args.duration)
+        print(f"  {'log_stream':20} {results['log_stream']['streams_with_data']}/{args.streams} streams  "
+              f"first event p95 {results['log_stream']['first_event_p95_ms']} ms  "
+              f"{results['log_stream']['lines_per_second']} lines/s")
+        return results
+    finally:
+        if gui is not None:
+            gui.send_signal(signal.SIGTERM)
+            try:
+                gui.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                gui.kill()
+        if server is not None:
+            server.stop()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def compare(results, baseline, tolerance):
+    """List the metrics that got worse than the baseline by more than tolerance"""
+    regressions = []
+    for size, endpoints in results.items():
+        for endpoint, metrics in endpoints.items():
+            base = baseline.get(size, {}).get(endpoint, {})
+            for metric, higher_is_better in COMPARED.items():
+                old, new = base.get(metric), metrics.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                    regressions.append(f"{size} containers, {endpoint}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10,100,500', help='Comma-separated numbers of fake containers')
+    parser.add_argument('--clients', type=int, default=10, help='Concurrent clients per endpoint')
+    parser.add_argument('--streams', type=int, default=50, help='Log streams held open')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to measure each endpoint')
+    parser.add_argument('--browse-dirs', type=int, default=5000, help='Directories in the browsed folder')
+    parser.add_argument('--log-lines', type=int, default=500, help='Synthetic log lines per container')
+    parser.add_argument('--log-interval', type=float, default=0.5, help='Seconds between new lines of running containers')
+    parser.add_argument('--worker-class', default='gevent', help='GUI_WORKER_CLASS for gunicorn (gevent or gthread)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline results to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown before flagging')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    parser.add_argument('--verbose', action='store_true', help='Show the web GUI output')
+    args = parser.parse_args()
+
+    results = {}
+    for size in [int(s) for s in args.sizes.split(',')]:
+        print(f"{size} containers:")
+        results[str(size)] = run_size(size, args)
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': {k: getattr(args, k) for k in ('clients', 'streams', 'duration', 'browse_dirs', 'log_lines',
+                                                   'log_interval', 'worker_class')},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with, run with --save-baseline to create one")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline['results'], args.tolerance)
+    if regressions:
+        print(f"Regressions against baseline from {baseline['created_at']}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"No regressions against baseline from {baseline['created_at']} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
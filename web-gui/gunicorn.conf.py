@@ -0,0 +1,30 @@
+# Gunicorn settings for the web GUI
+#
+# The app keeps its container cache, log followers and event subscribers in
+# process memory, so it must run as a single worker process. Concurrency comes
+# from the worker class instead:
+#   gevent  - every request, SSE stream and background loop is a greenlet, and
+#             Docker API calls (including ComposeEngine's pulls, builds and
+#             container recreation) yield while they wait
+#   gthread - one OS thread per connection (GUI_THREADS), closest to the dev server
+import os
+
+bind = f"0.0.0.0:{os.getenv('GUI_PORT', '8080')}"
+workers = 1
+worker_class = os.getenv('GUI_WORKER_CLASS', 'gevent')
+worker_connections = int(os.getenv('GUI_WORKER_CONNECTIONS', '1000'))
+threads = int(os.getenv('GUI_THREADS', '32'))
+
+# Streams stay open indefinitely; the gevent and gthread workers heartbeat
+# independently of requests, so this only catches a wedged worker
+timeout = 120
+graceful_timeout = 10
+keepalive = 5
+
+# Background threads are started when app.py is imported; never import it
+# in the master before forking
+preload_app = False
+
+accesslog = None
+errorlog = '-'
+loglevel = os.getenv('GUI_LOG_LEVEL', 'info')
@@ -68,121 +68,192 @@ function showConfirm(title, message, onConfirm) {
     modal.classList.remove('hidden');
 }
 
+// Background jobs: slow operations answer 202 with a job id; poll it until it
+// finishes and hand back the operation's own result
+async function waitForJob(response, interval = 1000) {
+    const data = await response.json();
+    if (response.status !== 202 || !data.job_id) {
+        return data;
+    }
+
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, interval));
+        const job = await (await fetch(data.job_url)).json();
+        if (job.error && !job.status) {
+            return job;
+        }
+        if (job.status === 'succeeded' || job.status === 'failed') {
+            return job.result || {};
+        }
+    }
+}
+
+async function runBulkAction(action, label) {
+    showConfirm(
+        `${label}`,
+        `${label}? Profiles are processed in parallel in the background.`,
+        async () => {
+            try {
+                const response = await fetch(`/api/${action}`, { method: 'POST' });
+                if (response.status !== 202) {
+                    const data = await response.json();
+                    showToast(data.error || `Error: ${label}`, data.error === 'No profiles to act on' ? 'info' : 'error');
+                    return;
+                }
+
+                showToast(`${label}: working on the profiles...`, 'info');
+                const result = await waitForJob(response);
+                if (result.status === 'completed') {
+                    showToast(`${label}: ${result.succeeded}/${result.total} profiles done`, 'success');
+                } else {
+                    showToast(`${label}: failed for ${(result.failed || []).join(', ') || 'some profiles'}`, 'warning');
+                }
+
+                loadContainers();
+                loadStats();
+                loadAvailableProfiles();
+            } catch (error) {
+                console.error(`Error running ${action}:`, error);
+                showToast(`Error: ${label}`, 'error');
+            }
+        }
+    );
+}
+
 // Fetch and display containers
 async function loadContainers() {
     try {
         const response = await fetch('/api/containers');
-        const containers = await response.json();
+        renderContainers(await response.json());
+    } catch (error) {
+        console.error('Error loading containers:', error);
+    }
+}
 
-        const containersList = document.getElementById('containers-list');
+// Render container cards
+function renderContainers(containers) {
+    const containersList = document.getElementById('containers-list');
 
-        if (containers.length === 0) {
-            containersList.innerHTML = `
-                <div class="bg-white rounded-lg shadow-md p-8 text-center text-gray-500">
-                    <i class="fas fa-box-open text-6xl mb-4"></i>
-                    <p class="text-lg">No sync containers found</p>
-                    <p class="text-sm mt-2">Start containers using: docker compose up -d</p>
-                </div>
-            `;
-            return;
-        }
+    if (containers.length === 0) {
+        containersList.innerHTML = `
+            <div class="bg-white rounded-lg shadow-md p-8 text-center text-gray-500">
+                <i class="fas fa-box-open text-6xl mb-4"></i>
+                <p class="text-lg">No sync containers found</p>
+                <p class="text-sm mt-2">Start containers using: docker compose up -d</p>
+            </div>
+        `;
+        return;
+    }
 
-        containersList.innerHTML = containers.map(container => {
-            const statusColor = container.status === 'running' ? 'green' : 'red';
-            const statusIcon = container.status === 'running' ? 'circle-check' : 'circle-xmark';
-
-            // Sync status badge
-            let syncBadge = '';
-            if (container.sync_status === 'completed') {
-                syncBadge = '<span class="px-2 py-1 rounded text-white bg-green-600"><i class="fas fa-check-circle"></i> Sync Completed</span>';
-            } else if (container.sync_status === 'syncing') {
-                syncBadge = '<span class="px-2 py-1 rounded text-white bg-blue-500"><i class="fas fa-sync fa-spin"></i> Syncing...</span>';
-            } else if (container.sync_status === 'idle') {
-                syncBadge = '<span class="px-2 py-1 rounded text-white bg-yellow-500"><i class="fas fa-clock"></i> Idle</span>';
-            }
+    containersList.innerHTML = containers.map(container => {
+        const statusColor = container.status === 'running' ? 'green' : 'red';
+        const statusIcon = container.status === 'running' ? 'circle-check' : 'circle-xmark';
+
+        // Sync status badge
+        let syncBadge = '';
+        if (container.sync_status === 'completed') {
+            syncBadge = '<span class="px-2 py-1 rounded text-white bg-green-600"><i class="fas fa-check-circle"></i> Sync Completed</span>';
+        } else if (container.sync_status === 'syncing') {
+            const phase = container.sync_phase && container.sync_phase !== 'syncing'
+                ? ` (${container.sync_phase.replace(/_/g, ' ')})` : '';
+            syncBadge = `<span class="px-2 py-1 rounded text-white bg-blue-500"><i class="fas fa-sync fa-spin"></i> Syncing...${phase}</span>`;
+        } else if (container.sync_status === 'failed') {
+            syncBadge = `<span class="px-2 py-1 rounded text-white bg-red-600" title="${container.last_error || ''}"><i class="fas fa-exclamation-circle"></i> Sync Failed</span>`;
+        } else if (container.sync_status === 'idle') {
+            syncBadge = '<span class="px-2 py-1 rounded text-white bg-yellow-500"><i class="fas fa-clock"></i> Idle</span>';
+        }
 
-            return `
-                <div class="bg-white rounded-lg shadow-md p-6">
-                    <div class="flex justify-between items-start mb-4">
-                        <div class="flex-1">
-                            <h3 class="text-xl font-bold text-gray-800 mb-1">
-                                <i class="fas fa-user-circle text-blue-500"></i>
-                                ${container.display_name || container.name}
-                            </h3>
-                            ${container.display_name && container.display_name !== container.profile ?
-                                `<p class="text-sm text-gray-500">${container.name}</p>` : ''
-                            }
-                            <div class="flex items-center gap-2 text-sm">
-                                <span class="px-2 py-1 rounded text-white bg-${statusColor}-500">
-                                    <i class="fas fa-${statusIcon}"></i> ${container.status}
-                                </span>
-                                ${syncBadge}
-                                <span class="text-gray-500">ID: ${container.id}</span>
-                            </div>
+        return `
+            <div class="bg-white rounded-lg shadow-md p-6">
+                <div class="flex justify-between items-start mb-4">
+                    <div class="flex-1">
+                        <h3 class="text-xl font-bold text-gray-800 mb-1">
+                            <i class="fas fa-user-circle text-blue-500"></i>
+                            ${container.display_name || container.name}
+                        </h3>
+                        ${container.display_name && container.display_name !== container.profile ?
+                            `<p class="text-sm text-gray-500">${container.name}</p>` : ''
+                        }
+                        <div class="flex items-center gap-2 text-sm">
+                            <span class="px-2 py-1 rounded text-white bg-${statusColor}-500">
+                                <i class="fas fa-${statusIcon}"></i> ${container.status}
+                            </span>
+                            ${syncBadge}
+                            <span class="text-gray-500">ID: ${container.id}</span>
                         </div>
                     </div>
+                </div>
 
-                    <div class="grid grid-cols-2 gap-4 mb-4 text-sm">
-                        <div>
-                            <i class="fas fa-clock text-gray-400"></i>
-                            <strong>Next sync:</strong> ${container.next_run}
-                            <div class="text-gray-600 ml-5">in ${container.time_until}</div>
-                        </div>
-                        <div>
-                            <i class="fas fa-calendar-alt text-gray-400"></i>
-                            <strong>Schedule:</strong> ${container.cron_schedule}
-                        </div>
-                        <div>
-                            <i class="fas fa-rocket text-gray-400"></i>
-                            <strong>Run on startup:</strong> ${container.run_on_startup}
-                        </div>
-                        <div>
-                            <i class="fas fa-users text-gray-400"></i>
-                            <strong>Workers:</strong> ${container.worker_count}
-                        </div>
+                <div class="grid grid-cols-2 gap-4 mb-4 text-sm">
+                    <div>
+                        <i class="fas fa-clock text-gray-400"></i>
+                        <strong>Next sync:</strong> ${container.next_run}
+                        <div class="text-gray-600 ml-5">in ${container.time_until}</div>
+                    </div>
+                    <div>
+                        <i class="fas fa-calendar-alt text-gray-400"></i>
+                        <strong>Schedule:</strong> ${container.cron_schedule}
+                    </div>
+                    <div>
+                        <i class="fas fa-rocket text-gray-400"></i>
+                        <strong>Run on startup:</strong> ${container.run_on_startup}
                     </div>
+                    <div>
+                        <i class="fas fa-users text-gray-400"></i>
+                        <strong>Workers:</strong> ${container.worker_mode === 'adaptive' ? `up to ${container.worker_count} (adaptive)` : container.worker_count}
+                    </div>
+                </div>
+
+                ${renderDiskUsage(container.disk_usage)}
 
-                    <div class="flex gap-2 flex-wrap">
-                        <button onclick="viewLogs('${container.id}', '${container.name}')"
-                                class="px-4 py-2 bg-blue-500 text-white rounded hover:bg-blue-600 text-sm">
-                            <i class="fas fa-file-lines"></i> View Logs
+                ${renderProgress(container)}
+
+                ${container.status === 'running' ? `
+                    <div data-resources="${container.id}">${renderResources(resourceSeries.get(container.id))}</div>
+                ` : ''}
+
+                <div class="flex gap-2 flex-wrap">
+                    <button onclick="viewLogs('${container.id}', '${container.name}')"
+                            class="px-4 py-2 bg-blue-500 text-white rounded hover:bg-blue-600 text-sm">
+                        <i class="fas fa-file-lines"></i> View Logs
+                    </button>
+                    ${container.status === 'running' ? `
+                        <button onclick="stopContainer('${container.id}')"
+                                class="px-4 py-2 bg-red-500 text-white rounded hover:bg-red-600 text-sm">
+                            <i class="fas fa-stop"></i> Stop
                         </button>
-                        ${container.status === 'running' ? `
-                            <button onclick="stopContainer('${container.id}')"
-                                    class="px-4 py-2 bg-red-500 text-white rounded hover:bg-red-600 text-sm">
-                                <i class="fas fa-stop"></i> Stop
-                            </button>
-                        ` : `
-                            <button onclick="startContainer('${container.id}')"
-                                    class="px-4 py-2 bg-green-500 text-white rounded hover:bg-green-600 text-sm">
-                                <i class="fas fa-play"></i> Start
-                            </button>
-                        `}
-                        <button onclick="restartContainer('${container.id}')"
-                                class="px-4 py-2 bg-yellow-500 text-white rounded hover:bg-yellow-600 text-sm">
-                            <i class="fas fa-rotate"></i> Restart
+                    ` : `
+                        <button onclick="startContainer('${container.id}')"
+                                class="px-4 py-2 bg-green-500 text-white rounded hover:bg-green-600 text-sm">
+                            <i class="fas fa-play"></i> Start
                         </button>
-                        ${container.profile !== 'default' ? `
-                            <button onclick="reAuthProfile('${container.profile}', '${container.display_name || container.name}')"
-                                    class="px-4 py-2 bg-purple-500 text-white rounded hover:bg-purple-600 text-sm">
-                                <i class="fas fa-key"></i> Re-Auth
-                            </button>
-                            <button onclick="editProfileConfig('${container.profile}', '${container.display_name || container.name}')"
-                                    class="px-4 py-2 bg-indigo-500 text-white rounded hover:bg-indigo-600 text-sm">
-                                <i class="fas fa-cog"></i> Edit Config
-                            </button>
-                            <button onclick="deleteProfile('${container.profile}', '${container.display_name || container.name}')"
-                                    class="px-4 py-2 bg-gray-700 text-white rounded hover:bg-gray-800 text-sm">
-                                <i class="fas fa-trash"></i> Delete
-                            </button>
-                        ` : ''}
-                    </div>
+                    `}
+                    <button onclick="restartContainer('${container.id}')"
+                            class="px-4 py-2 bg-yellow-500 text-white rounded hover:bg-yellow-600 text-sm">
+                        <i class="fas fa-rotate"></i> Restart
+                    </button>
+                    ${container.profile !== 'default' ? `
+                        <button onclick="reAuthProfile('${container.profile}', '${container.display_name || container.name}')"
+                                class="px-4 py-2 bg-purple-500 text-white rounded hover:bg-purple-600 text-sm">
+                            <i class="fas fa-key"></i> Re-Auth
+                        </button>
+                        <button onclick="editProfileConfig('${container.profile}', '${container.display_name || container.name}')"
+                                class="px-4 py-2 bg-indigo-500 text-white rounded hover:bg-indigo-600 text-sm">
+                            <i class="fas fa-cog"></i> Edit Config
+                        </button>
+                        <button onclick="deleteProfile('${container.profile}', '${container.display_name || container.name}')"
+                                class="px-4 py-2 bg-gray-700 text-white rounded hover:bg-gray-800 text-sm">
+                            <i class="fas fa-trash"></i> Delete
+                        </button>
+                    ` : ''}
                 </div>
-            `;
-        }).join('');
+            </div>
+        `;
+    }).join('');
 
-    } catch (error) {
-        console.error('Error loading containers:', error);
+    // Cards of newly started containers get their sparklines right away
+    if (containers.some(c => c.status === 'running' && !resourceSeries.has(c.id))) {
+        loadResources();
     }
 }
 
@@ -190,16 +261,152 @@ async function loadContainers() {
 async function loadStats() {
     try {
         const response = await fetch('/api/stats');
-        const stats = await response.json();
-
-        document.getElementById('stat-total').textContent = stats.total;
-        document.getElementById('stat-running').textContent = stats.running;
-        document.getElementById('stat-stopped').textContent = stats.stopped;
+        renderStats(await response.json());
     } catch (error) {
         console.error('Error loading stats:', error);
     }
 }
 
+// Format a byte count as a human readable size
+function formatBytes(bytes) {
+    const units = ['B', 'KB', 'MB', 'GB', 'TB'];
+    let i = 0;
+    while (bytes >= 1024 && i < units.length - 1) {
+        bytes /= 1024;
+        i++;
+    }
+    return `${bytes.toFixed(i === 0 ? 0 : 1)} ${units[i]}`;
+}
+
+// Format a number of seconds as e.g. "2h 5m"
+function formatDuration(seconds) {
+    if (seconds === null || seconds === undefined) return 'N/A';
+    const hours = Math.floor(seconds / 3600);
+    const minutes = Math.floor((seconds % 3600) / 60);
+    return hours > 0 ? `${hours}h ${minutes}m` : `${minutes}m ${seconds % 60}s`;
+}
+
+// Size of the profile's photo directory, its growth and quota
+function renderDiskUsage(usage) {
+    if (!usage || usage.scanning) return '';
+
+    const quota = usage.quota_bytes ? ` / ${formatBytes(usage.quota_bytes)} (${usage.quota_percent}%)` : '';
+    const growth = usage.growth_bytes_per_day !== null
+        ? `<span><i class="fas fa-arrow-trend-up text-gray-400"></i> ${usage.growth_bytes_per_day < 0 ? '-' : '+'}${formatBytes(Math.abs(usage.growth_bytes_per_day))}/day</span>` : '';
+
+    return `
+        <div class="mb-4 text-sm flex flex-wrap gap-4 text-gray-700">
+            <span title="${usage.live ? 'Kept current as files change' : 'Refreshed by periodic rescans'}">
+                <i class="fas fa-hard-drive text-gray-400"></i> ${formatBytes(usage.bytes)}${quota} in ${usage.files} files
+            </span>
+            ${growth}
+            ${usage.warning ? `<span class="text-red-600"><i class="fas fa-triangle-exclamation"></i> ${usage.warning}</span>` : ''}
+        </div>
+    `;
+}
+
+// Live download counters of the current/last sync run
+function renderProgress(container) {
+    const p = container.progress;
+    if (!p) return '';
+
+    const total = p.items_remaining !== null ? p.items_seen + p.items_remaining : null;
+    const percent = total ? Math.min(100, Math.round(p.items_seen / total * 100)) : null;
+    const syncing = container.sync_status === 'syncing';
+
+    return `
+        <div class="mb-4 text-sm bg-gray-50 rounded p-3">
+            ${percent !== null ? `
+                <div class="w-full bg-gray-200 rounded h-2 mb-2">
+                    <div class="bg-blue-500 h-2 rounded" style="width: ${percent}%"></div>
+                </div>
+            ` : ''}
+            <div class="flex flex-wrap gap-4 text-gray-700">
+                <span><i class="fas fa-eye text-gray-400"></i> Seen: ${p.items_seen}${total ? ` / ~${total}` : ''}</span>
+                <span><i class="fas fa-download text-gray-400"></i> Downloaded: ${p.downloaded} (${formatBytes(p.bytes_written)})</span>
+                <span><i class="fas fa-forward text-gray-400"></i> Skipped: ${p.skipped}</span>
+                <span class="${p.failed > 0 ? 'text-red-600' : ''}"><i class="fas fa-triangle-exclamation text-gray-400"></i> Errors: ${p.failed}</span>
+                ${syncing ? `
+                    <span><i class="fas fa-gauge text-gray-400"></i> ${p.items_per_second.toFixed(2)} items/s</span>
+                    <span><i class="fas fa-hourglass-half text-gray-400"></i> ETA: ${formatDuration(p.eta_seconds)}</span>
+                ` : `
+                    <span><i class="fas fa-stopwatch text-gray-400"></i> Took: ${formatDuration(p.elapsed_seconds)}</span>
+                `}
+            </div>
+        </div>
+    `;
+}
+
+// CPU, memory, network and disk use of the running containers, sampled in the
+// background by the server; refreshed separately from the cards
+const resourceSeries = new Map();  // container id -> /resources response, null if not sampled yet
+const RESOURCE_POINTS = 60;
+
+function renderSparkline(values, color) {
+    if (values.length < 2) return '';
+    const width = 120, height = 24;
+    const top = Math.max(...values) || 1;
+    const step = width / (values.length - 1);
+    const points = values.map((v, i) => `${(i * step).toFixed(1)},${(height - 1 - v / top * (height - 2)).toFixed(1)}`).join(' ');
+    return `
+        <svg width="${width}" height="${height}" viewBox="0 0 ${width} ${height}" class="block">
+            <polyline points="${points}" fill="none" stroke="${color}" stroke-width="1.5" stroke-linejoin="round"/>
+        </svg>
+    `;
+}
+
+function renderResources(data) {
+    if (!data || !data.latest) return '';
+    const s = data.series;
+    const latest = data.latest;
+    const sum = (a, b) => a.map((v, i) => v + b[i]);
+    const memoryLimit = data.memory_limit ? ` / ${formatBytes(data.memory_limit)}` : '';
+
+    return `
+        <div class="mb-4 grid grid-cols-2 md:grid-cols-4 gap-4 text-sm text-gray-700" title="Last ${formatDuration(s.timestamp.length > 1 ? Math.round(s.timestamp[s.timestamp.length - 1] - s.timestamp[0]) : 0)}">
+            <div>
+                <div><i class="fas fa-microchip text-gray-400"></i> CPU: ${latest.cpu_percent.toFixed(0)}%</div>
+                ${renderSparkline(s.cpu_percent, '#3b82f6')}
+            </div>
+            <div>
+                <div><i class="fas fa-memory text-gray-400"></i> Memory: ${formatBytes(latest.memory_bytes)}${memoryLimit}</div>
+                ${renderSparkline(s.memory_bytes, '#8b5cf6')}
+            </div>
+            <div>
+                <div><i class="fas fa-network-wired text-gray-400"></i> Network: ${formatBytes(latest.net_rx_bytes_per_second + latest.net_tx_bytes_per_second)}/s</div>
+                ${renderSparkline(sum(s.net_rx_bytes_per_second, s.net_tx_bytes_per_second), '#10b981')}
+            </div>
+            <div>
+                <div><i class="fas fa-hard-drive text-gray-400"></i> Disk: ${formatBytes(latest.block_read_bytes_per_second + latest.block_write_bytes_per_second)}/s</div>
+                ${renderSparkline(sum(s.block_read_bytes_per_second, s.block_write_bytes_per_second), '#f59e0b')}
+            </div>
+        </div>
+    `;
+}
+
+async function loadResources() {
+    const elements = [...document.querySelectorAll('[data-resources]')];
+    await Promise.all(elements.map(async (element) => {
+        const id = element.dataset.resources;
+        try {
+            const response = await fetch(`/api/container/${id}/resources?points=${RESOURCE_POINTS}`);
+            resourceSeries.set(id, response.ok ? await response.json() : null);
+            const current = document.querySelector(`[data-resources="${id}"]`);
+            if (current) current.innerHTML = renderResources(resourceSeries.get(id));
+        } catch (error) {
+            console.error('Error loading resources:', error);
+        }
+    }));
+}
+
+setInterval(loadResources, 15000);
+
+function renderStats(stats) {
+    document.getElementById('stat-total').textContent = stats.total;
+    document.getElementById('stat-running').textContent = stats.running;
+    document.getElementById('stat-stopped').textContent = stats.stopped;
+}
+
 // Prettify JSON logs
 function prettifyLogLine(line) {
     // Check if line contains JSON
@@ -245,23 +452,9 @@ async function viewLogs(containerId, containerName) {
     currentContainerId = containerId;
     document.getElementById('log-container-name').textContent = containerName;
     document.getElementById('log-modal').classList.remove('hidden');
+    document.getElementById('log-content').innerHTML = '';
 
-    // Load initial logs
-    try {
-        const response = await fetch(`/api/container/${containerId}/logs`);
-        const data = await response.json();
-
-        if (data.logs) {
-            const logContent = document.getElementById('log-content');
-            const lines = data.logs.split('\n');
-            logContent.innerHTML = lines.map(line => prettifyLogLine(line)).join('\n');
-            scrollLogsToBottom();
-        }
-    } catch (error) {
-        console.error('Error loading logs:', error);
-    }
-
-    // Start streaming logs
+    // Start streaming logs (the stream starts with the recent backlog)
     startLogStream(containerId);
 }
 
@@ -274,9 +467,10 @@ function startLogStream(containerId) {
     currentLogStream = new EventSource(`/api/container/${containerId}/logs/stream`);
 
     currentLogStream.onmessage = function(event) {
+        // Each message carries a batch of lines
         const logContent = document.getElementById('log-content');
-        const newLine = prettifyLogLine(event.data);
-        logContent.innerHTML += newLine + '\n';
+        const newLines = event.data.split('\n').map(line => prettifyLogLine(line)).join('\n');
+        logContent.insertAdjacentHTML('beforeend', newLines + '\n');
 
         if (document.getElementById('auto-scroll').checked) {
             scrollLogsToBottom();
@@ -372,81 +566,79 @@ async function restartContainer(containerId) {
 async function loadAvailableProfiles() {
     try {
         const response = await fetch('/api/available-profiles');
-        const profiles = await response.json();
+        renderAvailableProfiles(await response.json());
+    } catch (error) {
+        console.error('Error loading available profiles:', error);
+    }
+}
 
-        const profilesDiv = document.getElementById('available-profiles');
+function renderAvailableProfiles(profiles) {
+    const profilesDiv = document.getElementById('available-profiles');
 
-        if (profiles.length === 0) {
-            profilesDiv.innerHTML = '';
-            return;
-        }
+    if (profiles.length === 0) {
+        profilesDiv.innerHTML = '';
+        return;
+    }
 
-        // Check authentication status for each profile
-        const profilesWithAuth = await Promise.all(profiles.map(async profile => {
-            const authResponse = await fetch(`/api/check-auth/${profile.name}`);
-            const authData = await authResponse.json();
-            return { ...profile, authenticated: authData.authenticated };
-        }));
-
-        profilesDiv.innerHTML = `
-            <div class="bg-yellow-50 border-l-4 border-yellow-400 p-4 rounded">
-                <div class="flex items-start">
-                    <div class="flex-shrink-0">
-                        <i class="fas fa-exclamation-triangle text-yellow-400 text-xl"></i>
-                    </div>
-                    <div class="ml-3 flex-1">
-                        <h3 class="text-sm font-medium text-yellow-800 mb-2">
-                            Available Profiles (Not Running)
-                        </h3>
-                        <div class="space-y-2">
-                            ${profilesWithAuth.map(profile => `
-                                <div class="flex items-center justify-between bg-white p-3 rounded">
-                                    <div>
-                                        <span class="font-semibold">${profile.display_name || profile.name}</span>
-                                        ${profile.display_name && profile.display_name !== profile.name ?
-                                            `<span class="ml-2 text-xs text-gray-500">(${profile.name})</span>` : ''
-                                        }
-                                        ${!profile.has_compose && profile.authenticated ?
-                                            '<span class="ml-2 text-xs bg-blue-100 text-blue-800 px-2 py-1 rounded"><i class="fas fa-check"></i> Authenticated</span>' :
-                                            !profile.has_compose ?
-                                            '<span class="ml-2 text-xs bg-red-100 text-red-800 px-2 py-1 rounded">Not authenticated</span>' :
-                                            '<span class="ml-2 text-xs bg-green-100 text-green-800 px-2 py-1 rounded">Ready to start</span>'
-                                        }
-                                    </div>
-                                    <div class="flex gap-2">
-                                        ${!profile.has_compose ? `
-                                            ${profile.authenticated ? `
-                                                <button onclick="openConfigModal('${profile.name}', '${profile.display_name || profile.name}')"
-                                                        class="px-3 py-1 bg-blue-500 text-white text-sm rounded hover:bg-blue-600">
-                                                    <i class="fas fa-cog"></i> Configure
-                                                </button>
-                                            ` : `
-                                                <button onclick="startVNCAuth('${profile.name}', '${profile.display_name || profile.name}')"
-                                                        class="px-3 py-1 bg-purple-500 text-white text-sm rounded hover:bg-purple-600">
-                                                    <i class="fas fa-key"></i> Authenticate
-                                                </button>
-                                            `}
+    // Authentication status is included in each profile record
+    const profilesWithAuth = profiles;
+
+    profilesDiv.innerHTML = `
+        <div class="bg-yellow-50 border-l-4 border-yellow-400 p-4 rounded">
+            <div class="flex items-start">
+                <div class="flex-shrink-0">
+                    <i class="fas fa-exclamation-triangle text-yellow-400 text-xl"></i>
+                </div>
+                <div class="ml-3 flex-1">
+                    <h3 class="text-sm font-medium text-yellow-800 mb-2">
+                        Available Profiles (Not Running)
+                    </h3>
+                    <div class="space-y-2">
+                        ${profilesWithAuth.map(profile => `
+                            <div class="flex items-center justify-between bg-white p-3 rounded">
+                                <div>
+                                    <span class="font-semibold">${profile.display_name || profile.name}</span>
+                                    ${profile.display_name && profile.display_name !== profile.name ?
+                                        `<span class="ml-2 text-xs text-gray-500">(${profile.name})</span>` : ''
+                                    }
+                                    ${!profile.has_compose && profile.authenticated ?
+                                        '<span class="ml-2 text-xs bg-blue-100 text-blue-800 px-2 py-1 rounded"><i class="fas fa-check"></i> Authenticated</span>' :
+                                        !profile.has_compose ?
+                                        '<span class="ml-2 text-xs bg-red-100 text-red-800 px-2 py-1 rounded">Not authenticated</span>' :
+                                        '<span class="ml-2 text-xs bg-green-100 text-green-800 px-2 py-1 rounded">Ready to start</span>'
+                                    }
+                                </div>
+                                <div class="flex gap-2">
+                                    ${!profile.has_compose ? `
+                                        ${profile.authenticated ? `
+                                            <button onclick="openConfigModal('${profile.name}', '${profile.display_name || profile.name}')"
+                                                    class="px-3 py-1 bg-blue-500 text-white text-sm rounded hover:bg-blue-600">
+                                                <i class="fas fa-cog"></i> Configure
+                                            </button>
                                         ` : `
-                                            <button onclick="startProfileFromGUI('${profile.name}')"
-                                                    class="px-3 py-1 bg-green-500 text-white text-sm rounded hover:bg-green-600">
-                                                <i class="fas fa-play"></i> Start
+                                            <button onclick="startVNCAuth('${profile.name}', '${profile.display_name || profile.name}')"
+                                                    class="px-3 py-1 bg-purple-500 text-white text-sm rounded hover:bg-purple-600">
+                                                <i class="fas fa-key"></i> Authenticate
                                             </button>
                                         `}
-                                        <button onclick="deleteProfileFiles('${profile.name}', '${profile.display_name || profile.name}')"
-                                                class="px-3 py-1 bg-gray-700 text-white text-sm rounded hover:bg-gray-800">
-                                            <i class="fas fa-trash"></i> Delete
+                                    ` : `
+                                        <button onclick="startProfileFromGUI('${profile.name}')"
+                                                class="px-3 py-1 bg-green-500 text-white text-sm rounded hover:bg-green-600">
+                                            <i class="fas fa-play"></i> Start
                                         </button>
-                                    </div>
+                                    `}
+                                    <button onclick="deleteProfileFiles('${profile.name}', '${profile.display_name || profile.name}')"
+                                            class="px-3 py-1 bg-gray-700 text-white text-sm rounded hover:bg-gray-800">
+                                        <i class="fas fa-trash"></i> Delete
+                                    </button>
                                 </div>
-                            `).join('')}
-                        </div>
+                            </div>
+                        `).join('')}
                     </div>
                 </div>
             </div>
-        `;
-    } catch (error) {
-        console.error('Error loading available profiles:', error);
-    }
+        </div>
+    `;
 }
 
 // Note: createCompose is replaced by openConfigModal + saveConfiguration
@@ -455,7 +647,7 @@ async function loadAvailableProfiles() {
 async function startProfileFromGUI(profileName) {
     try {
         const response = await fetch(`/api/start-profile/${profileName}`, { method: 'POST' });
-        const data = await response.json();
+        const data = await waitForJob(response);
 
         if (data.status === 'started') {
             // Reload everything to show the running container
@@ -626,6 +818,10 @@ function openConfigModal(profileName, displayName) {
     document.getElementById('config-run-on-startup').checked = true;
     document.getElementById('config-loglevel').value = 'info';
     document.getElementById('config-workers').value = 6;
+    document.getElementById('config-worker-mode').value = 'fixed';
+    document.getElementById('config-worker-min').value = 1;
+    showWorkerRecommendation(null);
+    toggleWorkerMode();
     document.getElementById('config-albums').value = '';
     document.getElementById('config-timezone').value = 'Europe/Rome';
     document.getElementById('config-photo-dir').value = '';
@@ -635,6 +831,11 @@ function openConfigModal(profileName, displayName) {
     document.getElementById('config-pgid').value = 1000;
     document.getElementById('config-restart-schedule').value = '';
     document.getElementById('config-healthcheck-url').value = '';
+    document.getElementById('config-sync-priority').value = 0;
+    document.getElementById('config-disk-quota').value = 0;
+    document.getElementById('config-sync-mode').value = 'full';
+    document.getElementById('config-full-rescan-days').value = 7;
+    toggleSyncMode();
 
     // Show cron fields by default
     toggleCronSchedule();
@@ -669,6 +870,10 @@ async function editProfileConfig(profileName, displayName) {
         document.getElementById('config-run-on-startup').checked = config.run_on_startup;
         document.getElementById('config-loglevel').value = config.loglevel || 'info';
         document.getElementById('config-workers').value = config.worker_count || 6;
+        document.getElementById('config-worker-mode').value = config.worker_mode || 'fixed';
+        document.getElementById('config-worker-min').value = config.worker_min || 1;
+        showWorkerRecommendation(config.worker_tuning);
+        toggleWorkerMode();
         document.getElementById('config-albums').value = config.albums || '';
         document.getElementById('config-timezone').value = config.timezone || 'Europe/Rome';
         document.getElementById('config-photo-dir').value = config.photo_dir || '';
@@ -678,6 +883,11 @@ async function editProfileConfig(profileName, displayName) {
         document.getElementById('config-pgid').value = config.pgid || 1000;
         document.getElementById('config-restart-schedule').value = config.restart_schedule || '';
         document.getElementById('config-healthcheck-url').value = config.healthcheck_url || '';
+        document.getElementById('config-sync-priority').value = config.sync_priority || 0;
+        document.getElementById('config-disk-quota').value = config.disk_quota_gb || 0;
+        document.getElementById('config-sync-mode').value = config.sync_mode || 'full';
+        document.getElementById('config-full-rescan-days').value = config.full_rescan_days !== undefined ? config.full_rescan_days : 7;
+        toggleSyncMode();
 
         // Toggle cron fields visibility
         toggleCronSchedule();
@@ -712,6 +922,33 @@ function toggleCronSchedule() {
     }
 }
 
+function toggleSyncMode() {
+    const incremental = document.getElementById('config-sync-mode').value === 'incremental';
+    document.getElementById('config-full-rescan-days').disabled = !incremental;
+}
+
+function toggleWorkerMode() {
+    const adaptive = document.getElementById('config-worker-mode').value === 'adaptive';
+    document.getElementById('config-worker-min').disabled = !adaptive;
+    document.getElementById('config-workers-help').textContent = adaptive
+        ? 'Minimum and maximum workers; each sync adjusts the count from its download rate and the host\'s CPU and memory'
+        : 'Number of parallel download workers (1-20, default: 6)';
+}
+
+function showWorkerRecommendation(tuning) {
+    const el = document.getElementById('config-worker-recommendation');
+    if (!tuning || !tuning.recommended_workers) {
+        el.classList.add('hidden');
+        el.innerHTML = '';
+        return;
+    }
+    const tunedAt = tuning.tuned_at ? new Date(tuning.tuned_at).toLocaleDateString() : 'the last adaptive sync';
+    el.innerHTML = `<i class="fas fa-lightbulb"></i> Recommended: <strong>${tuning.recommended_workers}</strong> workers ` +
+        `(${tuning.items_per_minute} items/min, tuned ${tunedAt}) ` +
+        `<button type="button" class="underline" onclick="document.getElementById('config-workers').value = ${tuning.recommended_workers}">Use</button>`;
+    el.classList.remove('hidden');
+}
+
 async function saveConfiguration() {
     const enableCron = document.getElementById('config-enable-cron').checked;
 
@@ -722,6 +959,8 @@ async function saveConfiguration() {
         run_on_startup: enableCron ? document.getElementById('config-run-on-startup').checked : false,
         loglevel: document.getElementById('config-loglevel').value,
         worker_count: parseInt(document.getElementById('config-workers').value),
+        worker_mode: document.getElementById('config-worker-mode').value,
+        worker_min: parseInt(document.getElementById('config-worker-min').value) || 1,
         albums: document.getElementById('config-albums').value.trim(),
         timezone: document.getElementById('config-timezone').value.trim(),
         photo_dir: document.getElementById('config-photo-dir').value.trim(),
@@ -730,7 +969,11 @@ async function saveConfiguration() {
         puid: parseInt(document.getElementById('config-puid').value),
         pgid: parseInt(document.getElementById('config-pgid').value),
         restart_schedule: document.getElementById('config-restart-schedule').value.trim(),
-        healthcheck_url: document.getElementById('config-healthcheck-url').value.trim()
+        healthcheck_url: document.getElementById('config-healthcheck-url').value.trim(),
+        sync_priority: parseInt(document.getElementById('config-sync-priority').value) || 0,
+        disk_quota_gb: parseFloat(document.getElementById('config-disk-quota').value) || 0,
+        sync_mode: document.getElementById('config-sync-mode').value,
+        full_rescan_days: parseInt(document.getElementById('config-full-rescan-days').value) || 0
     };
 
     try {
@@ -762,7 +1005,7 @@ async function saveConfiguration() {
 
                         // Use the recreate endpoint that stops+removes+starts with docker-compose
                         const recreateResp = await fetch(`/api/recreate-profile/${profileName}`, { method: 'POST' });
-                        const recreateData = await recreateResp.json();
+                        const recreateData = await waitForJob(recreateResp);
 
                         if (recreateData.status !== 'recreated') {
                             throw new Error(recreateData.error || 'Failed to recreate container');
@@ -855,7 +1098,7 @@ async function startVNCContainer() {
             method: 'POST'
         });
 
-        const data = await response.json();
+        const data = await waitForJob(response);
 
         if (data.status === 'started') {
             // Show VNC running UI
@@ -954,12 +1197,16 @@ async function stopVNCAndSave() {
 
 // Folder Picker
 let currentFolderPath = '/';
+let folderPickerOffset = 0;
+let folderFilterTimer = null;
+const FOLDER_PAGE_SIZE = 200;
 
 async function openFolderPicker() {
     // Get current value or start from home
     const currentValue = document.getElementById('config-photo-dir').value.trim();
     currentFolderPath = currentValue || '/home';
 
+    document.getElementById('folder-picker-filter').value = '';
     document.getElementById('folder-picker-modal').classList.remove('hidden');
     await loadFolderContents(currentFolderPath);
 }
@@ -968,14 +1215,32 @@ function closeFolderPicker() {
     document.getElementById('folder-picker-modal').classList.add('hidden');
 }
 
-async function loadFolderContents(path) {
+function filterFolderContents() {
+    // Wait for a pause in typing before asking the server
+    clearTimeout(folderFilterTimer);
+    folderFilterTimer = setTimeout(() => loadFolderContents(currentFolderPath), 250);
+}
+
+async function loadFolderContents(path, append = false) {
+    const filterInput = document.getElementById('folder-picker-filter');
+    if (!append && path !== currentFolderPath) {
+        // The filter applies to one folder only
+        filterInput.value = '';
+    }
+    const offset = append ? folderPickerOffset : 0;
+
     try {
         const response = await fetch('/api/browse-directories', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ path: path })
+            body: JSON.stringify({
+                path: path,
+                offset: offset,
+                limit: FOLDER_PAGE_SIZE,
+                filter: filterInput.value.trim()
+            })
         });
 
         const data = await response.json();
@@ -986,56 +1251,79 @@ async function loadFolderContents(path) {
         }
 
         currentFolderPath = data.current_path;
+        folderPickerOffset = data.offset + data.directories.length;
         document.getElementById('folder-picker-path').value = data.current_path;
 
         const listDiv = document.getElementById('folder-picker-list');
-        listDiv.innerHTML = '';
-
-        // Add parent directory link if not at root
-        if (data.parent_path) {
-            const parentDiv = document.createElement('div');
-            parentDiv.className = 'flex items-center gap-2 p-2 hover:bg-gray-100 rounded cursor-pointer';
-            parentDiv.onclick = () => loadFolderContents(data.parent_path);
-            parentDiv.innerHTML = `
-                <i class="fas fa-level-up-alt text-gray-500"></i>
-                <span class="font-medium text-gray-700">..</span>
-                <span class="text-xs text-gray-500">(parent directory)</span>
-            `;
-            listDiv.appendChild(parentDiv);
+        const loadMore = document.getElementById('folder-picker-more');
+        if (loadMore) {
+            loadMore.remove();
+        }
+
+        if (!append) {
+            listDiv.innerHTML = '';
+
+            // Add parent directory link if not at root
+            if (data.parent_path) {
+                const parentDiv = document.createElement('div');
+                parentDiv.className = 'flex items-center gap-2 p-2 hover:bg-gray-100 rounded cursor-pointer';
+                parentDiv.onclick = () => loadFolderContents(data.parent_path);
+                parentDiv.innerHTML = `
+                    <i class="fas fa-level-up-alt text-gray-500"></i>
+                    <span class="font-medium text-gray-700">..</span>
+                    <span class="text-xs text-gray-500">(parent directory)</span>
+                `;
+                listDiv.appendChild(parentDiv);
+            }
+
+            if (data.total_directories === 0) {
+                listDiv.innerHTML += filterInput.value.trim()
+                    ? '<p class="text-gray-500 text-sm p-4 text-center">No folders match the filter</p>'
+                    : '<p class="text-gray-500 text-sm p-4 text-center">No subdirectories found</p>';
+            }
         }
 
         // Add directories
-        if (data.directories.length === 0) {
-            listDiv.innerHTML += '<p class="text-gray-500 text-sm p-4 text-center">No subdirectories found</p>';
-        } else {
-            data.directories.forEach(dir => {
-                const dirDiv = document.createElement('div');
-                dirDiv.className = 'flex items-center gap-2 p-2 hover:bg-blue-50 rounded cursor-pointer';
-
-                if (dir.unreadable) {
-                    dirDiv.className += ' opacity-50';
-                    dirDiv.innerHTML = `
-                        <i class="fas fa-folder text-gray-400"></i>
-                        <span class="flex-1 text-gray-500">${dir.name}</span>
-                        <span class="text-xs text-red-500"><i class="fas fa-lock"></i> No permission</span>
-                    `;
-                } else {
-                    dirDiv.onclick = () => loadFolderContents(dir.path);
-                    dirDiv.innerHTML = `
-                        <i class="fas fa-folder text-yellow-500"></i>
-                        <span class="flex-1">${dir.name}</span>
-                        <i class="fas fa-chevron-right text-gray-400"></i>
-                    `;
-                }
+        data.directories.forEach(dir => {
+            const dirDiv = document.createElement('div');
+            dirDiv.className = 'flex items-center gap-2 p-2 hover:bg-blue-50 rounded cursor-pointer';
+
+            if (dir.unreadable) {
+                dirDiv.className += ' opacity-50';
+                dirDiv.innerHTML = `
+                    <i class="fas fa-folder text-gray-400"></i>
+                    <span class="flex-1 text-gray-500">${dir.name}</span>
+                    <span class="text-xs text-red-500"><i class="fas fa-lock"></i> No permission</span>
+                `;
+            } else {
+                dirDiv.onclick = () => loadFolderContents(dir.path);
+                dirDiv.innerHTML = `
+                    <i class="fas fa-folder text-yellow-500"></i>
+                    <span class="flex-1">${dir.name}</span>
+                    <i class="fas fa-chevron-right text-gray-400"></i>
+                `;
+            }
+
+            listDiv.appendChild(dirDiv);
+        });
 
-                listDiv.appendChild(dirDiv);
-            });
+        if (data.has_more) {
+            const moreDiv = document.createElement('div');
+            moreDiv.id = 'folder-picker-more';
+            moreDiv.className = 'p-2 text-center';
+            moreDiv.innerHTML = `
+                <button class="px-3 py-1 text-sm text-blue-600 hover:bg-blue-50 rounded">
+                    <i class="fas fa-chevron-down"></i> Load more (${data.total_directories - folderPickerOffset} remaining)
+                </button>
+            `;
+            moreDiv.querySelector('button').onclick = () => loadFolderContents(currentFolderPath, true);
+            listDiv.appendChild(moreDiv);
         }
 
         // Update info
-        const infoText = data.directories.length === 1
+        const infoText = data.total_directories === 1
             ? '1 directory'
-            : `${data.directories.length} directories`;
+            : `${data.total_directories} directories`;
         const filesText = data.files_count > 0 ? `, ${data.files_count} files` : '';
         document.getElementById('folder-picker-info').textContent = infoText + filesText;
 
@@ -1080,14 +1368,87 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
-// Auto-refresh containers every 10 seconds
-setInterval(() => {
+// Live dashboard updates
+// The server pushes only changed records over /api/events; the records are kept
+// here and the affected section is re-rendered. If the event stream is not
+// available we fall back to polling every 10 seconds.
+const dashboardState = {
+    containers: new Map(),
+    profiles: new Map()
+};
+let pollingTimer = null;
+
+function renderDashboardContainers() {
+    renderContainers([...dashboardState.containers.values()].sort((a, b) => a.name.localeCompare(b.name)));
+}
+
+function renderDashboardProfiles() {
+    renderAvailableProfiles([...dashboardState.profiles.values()].sort((a, b) => a.display_name.localeCompare(b.display_name)));
+}
+
+function startPolling() {
+    if (pollingTimer) return;
+    pollingTimer = setInterval(() => {
+        loadContainers();
+        loadStats();
+        loadAvailableProfiles();
+    }, 10000);
+}
+
+function stopPolling() {
+    clearInterval(pollingTimer);
+    pollingTimer = null;
+}
+
+function connectDashboardEvents() {
+    const events = new EventSource('/api/events');
+
+    events.onopen = stopPolling;
+
+    events.addEventListener('snapshot', (event) => {
+        const snapshot = JSON.parse(event.data);
+        dashboardState.containers = new Map(snapshot.containers.map(c => [c.id, c]));
+        dashboardState.profiles = new Map(snapshot.profiles.map(p => [p.name, p]));
+        renderDashboardContainers();
+        renderDashboardProfiles();
+        renderStats(snapshot.stats);
+    });
+
+    events.addEventListener('container', (event) => {
+        const container = JSON.parse(event.data);
+        dashboardState.containers.set(container.id, container);
+        renderDashboardContainers();
+    });
+
+    events.addEventListener('container-removed', (event) => {
+        dashboardState.containers.delete(JSON.parse(event.data).id);
+        renderDashboardContainers();
+    });
+
+    events.addEventListener('profile', (event) => {
+        const profile = JSON.parse(event.data);
+        dashboardState.profiles.set(profile.name, profile);
+        renderDashboardProfiles();
+    });
+
+    events.addEventListener('profile-removed', (event) => {
+        dashboardState.profiles.delete(JSON.parse(event.data).id);
+        renderDashboardProfiles();
+    });
+
+    events.addEventListener('stats', (event) => {
+        renderStats(JSON.parse(event.data));
+    });
+
+    // EventSource reconnects by itself, keep the dashboard fresh meanwhile
+    events.onerror = startPolling;
+}
+
+if (window.EventSource) {
+    connectDashboardEvents();
+} else {
     loadContainers();
     loadStats();
     loadAvailableProfiles();
-}, 10000);
-
-// Initial load
-loadContainers();
-loadStats();
-loadAvailableProfiles();
+    startPolling();
+}